@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.monitoring.benchmarking import benchmark
+from .demand import compute_demand
+from .revenue import revenue_report
+from .utilization import compute_utilization
+
+
+@benchmark('utilization_year', 'Utilización semanal de toda la clínica en los últimos 365 días')
+def utilization_year(ctx):
+    date_to = timezone.localdate()
+    date_from = date_to - timedelta(days=364)
+    return lambda: compute_utilization(date_from, date_to, 'week')
+
+
+@benchmark('revenue_by_professional', 'Facturación de los últimos 24 meses agrupada por profesional')
+def revenue_by_professional(ctx):
+    month_to = timezone.localdate().replace(day=1)
+    month_from = month_to.replace(year=month_to.year - 2)
+    return lambda: revenue_report('professional', month_from, month_to)
+
+
+@benchmark('demand_two_years', 'Mapa de calor y anticipación de toda la clínica en los últimos 2 años')
+def demand_two_years(ctx):
+    date_to = timezone.localdate()
+    date_from = date_to - timedelta(days=729)
+    return lambda: compute_demand(date_from, date_to)
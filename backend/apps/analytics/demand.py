@@ -0,0 +1,190 @@
+"""
+Demanda de turnos: mapa de calor por día de la semana y hora, anticipación
+de las reservas y demanda insatisfecha.
+
+Todas las métricas salen de una única pasada sobre las citas del período
+leídas como tuplas planas (``values_list``), acumulando en listas indexadas
+por celda (día, hora) y en un histograma por días de anticipación; la
+capacidad ofrecida se deriva del patrón semanal de ``ProfessionalAvailability``.
+Los resultados se guardan en caché por período y alcance.
+"""
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+from .utilization import BOOKED_STATUSES, load_weekly_windows
+
+HOURS = 24
+DAYS = 7
+# Límites superiores (en días) de los tramos de anticipación
+LEAD_TIME_BUCKETS = ((0, 'mismo día'), (1, '1 día'), (3, '2-3 días'), (7, '4-7 días'),
+                     (14, '8-14 días'), (30, '15-30 días'), (60, '31-60 días'), (None, 'más de 60 días'))
+# Ocupación a partir de la cual una franja se considera saturada
+SATURATION_THRESHOLD = 0.9
+# Los períodos cerrados no cambian: se cachean más tiempo que los que incluyen hoy
+CACHE_TIMEOUT_OPEN = 15 * 60
+CACHE_TIMEOUT_CLOSED = 24 * 60 * 60
+
+
+def _cell(weekday, hour):
+    return weekday * HOURS + hour
+
+
+def _add_minutes_by_hour(cells, weekday, start_minute, end_minute):
+    """Reparte un intervalo ``[inicio, fin)`` en minutos del día entre las horas que cubre."""
+    minute = start_minute
+    while minute < end_minute:
+        hour_end = (minute // 60 + 1) * 60
+        chunk_end = min(end_minute, hour_end)
+        cells[_cell(weekday, minute // 60)] += chunk_end - minute
+        minute = chunk_end
+
+
+def _weekday_occurrences(date_from, date_to):
+    """Cantidad de lunes, martes, ... domingos dentro del rango (inclusive)."""
+    days = (date_to - date_from).days + 1
+    weeks, remainder = divmod(days, 7)
+    counts = [weeks] * DAYS
+    for offset in range(remainder):
+        counts[(date_from.weekday() + offset) % 7] += 1
+    return counts
+
+
+def _percentile(histogram, total, fraction):
+    """Percentil de un histograma ``{días: cantidad}`` acumulando en orden."""
+    if not total:
+        return None
+    target = fraction * total
+    accumulated = 0
+    for days in sorted(histogram):
+        accumulated += histogram[days]
+        if accumulated >= target:
+            return days
+    return None
+
+
+def compute_demand(date_from, date_to, professional_ids=None):
+    """Calcula el mapa de calor, la anticipación y la saturación por franja horaria."""
+    current_timezone = timezone.get_current_timezone()
+    bookings = [0] * (DAYS * HOURS)
+    cancelled = [0] * (DAYS * HOURS)
+    booked_minutes = [0] * (DAYS * HOURS)
+    offered_minutes = [0] * (DAYS * HOURS)
+    outside_availability = 0
+    lead_days = Counter()
+
+    # Capacidad: ventanas semanales multiplicadas por las ocurrencias de cada día
+    windows = load_weekly_windows(professional_ids)
+    occurrences = _weekday_occurrences(date_from, date_to)
+    for week in windows.values():
+        for weekday, day_windows in enumerate(week):
+            for start, end in day_windows:
+                _add_minutes_by_hour(offered_minutes, weekday, start, end)
+    for cell in range(DAYS * HOURS):
+        offered_minutes[cell] *= occurrences[cell // HOURS]
+
+    range_start = timezone.make_aware(datetime.combine(date_from, time.min), current_timezone)
+    range_end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), current_timezone)
+    queryset = Appointment.objects.filter(start_time__gte=range_start, start_time__lt=range_end)
+    if professional_ids is not None:
+        queryset = queryset.filter(professional_id__in=professional_ids)
+    rows = queryset.order_by().values_list('professional_id', 'start_time', 'end_time', 'created_at', 'status')
+
+    no_windows = [[] for _ in range(DAYS)]
+    for professional_id, start, end, created_at, status in rows.iterator(chunk_size=5000):
+        local_start = start.astimezone(current_timezone)
+        weekday = local_start.weekday()
+        minute = local_start.hour * 60 + local_start.minute
+        cell = _cell(weekday, local_start.hour)
+        bookings[cell] += 1
+        # Citas cargadas después de su horario (historial importado) cuentan como del mismo día
+        lead_days[max((start - created_at).days, 0)] += 1
+        if status == 'cancelled':
+            cancelled[cell] += 1
+            continue
+        if status in BOOKED_STATUSES:
+            duration = int((end - start).total_seconds() // 60)
+            _add_minutes_by_hour(booked_minutes, weekday, minute, min(minute + duration, HOURS * 60))
+            day_windows = windows.get(professional_id, no_windows)[weekday]
+            if not any(window_start <= minute < window_end for window_start, window_end in day_windows):
+                outside_availability += 1
+
+    return {
+        'bookings': bookings,
+        'cancelled': cancelled,
+        'booked_minutes': booked_minutes,
+        'offered_minutes': offered_minutes,
+        'outside_availability': outside_availability,
+        'lead_days': lead_days,
+    }
+
+
+def _lead_time_report(lead_days):
+    total = sum(lead_days.values())
+    buckets = []
+    lower = 0
+    for upper, label in LEAD_TIME_BUCKETS:
+        count = sum(n for days, n in lead_days.items() if days >= lower and (upper is None or days <= upper))
+        buckets.append({'label': label, 'min_days': lower, 'max_days': upper, 'count': count})
+        lower = (upper or 0) + 1
+    return {
+        'total': total,
+        'average_days': round(sum(days * n for days, n in lead_days.items()) / total, 2) if total else None,
+        'median_days': _percentile(lead_days, total, 0.5),
+        'p90_days': _percentile(lead_days, total, 0.9),
+        'buckets': buckets,
+    }
+
+
+def demand_report(date_from, date_to, professional_ids=None):
+    """Arma la respuesta del endpoint; se cachea por período y alcance."""
+    scope = 'all' if professional_ids is None else ','.join(str(pk) for pk in sorted(professional_ids))
+    cache_key = f'analytics:demand:{date_from.isoformat()}:{date_to.isoformat()}:{scope}'
+    report = cache.get(cache_key)
+    if report is not None:
+        return report
+
+    data = compute_demand(date_from, date_to, professional_ids)
+    heatmap = []
+    saturated = []
+    for weekday in range(DAYS):
+        for hour in range(HOURS):
+            cell = _cell(weekday, hour)
+            offered = data['offered_minutes'][cell]
+            booked = data['booked_minutes'][cell]
+            if not (data['bookings'][cell] or offered):
+                continue
+            occupancy = round(booked / offered, 4) if offered else None
+            entry = {
+                'weekday': weekday,
+                'hour': hour,
+                'bookings': data['bookings'][cell],
+                'cancelled': data['cancelled'][cell],
+                'booked_minutes': booked,
+                'offered_minutes': offered,
+                'occupancy': occupancy,
+            }
+            heatmap.append(entry)
+            if occupancy is None or occupancy >= SATURATION_THRESHOLD:
+                saturated.append(entry)
+
+    report = {
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'heatmap': heatmap,
+        'lead_time': _lead_time_report(data['lead_days']),
+        'unmet_demand': {
+            # Franjas sin capacidad libre: la demanda adicional no encuentra turno
+            'saturation_threshold': SATURATION_THRESHOLD,
+            'saturated_slots': sorted(saturated, key=lambda entry: entry['occupancy'] or float('inf'),
+                                      reverse=True),
+            'bookings_outside_availability': data['outside_availability'],
+        },
+    }
+    closed = date_to < timezone.localdate()
+    cache.set(cache_key, report, CACHE_TIMEOUT_CLOSED if closed else CACHE_TIMEOUT_OPEN)
+    return report
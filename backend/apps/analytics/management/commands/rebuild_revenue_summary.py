@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.revenue import rebuild_summary
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen mensual de facturación a partir de las citas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('months', nargs='*',
+                            help='Meses a reconstruir en formato AAAA-MM (por defecto todos).')
+
+    def handle(self, *args, **options):
+        try:
+            months = [datetime.strptime(month, '%Y-%m').date() for month in options['months']] or None
+        except ValueError:
+            raise CommandError('Formato de mes inválido. Use AAAA-MM.')
+        rows = rebuild_summary(months)
+        self.stdout.write(self.style.SUCCESS(f'Resumen de facturación reconstruido: {rows} filas.'))
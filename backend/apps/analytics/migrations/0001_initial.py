@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRevenueSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='mes')),
+                ('status', models.CharField(max_length=20, verbose_name='estado')),
+                ('payment_status', models.CharField(max_length=20, verbose_name='estado de pago')),
+                ('appointments', models.IntegerField(default=0, verbose_name='citas')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='monto')),
+                ('unpriced', models.IntegerField(default=0, verbose_name='citas sin monto')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'resumen mensual de facturación',
+                'verbose_name_plural': 'resúmenes mensuales de facturación',
+                'ordering': ['month'],
+                'unique_together': {('month', 'professional', 'status', 'payment_status')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def backfill_summary(apps, schema_editor):
+    # Sin este paso el resumen queda vacío y apply_delta solo suma las citas nuevas
+    from apps.analytics.revenue import rebuild_summary
+
+    rebuild_summary(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('appointments', '0003_archived_appointment'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+
+class MonthlyRevenueSummary(models.Model):
+    """
+    Resumen mensual de citas y montos por profesional, estado de la cita y
+    estado de pago. Se mantiene de forma incremental desde las señales de
+    ``Appointment`` y puede reconstruirse con ``rebuild_revenue_summary``.
+    """
+    month = models.DateField(_('mes'))
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='revenue_summaries'
+    )
+    status = models.CharField(_('estado'), max_length=20)
+    payment_status = models.CharField(_('estado de pago'), max_length=20)
+    appointments = models.IntegerField(_('citas'), default=0)
+    amount = models.DecimalField(_('monto'), max_digits=14, decimal_places=2, default=0)
+    # Citas sin payment_amount: se valorizan con el honorario del profesional
+    unpriced = models.IntegerField(_('citas sin monto'), default=0)
+
+    class Meta:
+        verbose_name = _('resumen mensual de facturación')
+        verbose_name_plural = _('resúmenes mensuales de facturación')
+        ordering = ['month']
+        unique_together = ('month', 'professional', 'status', 'payment_status')
+
+    def __str__(self):
+        return f"{self.month:%m/%Y} - {self.professional_id} - {self.status}/{self.payment_status}"
@@ -0,0 +1,237 @@
+"""
+Reportes de facturación sobre ``MonthlyRevenueSummary``.
+
+La tabla de resumen tiene una fila por (mes, profesional, estado, estado de
+pago), de modo que los reportes agregan unas pocas filas por mes en lugar de
+recorrer todo el historial de citas, activas y archivadas. Cada
+``save``/``delete`` de una cita aplica un delta (ver ``signals.py``); las
+operaciones en bloque reconstruyen los meses afectados con consultas agrupadas.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from apps.appointments.models import Appointment, ArchivedAppointment
+from .models import MonthlyRevenueSummary
+
+ZERO = Decimal('0.00')
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+# Dimensiones de agrupación admitidas por el endpoint
+GROUP_FIELDS = {
+    'month': 'month',
+    'professional': 'professional_id',
+    'specialty': 'professional__professional_profile__specialty',
+    'payment_status': 'payment_status',
+}
+
+
+def month_of(value):
+    """Primer día del mes (hora local) de un datetime."""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def _next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def _month_start(month):
+    return timezone.make_aware(datetime(month.year, month.month, 1))
+
+
+# ======= MANTENIMIENTO INCREMENTAL =======
+
+def apply_delta(month, professional_id, status, payment_status, payment_amount, sign):
+    """Suma (``sign=1``) o resta (``sign=-1``) una cita a su fila de resumen."""
+    key = {'month': month, 'professional_id': professional_id, 'status': status, 'payment_status': payment_status}
+    amount = payment_amount if payment_amount is not None else ZERO
+    unpriced = sign if payment_amount is None else 0
+    values = {
+        'appointments': F('appointments') + sign,
+        'amount': F('amount') + sign * amount,
+        'unpriced': F('unpriced') + unpriced,
+    }
+    if MonthlyRevenueSummary.objects.filter(**key).update(**values) or sign < 0:
+        # Al restar no se crean filas: una fila ausente es un resumen ya borrado
+        # (por ejemplo, en cascada junto con el profesional)
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRevenueSummary.objects.create(appointments=sign, amount=sign * amount, unpriced=unpriced, **key)
+    except IntegrityError:
+        # Otra petición creó la fila en paralelo
+        MonthlyRevenueSummary.objects.filter(**key).update(**values)
+
+
+def rebuild_summary(months=None, apps=None):
+    """
+    Recalcula el resumen de los meses indicados (todos si ``months`` es None)
+    con una consulta agrupada sobre las citas activas y otra sobre las
+    archivadas. Retorna las filas creadas. Desde una migración se pasa su
+    ``apps`` para usar los modelos históricos.
+    """
+    if apps is None:
+        summary_model = MonthlyRevenueSummary
+        sources = [Appointment.objects.order_by(), ArchivedAppointment.objects.order_by()]
+    else:
+        summary_model = apps.get_model('analytics', 'MonthlyRevenueSummary')
+        sources = [apps.get_model('appointments', name).objects.order_by()
+                   for name in ('Appointment', 'ArchivedAppointment')]
+    summaries = summary_model.objects.all()
+    if months is not None:
+        months = sorted(set(months))
+        if not months:
+            return 0
+        # Rangos sobre start_time para aprovechar su índice
+        ranges = Q()
+        for month in months:
+            ranges |= Q(start_time__gte=_month_start(month), start_time__lt=_month_start(_next_month(month)))
+        sources = [queryset.filter(ranges) for queryset in sources]
+        summaries = summaries.filter(month__in=months)
+
+    totals = {}
+    for queryset in sources:
+        rows = (
+            queryset
+            .annotate(summary_month=TruncMonth('start_time'))
+            .values('summary_month', 'professional_id', 'status', 'payment_status')
+            .annotate(
+                total=Count('id'),
+                total_amount=Coalesce(Sum('payment_amount'), Value(ZERO), output_field=MONEY),
+                total_unpriced=Count('id', filter=Q(payment_amount__isnull=True)),
+            )
+        )
+        for row in rows.iterator():
+            key = (timezone.localtime(row['summary_month']).date(), row['professional_id'],
+                   row['status'], row['payment_status'])
+            count, amount, unpriced = totals.get(key, (0, ZERO, 0))
+            totals[key] = (count + row['total'], amount + row['total_amount'], unpriced + row['total_unpriced'])
+
+    with transaction.atomic():
+        summaries.delete()
+        created = summary_model.objects.bulk_create([
+            summary_model(
+                month=month,
+                professional_id=professional_id,
+                status=status,
+                payment_status=payment_status,
+                appointments=count,
+                amount=amount,
+                unpriced=unpriced,
+            )
+            for (month, professional_id, status, payment_status), (count, amount, unpriced) in totals.items()
+        ], batch_size=1000)
+    return len(created)
+
+
+# ======= REPORTES =======
+
+def _summaries(month_from, month_to, professional_ids):
+    queryset = MonthlyRevenueSummary.objects.filter(month__gte=month_from, month__lte=month_to)
+    if professional_ids is not None:
+        queryset = queryset.filter(professional_id__in=professional_ids)
+    return queryset
+
+
+def _receivable_expression():
+    """Monto pendiente: montos cargados más el honorario por cada cita sin monto."""
+    fee = Coalesce(F('professional__professional_profile__consultation_fee'), Value(ZERO), output_field=MONEY)
+    return ExpressionWrapper(F('amount') + F('unpriced') * fee, output_field=MONEY)
+
+
+def _receivable_filter():
+    return Q(payment_status='pending', status='completed')
+
+
+def _money(value):
+    # SQLite devuelve las sumas sin escala fija: se normalizan a dos decimales
+    return str(Decimal(value or 0).quantize(ZERO))
+
+
+def revenue_report(group_by, month_from, month_to, professional_ids=None):
+    """
+    Totales por mes, profesional, especialidad o estado de pago: cantidad de
+    citas, cobrado, reembolsado y pendiente de cobro.
+    """
+    field = GROUP_FIELDS[group_by]
+    value_fields = [field]
+    if group_by == 'professional':
+        value_fields += ['professional__first_name', 'professional__last_name']
+
+    rows = (
+        _summaries(month_from, month_to, professional_ids)
+        .values(*value_fields)
+        .annotate(
+            total_appointments=Sum('appointments'),
+            paid_amount=Sum('amount', filter=Q(payment_status='paid')),
+            refunded_amount=Sum('amount', filter=Q(payment_status='refunded')),
+            receivable_amount=Sum(_receivable_expression(), filter=_receivable_filter()),
+        )
+        .order_by(field)
+    )
+
+    results = []
+    for row in rows:
+        item = {
+            group_by: row[field],
+            'appointments': row['total_appointments'] or 0,
+            'paid_amount': _money(row['paid_amount']),
+            'refunded_amount': _money(row['refunded_amount']),
+            'receivable_amount': _money(row['receivable_amount']),
+        }
+        if group_by == 'month':
+            item['month'] = row[field].strftime('%Y-%m')
+        elif group_by == 'professional':
+            item['professional_name'] = f"{row['professional__first_name']} {row['professional__last_name']}"
+        elif group_by == 'specialty' and not row[field]:
+            item['specialty'] = 'Sin especialidad'
+        results.append(item)
+
+    return {
+        'month_from': month_from.strftime('%Y-%m'),
+        'month_to': month_to.strftime('%Y-%m'),
+        'group_by': group_by,
+        'results': results,
+    }
+
+
+def receivables_report(professional_ids=None):
+    """Cobros pendientes de citas completadas, por profesional y por mes de atención."""
+    queryset = MonthlyRevenueSummary.objects.filter(_receivable_filter(), appointments__gt=0)
+    if professional_ids is not None:
+        queryset = queryset.filter(professional_id__in=professional_ids)
+    amount = _receivable_expression()
+
+    by_professional = [
+        {
+            'professional_id': row['professional_id'],
+            'professional_name': f"{row['professional__first_name']} {row['professional__last_name']}",
+            'appointments': row['total_appointments'],
+            'amount': _money(row['total_amount']),
+        }
+        for row in queryset.values('professional_id', 'professional__first_name', 'professional__last_name')
+        .annotate(total_appointments=Sum('appointments'), total_amount=Sum(amount))
+        .order_by('-total_amount')
+    ]
+    by_month = [
+        {
+            'month': row['month'].strftime('%Y-%m'),
+            'appointments': row['total_appointments'],
+            'amount': _money(row['total_amount']),
+        }
+        for row in queryset.values('month')
+        .annotate(total_appointments=Sum('appointments'), total_amount=Sum(amount))
+        .order_by('month')
+    ]
+    total = sum((Decimal(row['amount']) for row in by_month), ZERO)
+    return {
+        'total_amount': _money(total),
+        'appointments': sum(row['appointments'] for row in by_month),
+        'by_professional': by_professional,
+        'by_month': by_month,
+    }
@@ -0,0 +1,50 @@
+"""
+Mantenimiento incremental de ``MonthlyRevenueSummary``.
+
+``post_save`` toma los valores anteriores de la cita (leídos en ``pre_save``
+junto con los de las demás apps, ver ``previous_values``), resta la fila
+anterior y suma la nueva, y
+``post_delete`` resta la cita eliminada. Las operaciones en bloque envían
+``appointments_bulk_changed`` y se reconstruyen los meses afectados.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.appointments.models import Appointment
+from apps.appointments.signals import appointments_bulk_changed, previous_values
+from .revenue import apply_delta, month_of, rebuild_summary
+
+SUMMARY_FIELDS = ('start_time', 'professional_id', 'status', 'payment_status', 'payment_amount')
+
+
+def _summary_values(instance):
+    return tuple(getattr(instance, field) for field in SUMMARY_FIELDS)
+
+
+def _apply(values, sign):
+    start_time, professional_id, status, payment_status, payment_amount = values
+    apply_delta(month_of(start_time), professional_id, status, payment_status, payment_amount, sign)
+
+
+@receiver(post_save, sender=Appointment)
+def update_revenue_summary(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = previous_values(instance, SUMMARY_FIELDS)
+    current = _summary_values(instance)
+    if previous == current:
+        return
+    if previous is not None:
+        _apply(previous, -1)
+    _apply(current, 1)
+
+
+@receiver(post_delete, sender=Appointment)
+def remove_from_revenue_summary(sender, instance, **kwargs):
+    _apply(_summary_values(instance), -1)
+
+
+@receiver(appointments_bulk_changed)
+def rebuild_revenue_months(sender, months=None, **kwargs):
+    rebuild_summary(months)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import demand, revenue, revenue_receivables, utilization
+
+urlpatterns = [
+    path('utilization/', utilization, name='analytics-utilization'),
+    path('demand/', demand, name='analytics-demand'),
+    path('revenue/', revenue, name='analytics-revenue'),
+    path('revenue/receivables/', revenue_receivables, name='analytics-revenue-receivables'),
+]
@@ -0,0 +1,193 @@
+"""
+Utilización de la agenda de los profesionales.
+
+Compara los minutos reservados con los minutos ofrecidos en
+``ProfessionalAvailability`` por día o por semana. Las citas se leen una sola
+vez como tuplas planas (``values_list``) y se agrupan por profesional y día
+en listas de intervalos en minutos; la intersección con las ventanas de
+disponibilidad se calcula con un barrido sobre ambas listas ordenadas, sin
+instanciar modelos ni hacer consultas por profesional o por día.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.appointments.models import Appointment, ProfessionalAvailability
+
+# Estados que ocupan la agenda (una ausencia también consumió el turno)
+BOOKED_STATUSES = frozenset(('scheduled', 'confirmed', 'completed', 'no_show'))
+MINUTES_PER_DAY = 24 * 60
+
+
+def merge_intervals(intervals):
+    """Une intervalos ``[inicio, fin)`` superpuestos; retorna una lista ordenada."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def overlap_minutes(intervals, windows):
+    """
+    Minutos de intersección entre dos listas ordenadas de intervalos
+    disjuntos, con un barrido de dos punteros en O(n + m).
+    """
+    total = 0
+    i = j = 0
+    while i < len(intervals) and j < len(windows):
+        start = max(intervals[i][0], windows[j][0])
+        end = min(intervals[i][1], windows[j][1])
+        if end > start:
+            total += end - start
+        if intervals[i][1] < windows[j][1]:
+            i += 1
+        else:
+            j += 1
+    return total
+
+
+def _minute_of_day(value):
+    return value.hour * 60 + value.minute
+
+
+def load_weekly_windows(professional_ids=None):
+    """Retorna ``{professional_id: [ventanas del lunes, ..., ventanas del domingo]}``."""
+    queryset = ProfessionalAvailability.objects.filter(is_available=True)
+    if professional_ids is not None:
+        queryset = queryset.filter(professional_id__in=professional_ids)
+    raw = defaultdict(lambda: [[] for _ in range(7)])
+    for professional_id, day, start, end in queryset.values_list(
+        'professional_id', 'day_of_week', 'start_time', 'end_time'
+    ):
+        raw[professional_id][day].append((_minute_of_day(start), _minute_of_day(end)))
+    return {
+        professional_id: [merge_intervals(windows) for windows in days]
+        for professional_id, days in raw.items()
+    }
+
+
+def _empty_counters():
+    return {'offered_minutes': 0, 'booked_minutes': 0, 'appointments': 0, 'cancelled': 0, 'no_show': 0}
+
+
+def _finalize(counters):
+    """Agrega las tasas calculadas a un bloque de contadores."""
+    offered = counters['offered_minutes']
+    total = counters['appointments']
+    attended_or_missed = total - counters['cancelled']
+    return {
+        **counters,
+        'utilization': round(counters['booked_minutes'] / offered, 4) if offered else None,
+        'cancellation_rate': round(counters['cancelled'] / total, 4) if total else None,
+        'no_show_rate': round(counters['no_show'] / attended_or_missed, 4) if attended_or_missed else None,
+    }
+
+
+def compute_utilization(date_from, date_to, granularity='day', professional_ids=None):
+    """
+    Calcula la utilización entre ``date_from`` y ``date_to`` (inclusive) por
+    profesional y período (``day`` o ``week``, semanas que empiezan el lunes).
+
+    La disponibilidad es el patrón semanal vigente aplicado a todo el rango.
+    """
+    current_timezone = timezone.get_current_timezone()
+    days = (date_to - date_from).days + 1
+
+    # Índice de período para cada día del rango
+    period_starts = []
+    period_of_day = []
+    for offset in range(days):
+        day = date_from + timedelta(days=offset)
+        start = day if granularity == 'day' else day - timedelta(days=day.weekday())
+        if not period_starts or period_starts[-1] != start:
+            period_starts.append(start)
+        period_of_day.append(len(period_starts) - 1)
+
+    windows = load_weekly_windows(professional_ids)
+    counters = defaultdict(lambda: [_empty_counters() for _ in period_starts])
+
+    # Minutos ofrecidos: suma de las ventanas del día de la semana correspondiente
+    for professional_id, week in windows.items():
+        weekday_minutes = [sum(end - start for start, end in day_windows) for day_windows in week]
+        periods = counters[professional_id]
+        for offset in range(days):
+            weekday = (date_from.weekday() + offset) % 7
+            periods[period_of_day[offset]]['offered_minutes'] += weekday_minutes[weekday]
+
+    # Citas como tuplas planas, agrupadas en intervalos de minutos por (profesional, día)
+    range_start = timezone.make_aware(datetime.combine(date_from, time.min), current_timezone)
+    range_end = range_start + timedelta(days=days)
+    queryset = Appointment.objects.filter(start_time__gte=range_start, start_time__lt=range_end)
+    if professional_ids is not None:
+        queryset = queryset.filter(professional_id__in=professional_ids)
+    rows = queryset.order_by().values_list('professional_id', 'start_time', 'end_time', 'status')
+
+    booked = defaultdict(list)
+    for professional_id, start, end, status in rows.iterator(chunk_size=5000):
+        local_start = start.astimezone(current_timezone)
+        offset = (local_start.date() - date_from).days
+        period = counters[professional_id][period_of_day[offset]]
+        period['appointments'] += 1
+        if status == 'cancelled':
+            period['cancelled'] += 1
+            continue
+        if status == 'no_show':
+            period['no_show'] += 1
+        if status in BOOKED_STATUSES:
+            minute = _minute_of_day(local_start)
+            duration = int((end - start).total_seconds() // 60)
+            booked[(professional_id, offset)].append((minute, min(minute + duration, MINUTES_PER_DAY)))
+
+    # Intersección de lo reservado con la disponibilidad de cada día
+    no_windows = [[] for _ in range(7)]
+    for (professional_id, offset), intervals in booked.items():
+        weekday = (date_from.weekday() + offset) % 7
+        day_windows = windows.get(professional_id, no_windows)[weekday]
+        minutes = overlap_minutes(merge_intervals(intervals), day_windows)
+        counters[professional_id][period_of_day[offset]]['booked_minutes'] += minutes
+
+    return period_starts, counters
+
+
+def utilization_report(date_from, date_to, granularity='day', professional_ids=None):
+    """Arma la respuesta del endpoint con totales por clínica, profesional y período."""
+    period_starts, counters = compute_utilization(date_from, date_to, granularity, professional_ids)
+    names = {
+        user_id: f'{first_name} {last_name}'
+        for user_id, first_name, last_name in get_user_model().objects.filter(
+            id__in=list(counters)
+        ).values_list('id', 'first_name', 'last_name')
+    }
+
+    clinic = _empty_counters()
+    professionals = []
+    for professional_id in sorted(counters):
+        totals = _empty_counters()
+        periods = []
+        for period_start, period in zip(period_starts, counters[professional_id]):
+            for key, value in period.items():
+                totals[key] += value
+            periods.append({'period_start': period_start.isoformat(), **_finalize(period)})
+        for key, value in totals.items():
+            clinic[key] += value
+        professionals.append({
+            'professional_id': professional_id,
+            'professional_name': names.get(professional_id, ''),
+            'totals': _finalize(totals),
+            'periods': periods,
+        })
+
+    return {
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'granularity': granularity,
+        'clinic': _finalize(clinic),
+        'professionals': professionals,
+    }
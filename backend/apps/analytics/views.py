@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.response import Response
+
+from fenix_core.throttling import StatsThrottle
+
+from .demand import demand_report
+from .revenue import GROUP_FIELDS, receivables_report, revenue_report
+from .utilization import utilization_report
+
+
+class IsAdminOrProfessional(permissions.BasePermission):
+    """
+    Permiso para los reportes: administradores ven toda la clínica y los
+    profesionales solo sus propios datos.
+    """
+    def has_permission(self, request, view):
+        return bool(request.user and (request.user.is_admin or request.user.is_professional))
+
+
+class AnalyticsParamError(ValueError):
+    pass
+
+
+def parse_date_range(request, default_days=30, max_days=366):
+    """
+    Lee ``date_from`` y ``date_to`` (AAAA-MM-DD). Por defecto cubre los
+    últimos ``default_days`` días y el rango no puede superar ``max_days``.
+    """
+    try:
+        date_to = request.query_params.get('date_to')
+        date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else timezone.localdate()
+        date_from = request.query_params.get('date_from')
+        date_from = (datetime.strptime(date_from, '%Y-%m-%d').date() if date_from
+                     else date_to - timedelta(days=default_days - 1))
+    except ValueError:
+        raise AnalyticsParamError('Formato de fecha inválido. Use AAAA-MM-DD.')
+    if date_from > date_to:
+        raise AnalyticsParamError('date_from debe ser anterior o igual a date_to.')
+    if (date_to - date_from).days + 1 > max_days:
+        raise AnalyticsParamError(f'El rango no puede superar los {max_days} días.')
+    return date_from, date_to
+
+
+def parse_month_range(request, default_months=12, max_months=60):
+    """
+    Lee ``month_from`` y ``month_to`` (AAAA-MM) como fechas del primer día del
+    mes. Por defecto cubre los últimos ``default_months`` meses.
+    """
+    try:
+        month_to = request.query_params.get('month_to')
+        month_to = (datetime.strptime(month_to, '%Y-%m').date() if month_to
+                    else timezone.localdate().replace(day=1))
+        month_from = request.query_params.get('month_from')
+        if month_from:
+            month_from = datetime.strptime(month_from, '%Y-%m').date()
+        else:
+            index = month_to.year * 12 + month_to.month - default_months
+            month_from = month_to.replace(year=index // 12, month=index % 12 + 1)
+    except ValueError:
+        raise AnalyticsParamError('Formato de mes inválido. Use AAAA-MM.')
+    if month_from > month_to:
+        raise AnalyticsParamError('month_from debe ser anterior o igual a month_to.')
+    months = (month_to.year - month_from.year) * 12 + month_to.month - month_from.month + 1
+    if months > max_months:
+        raise AnalyticsParamError(f'El rango no puede superar los {max_months} meses.')
+    return month_from, month_to
+
+
+def professional_scope(request):
+    """
+    IDs de profesionales a los que se limita el reporte: el propio usuario
+    si es profesional, o el ``professional_id`` indicado por un administrador.
+    """
+    if request.user.is_professional:
+        return [request.user.id]
+    professional_id = request.query_params.get('professional_id')
+    if professional_id:
+        try:
+            return [int(professional_id)]
+        except ValueError:
+            raise AnalyticsParamError('professional_id inválido.')
+    return None
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdminOrProfessional])
+@throttle_classes([StatsThrottle])
+def utilization(request):
+    """
+    Utilización de la agenda por profesional: minutos reservados vs. ofrecidos
+    por día o semana (``granularity``), con tasas de cancelación y ausencia.
+    """
+    granularity = request.query_params.get('granularity', 'day')
+    if granularity not in ('day', 'week'):
+        return Response({'error': 'granularity debe ser day o week.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date_from, date_to = parse_date_range(request)
+        professional_ids = professional_scope(request)
+    except AnalyticsParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(utilization_report(date_from, date_to, granularity, professional_ids))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdminOrProfessional])
+@throttle_classes([StatsThrottle])
+def demand(request):
+    """
+    Demanda por día de la semana y hora, anticipación de las reservas y
+    franjas saturadas, para planificar la disponibilidad de los profesionales.
+    """
+    try:
+        date_from, date_to = parse_date_range(request, default_days=90, max_days=731)
+        professional_ids = professional_scope(request)
+    except AnalyticsParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(demand_report(date_from, date_to, professional_ids))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdminOrProfessional])
+@throttle_classes([StatsThrottle])
+def revenue(request):
+    """
+    Facturación agrupada por mes, profesional, especialidad o estado de pago
+    (``group_by``): citas, montos cobrados, reembolsados y pendientes de cobro.
+    """
+    group_by = request.query_params.get('group_by', 'month')
+    if group_by not in GROUP_FIELDS:
+        return Response({'error': f'group_by debe ser uno de: {", ".join(GROUP_FIELDS)}.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        month_from, month_to = parse_month_range(request)
+        professional_ids = professional_scope(request)
+    except AnalyticsParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(revenue_report(group_by, month_from, month_to, professional_ids))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdminOrProfessional])
+@throttle_classes([StatsThrottle])
+def revenue_receivables(request):
+    """Cuentas por cobrar: citas completadas con pago pendiente, por profesional y mes."""
+    try:
+        professional_ids = professional_scope(request)
+    except AnalyticsParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(receivables_report(professional_ids))
@@ -1,31 +1,128 @@
-from django.contrib import admin
-from .models import ProfessionalAvailability, Appointment, AppointmentAttachment
+from datetime import datetime, time, timedelta
+from functools import partial
+
+from django.contrib import admin, messages
+from django.db import transaction
+from django.utils import timezone
+
+from fenix_core.paginators import EstimatedCountPaginator
+from .models import (
+    ProfessionalAvailability, AvailabilityException, Appointment, AppointmentAttachment, ExternalCalendar,
+    WaitlistEntry, WaitlistOffer,
+)
+from .signals import appointments_bulk_changed
+from .waitlist import offer_freed_slot
 
 
 class AppointmentAttachmentInline(admin.TabularInline):
     model = AppointmentAttachment
     extra = 0
+    autocomplete_fields = ('uploaded_by',)
+
+
+class StartTimePeriodFilter(admin.SimpleListFilter):
+    """
+    Filtro por período con opciones fijas. Reemplaza a ``date_hierarchy``,
+    que consulta las fechas distintas de toda la tabla para armar la navegación.
+    """
+    title = 'período'
+    parameter_name = 'period'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('today', 'Hoy'),
+            ('next_7_days', 'Próximos 7 días'),
+            ('this_month', 'Este mes'),
+            ('last_30_days', 'Últimos 30 días'),
+            ('this_year', 'Este año'),
+        )
+
+    def queryset(self, request, queryset):
+        today = timezone.localdate()
+        start_of_day = timezone.make_aware(datetime.combine(today, time.min))
+        ranges = {
+            'today': (start_of_day, start_of_day + timedelta(days=1)),
+            'next_7_days': (timezone.now(), start_of_day + timedelta(days=8)),
+            'this_month': (start_of_day.replace(day=1), None),
+            'last_30_days': (start_of_day - timedelta(days=30), start_of_day + timedelta(days=1)),
+            'this_year': (start_of_day.replace(month=1, day=1), None),
+        }
+        if self.value() not in ranges:
+            return queryset
+        start, end = ranges[self.value()]
+        queryset = queryset.filter(start_time__gte=start)
+        if end is not None:
+            queryset = queryset.filter(start_time__lt=end)
+        return queryset
 
 
 @admin.register(ProfessionalAvailability)
 class ProfessionalAvailabilityAdmin(admin.ModelAdmin):
     """Admin para el modelo ProfessionalAvailability."""
     list_display = ('professional', 'day_of_week', 'start_time', 'end_time', 'is_available')
-    list_filter = ('day_of_week', 'is_available', 'professional')
+    list_filter = ('day_of_week', 'is_available')
+    list_select_related = ('professional',)
     search_fields = ('professional__first_name', 'professional__last_name', 'professional__email')
+    autocomplete_fields = ('professional',)
+
+
+@admin.register(AvailabilityException)
+class AvailabilityExceptionAdmin(admin.ModelAdmin):
+    """Admin para el modelo AvailabilityException."""
+    list_display = ('professional', 'kind', 'start_time', 'end_time', 'reason')
+    list_filter = ('kind',)
+    list_select_related = ('professional',)
+    search_fields = ('reason', 'professional__first_name', 'professional__last_name', 'professional__email')
+    autocomplete_fields = ('professional',)
+
+
+@admin.register(ExternalCalendar)
+class ExternalCalendarAdmin(admin.ModelAdmin):
+    """Admin para el modelo ExternalCalendar."""
+    list_display = ('name', 'professional', 'url', 'expanded_until', 'last_synced_at')
+    list_select_related = ('professional',)
+    search_fields = ('name', 'professional__first_name', 'professional__last_name', 'professional__email')
+    autocomplete_fields = ('professional',)
+    readonly_fields = ('etag', 'last_modified', 'content_hash', 'expanded_until', 'last_synced_at', 'last_error')
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """Admin para el modelo WaitlistEntry."""
+    list_display = ('patient', 'professional', 'specialty', 'date_from', 'date_to', 'time_from', 'time_to', 'status')
+    list_filter = ('status',)
+    list_select_related = ('patient', 'professional')
+    search_fields = ('specialty', 'patient__first_name', 'patient__last_name', 'patient__email')
+    autocomplete_fields = ('patient', 'professional')
+
+
+@admin.register(WaitlistOffer)
+class WaitlistOfferAdmin(admin.ModelAdmin):
+    """Admin para el modelo WaitlistOffer."""
+    list_display = ('entry', 'professional', 'start_time', 'end_time', 'expires_at', 'status')
+    list_filter = ('status',)
+    list_select_related = ('entry__patient', 'professional')
+    raw_id_fields = ('entry', 'appointment')
+    autocomplete_fields = ('professional',)
+    readonly_fields = ('expires_at',)
 
 
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     """Admin para el modelo Appointment."""
     list_display = ('id', 'patient', 'professional', 'start_time', 'end_time', 'status', 'payment_status')
-    list_filter = ('status', 'payment_status', 'professional')
-    search_fields = ('patient__email', 'patient__first_name', 'patient__last_name', 
+    list_filter = ('status', 'payment_status', StartTimePeriodFilter)
+    list_select_related = ('patient', 'professional')
+    search_fields = ('patient__email', 'patient__first_name', 'patient__last_name',
                      'professional__email', 'professional__first_name', 'professional__last_name')
-    date_hierarchy = 'start_time'
+    autocomplete_fields = ('patient', 'professional')
     inlines = [AppointmentAttachmentInline]
     readonly_fields = ('created_at', 'updated_at')
-    
+    paginator = EstimatedCountPaginator
+    # Evita un segundo COUNT(*) sobre toda la tabla cuando hay filtros o búsqueda
+    show_full_result_count = False
+    actions = ('mark_confirmed', 'mark_completed', 'mark_cancelled', 'mark_no_show', 'mark_paid')
+
     fieldsets = (
         ('Información General', {
             'fields': ('patient', 'professional', 'status', 'reason')
@@ -44,10 +141,59 @@ class AppointmentAdmin(admin.ModelAdmin):
         }),
     )
 
+    def _bulk_update(self, request, queryset, message, **values):
+        """
+        Actualiza todas las citas seleccionadas con un único UPDATE.
+        No dispara señales, por lo que no se envían correos de cambio de estado;
+        los resúmenes derivados se recalculan con ``appointments_bulk_changed``.
+        """
+        months = set(queryset.dates('start_time', 'month'))
+        updated = queryset.update(updated_at=timezone.now(), **values)
+        if updated:
+            appointments_bulk_changed.send(sender=Appointment, months=months)
+        self.message_user(request, f'{updated} citas {message}.', messages.SUCCESS)
+
+    @admin.action(description='Marcar como confirmadas')
+    def mark_confirmed(self, request, queryset):
+        self._bulk_update(request, queryset.filter(status='scheduled'), 'confirmadas', status='confirmed')
+
+    @admin.action(description='Marcar como completadas')
+    def mark_completed(self, request, queryset):
+        self._bulk_update(request, queryset.filter(status__in=['scheduled', 'confirmed']), 'completadas',
+                          status='completed')
+
+    @admin.action(description='Cancelar')
+    def mark_cancelled(self, request, queryset):
+        queryset = queryset.filter(status__in=['scheduled', 'confirmed'])
+        # Los horarios futuros liberados se ofrecen a la lista de espera
+        freed = list(queryset.filter(start_time__gt=timezone.now()).values_list(
+            'professional_id', 'start_time', 'end_time', 'patient_id'
+        ))
+        self._bulk_update(request, queryset, 'canceladas', status='cancelled')
+        for professional_id, start, end, patient_id in freed:
+            transaction.on_commit(partial(
+                offer_freed_slot, professional_id, start, end, exclude_patient_id=patient_id
+            ))
+
+    @admin.action(description='Marcar como no asistidas')
+    def mark_no_show(self, request, queryset):
+        self._bulk_update(request, queryset.filter(status__in=['scheduled', 'confirmed']), 'marcadas como no asistidas',
+                          status='no_show')
+
+    @admin.action(description='Marcar pago como pagado')
+    def mark_paid(self, request, queryset):
+        self._bulk_update(request, queryset.exclude(payment_status='paid'), 'marcadas como pagadas',
+                          payment_status='paid')
+
 
 @admin.register(AppointmentAttachment)
 class AppointmentAttachmentAdmin(admin.ModelAdmin):
     """Admin para el modelo AppointmentAttachment."""
     list_display = ('title', 'appointment', 'uploaded_by', 'uploaded_at')
     list_filter = ('uploaded_at',)
+    list_select_related = ('appointment__patient', 'appointment__professional', 'uploaded_by')
     search_fields = ('title', 'appointment__patient__email', 'appointment__professional__email')
+    raw_id_fields = ('appointment',)
+    autocomplete_fields = ('uploaded_by',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,197 @@
+"""
+Archivo de citas históricas.
+
+Las citas cerradas anteriores a ``APPOINTMENT_ARCHIVE_AFTER_DAYS`` se mueven
+por lotes a ``ArchivedAppointment``, de modo que la tabla ``Appointment`` y
+sus índices (que recorren la validación de reservas y los listados) solo
+contengan la agenda reciente. Funciona en cualquier motor.
+
+En PostgreSQL la tabla de archivo está además particionada por rango de
+``start_time`` con una partición por año y una partición por defecto;
+``ensure_partitions`` crea las particiones anuales que falten (incluidas las
+futuras) moviendo las filas que hubieran caído en la partición por defecto.
+
+Las lecturas de historial (``patient_history``) pueden unir ambas tablas.
+"""
+
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, Exists, Min, OuterRef, Value
+from django.utils import timezone
+
+from .models import Appointment, AppointmentAttachment, ArchivedAppointment, WaitlistOffer
+from .signals import appointments_bulk_changed
+
+CLOSED_STATUSES = ('completed', 'cancelled', 'no_show')
+ARCHIVE_FIELDS = (
+    'id', 'patient_id', 'professional_id', 'start_time', 'end_time', 'status', 'reason', 'notes',
+    'created_at', 'updated_at', 'payment_status', 'payment_amount', 'reminder_sent',
+)
+HISTORY_FIELDS = (
+    'id', 'start_time', 'end_time', 'status', 'reason', 'notes', 'payment_status', 'payment_amount',
+    'professional_id', 'professional__first_name', 'professional__last_name',
+)
+
+
+def archivable_appointments(before):
+    """
+    Citas cerradas que empiezan antes de ``before``. Quedan fuera las que
+    tienen adjuntos (el adjunto apunta a la cita activa) y las completadas
+    con el pago pendiente, que siguen siendo cuentas por cobrar.
+    """
+    return (
+        Appointment.objects
+        .filter(start_time__lt=before, status__in=CLOSED_STATUSES)
+        .exclude(status='completed', payment_status='pending')
+        .exclude(Exists(AppointmentAttachment.objects.filter(appointment=OuterRef('pk'))))
+    )
+
+
+def _delete_rows(ids):
+    # DELETE directo, sin señales por fila: los resúmenes derivados se
+    # recalculan al final con appointments_bulk_changed. El DELETE no aplica
+    # el SET_NULL de Django: las ofertas de la lista de espera que crearon
+    # estas citas se desvinculan antes
+    WaitlistOffer.objects.filter(appointment_id__in=ids).update(appointment=None)
+    table = connection.ops.quote_name(Appointment._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', ids)
+
+
+def archive_appointments(before, batch_size=500, dry_run=False):
+    """
+    Mueve las citas archivables a ``ArchivedAppointment`` en lotes de
+    ``batch_size``, cada uno en su propia transacción. Retorna la cantidad
+    de citas movidas (o que se moverían con ``dry_run``).
+    """
+    queryset = archivable_appointments(before)
+    if dry_run:
+        return queryset.count()
+
+    moved = 0
+    months = set()
+    current_timezone = timezone.get_current_timezone()
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('start_time').values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            ArchivedAppointment.objects.bulk_create([ArchivedAppointment(**row) for row in rows])
+            _delete_rows([row['id'] for row in rows])
+        moved += len(rows)
+        months.update(row['start_time'].astimezone(current_timezone).date().replace(day=1) for row in rows)
+
+    if moved:
+        appointments_bulk_changed.send(sender=Appointment, months=months)
+    return moved
+
+
+# ======= PARTICIONES (PostgreSQL) =======
+
+def partitioning_supported():
+    return connection.vendor == 'postgresql'
+
+
+def existing_partitions():
+    """Nombres de las particiones de la tabla de archivo."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = %s',
+            [ArchivedAppointment._meta.db_table],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _first_year():
+    years = [
+        value.astimezone(timezone.get_current_timezone()).year
+        for value in (
+            Appointment.objects.aggregate(first=Min('start_time'))['first'],
+            ArchivedAppointment.objects.aggregate(first=Min('start_time'))['first'],
+        )
+        if value is not None
+    ]
+    return min(years, default=timezone.localdate().year)
+
+
+def _create_year_partition(year):
+    """
+    Crea la partición del año y la adjunta. Las filas de ese año que estén en
+    la partición por defecto se mueven antes de adjuntarla, ya que PostgreSQL
+    no permite crear una partición que se superponga con filas existentes.
+    """
+    table = ArchivedAppointment._meta.db_table
+    quote = connection.ops.quote_name
+    start = timezone.make_aware(datetime(year, 1, 1)).isoformat()
+    end = timezone.make_aware(datetime(year + 1, 1, 1)).isoformat()
+    partition = f'{table}_{year}'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {quote(partition)} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'INSERT INTO {quote(partition)} SELECT * FROM {quote(table + "_default")} '
+            f'WHERE start_time >= %s AND start_time < %s',
+            [start, end],
+        )
+        cursor.execute(
+            f'DELETE FROM {quote(table + "_default")} WHERE start_time >= %s AND start_time < %s',
+            [start, end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(partition)} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    return partition
+
+
+def ensure_partitions(years_ahead=1):
+    """
+    Crea las particiones anuales faltantes desde el año de la cita más antigua
+    hasta ``years_ahead`` años después del actual. Retorna las creadas.
+    """
+    existing = existing_partitions()
+    table = ArchivedAppointment._meta.db_table
+    created = []
+    for year in range(_first_year(), timezone.localdate().year + years_ahead + 1):
+        if f'{table}_{year}' not in existing:
+            created.append(_create_year_partition(year))
+    return created
+
+
+# ======= LECTURAS =======
+
+def patient_history(patient_id, include_archived=False):
+    """
+    Citas del paciente como diccionarios (``HISTORY_FIELDS`` más ``archived``),
+    ordenadas de la más reciente a la más antigua. Con ``include_archived`` se
+    unen las citas archivadas en una sola consulta ``UNION ALL``.
+    """
+    live = (
+        Appointment.objects.filter(patient_id=patient_id)
+        .annotate(archived=Value(False, output_field=BooleanField()))
+        .values(*HISTORY_FIELDS, 'archived')
+    )
+    if not include_archived:
+        return live.order_by('-start_time')
+    archived = (
+        ArchivedAppointment.objects.filter(patient_id=patient_id)
+        .annotate(archived=Value(True, output_field=BooleanField()))
+        .values(*HISTORY_FIELDS, 'archived')
+    )
+    return live.order_by().union(archived.order_by(), all=True).order_by('-start_time')
+
+
+def has_attended(professional_id, patient_id):
+    """
+    Indica si el profesional tiene o tuvo alguna cita con el paciente, incluidas
+    las archivadas.
+    """
+    pair = {'professional_id': professional_id, 'patient_id': patient_id}
+    return (
+        Appointment.objects.filter(**pair).exists()
+        or ArchivedAppointment.objects.filter(**pair).exists()
+    )
@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.monitoring.benchmarking import benchmark, BenchmarkSkipped
+from fenix_core.fast_serializers import ResponseFragments, compile_serializer, verify_equivalence
+from fenix_core.renderers import ORJSONRenderer
+from .feeds import get_or_create_token
+from .ical import busy_intervals, parse_events
+from .models import Appointment, ProfessionalAvailability
+from .serializers import AppointmentSerializer, AppointmentCreateSerializer
+from .slots import day_start
+from .dashboard import build_dashboard_bundle, invalidate_dashboard
+from .views import (
+    AppointmentViewSet, AvailableSlotsView, CheckAvailabilityView, NextAvailableSlotsView, appointment_feed,
+    dashboard_stats,
+)
+
+
+def _free_slot(professional):
+    """Busca el primer slot futuro libre dentro de la disponibilidad del profesional."""
+    availabilities = list(ProfessionalAvailability.objects.filter(professional=professional, is_available=True))
+    if not availabilities:
+        raise BenchmarkSkipped('El profesional no tiene disponibilidades.')
+    day = timezone.localdate() + timedelta(days=1)
+    for _ in range(60):
+        for availability in availabilities:
+            if availability.day_of_week != day.weekday():
+                continue
+            start = timezone.make_aware(datetime.combine(day, availability.start_time))
+            end = start + timedelta(minutes=30)
+            busy = Appointment.objects.filter(
+                professional=professional,
+                status__in=['scheduled', 'confirmed'],
+                start_time__lt=end,
+                end_time__gt=start,
+            ).exists()
+            if not busy:
+                return start, end
+        day += timedelta(days=1)
+    raise BenchmarkSkipped('No se encontró un slot libre en los próximos 60 días.')
+
+
+@benchmark('available_slots', 'AvailableSlotsView: 30 días de un profesional')
+def available_slots(ctx):
+    professional = ctx.user('professional')
+    today = timezone.localdate()
+    return ctx.call(AvailableSlotsView.as_view(), '/api/v1/appointments/available-slots/', ctx.user('patient'), data={
+        'professional_id': professional.id,
+        'date_from': today.isoformat(),
+        'date_to': (today + timedelta(days=30)).isoformat(),
+    })
+
+
+@benchmark('next_available', 'NextAvailableSlotsView: 10 primeros slots entre todos los profesionales')
+def next_available(ctx):
+    return ctx.call(NextAvailableSlotsView.as_view(), '/api/v1/appointments/next-available/', ctx.user('patient'),
+                    data={'count': 10})
+
+
+@benchmark('check_availability', 'CheckAvailabilityView para un slot libre del profesional')
+def check_availability(ctx):
+    professional = ctx.user('professional')
+    start, end = _free_slot(professional)
+    return ctx.call(CheckAvailabilityView.as_view(), '/api/v1/appointments/check-availability/', ctx.user('patient'),
+                    data={'professional_id': professional.id, 'start_time': start.isoformat(),
+                          'end_time': end.isoformat()})
+
+
+@benchmark('dashboard_stats', 'dashboard_stats como administrador (toda la clínica)')
+def dashboard_stats_admin(ctx):
+    return ctx.call(dashboard_stats, '/api/v1/dashboard/stats/', ctx.user('admin'))
+
+
+@benchmark('dashboard_bundle', 'Dashboard completo de un profesional sin caché')
+def dashboard_bundle_professional(ctx):
+    user = ctx.user('professional')
+
+    def run():
+        # Cada repetición invalida la versión para medir el armado completo
+        invalidate_dashboard(user.id)
+        return build_dashboard_bundle(user)
+    return run
+
+
+@benchmark('appointment_list', 'AppointmentViewSet.list como administrador (primera página)')
+def appointment_list(ctx):
+    view = AppointmentViewSet.as_view({'get': 'list'})
+    return ctx.call(view, '/api/v1/appointments/appointments/', ctx.user('admin'))
+
+
+@benchmark('appointment_serialization', 'AppointmentSerializer sobre 200 citas')
+def appointment_serialization(ctx):
+    appointments = list(Appointment.objects.order_by('-start_time')[:200])
+    if not appointments:
+        raise BenchmarkSkipped('No hay citas.')
+
+    def run():
+        # Se refresca el queryset para incluir las consultas de relaciones
+        queryset = Appointment.objects.filter(id__in=[a.id for a in appointments]).order_by('-start_time')
+        return AppointmentSerializer(queryset, many=True).data
+    return run
+
+
+@benchmark('booking_validation', 'AppointmentCreateSerializer.is_valid para un slot libre')
+def booking_validation(ctx):
+    professional = ctx.user('professional')
+    patient = ctx.user('patient')
+    start, end = _free_slot(professional)
+    data = {
+        'patient': patient.id,
+        'professional': professional.id,
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat(),
+        'reason': 'Benchmark',
+    }
+
+    def run():
+        serializer = AppointmentCreateSerializer(data=data)
+        if not serializer.is_valid():
+            raise AssertionError(serializer.errors)
+    return run
+
+
+def _loaded_appointments(count=200):
+    appointments = list(Appointment.objects.select_related(
+        'patient__professional_profile', 'professional__professional_profile'
+    ).prefetch_related('attachments').order_by('-start_time')[:count])
+    if not appointments:
+        raise BenchmarkSkipped('No hay citas; ejecute generate_synthetic_data.')
+    return appointments
+
+
+def _serialized_appointments(count=200):
+    return AppointmentSerializer(_loaded_appointments(count), many=True).data
+
+
+@benchmark('serializer_drf', 'AppointmentSerializer de DRF sobre 200 citas ya cargadas (sin consultas)')
+def serializer_drf(ctx):
+    appointments = _loaded_appointments()
+    return lambda: AppointmentSerializer(appointments, many=True).data
+
+
+@benchmark('serializer_compiled', 'Serialización compilada de AppointmentSerializer sobre las mismas 200 citas')
+def serializer_compiled(ctx):
+    appointments = _loaded_appointments()
+    # La medición solo tiene sentido si la salida es idéntica a la de DRF
+    verify_equivalence(AppointmentSerializer, appointments)
+    serialize = compile_serializer(AppointmentSerializer)
+
+    def run():
+        # Como en una respuesta: los usuarios repetidos se resuelven una vez
+        fragments = ResponseFragments()
+        return [serialize(appointment, None, fragments) for appointment in appointments]
+    return run
+
+
+@benchmark('json_render_default', 'JSONRenderer de DRF sobre 200 citas serializadas (solo render)')
+def json_render_default(ctx):
+    data = _serialized_appointments()
+    return lambda: JSONRenderer().render(data)
+
+
+@benchmark('json_render_orjson', 'ORJSONRenderer sobre 200 citas serializadas (solo render)')
+def json_render_orjson(ctx):
+    data = _serialized_appointments()
+    return lambda: ORJSONRenderer().render(data)
+
+
+def _recurring_feed(count=2000):
+    """Calendario .ics con ``count`` eventos semanales que empezaron hace años."""
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0']
+    first = timezone.localdate() - timedelta(days=3 * 365)
+    for index in range(count):
+        start = datetime.combine(first + timedelta(days=index % 365), datetime.min.time()) + timedelta(hours=8 + index % 10)
+        lines += [
+            'BEGIN:VEVENT', f'UID:benchmark-{index}', 'DTSTAMP:20240101T000000Z',
+            f'DTSTART:{start:%Y%m%dT%H%M%S}', f'DTEND:{start + timedelta(hours=1):%Y%m%dT%H%M%S}',
+            'RRULE:FREQ=WEEKLY;BYDAY=MO,TH', 'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(lines)
+
+
+@benchmark('ical_expand', 'Lectura y expansión al horizonte de un .ics con 2000 eventos semanales')
+def ical_expand(ctx):
+    text = _recurring_feed()
+    default_tz = timezone.get_current_timezone()
+    range_start = day_start(timezone.localdate())
+    range_end = range_start + timedelta(days=settings.OPEN_SLOTS_HORIZON_DAYS)
+
+    def run():
+        return sum(
+            len(busy_intervals(event, range_start, range_end, default_tz))
+            for event in parse_events(text, default_tz)
+        )
+    return run
+
+
+def _feed_request(ctx, **extra):
+    token = get_or_create_token(ctx.user('professional'))
+    path = f'/api/v1/appointments/feed/{token}.ics'
+    return lambda: appointment_feed(ctx.factory.get(path, **extra), token=token)
+
+
+@benchmark('ics_feed', 'Feed .ics completo de un profesional (streaming)')
+def ics_feed(ctx):
+    request = _feed_request(ctx)
+    return lambda: b''.join(request().streaming_content)
+
+
+@benchmark('ics_feed_not_modified', 'Feed .ics de un profesional con If-None-Match vigente (304)')
+def ics_feed_not_modified(ctx):
+    etag = _feed_request(ctx)()['ETag']
+    request = _feed_request(ctx, HTTP_IF_NONE_MATCH=etag)
+
+    def run():
+        response = request()
+        if response.status_code != 304:
+            raise AssertionError(f'Se esperaba 304 y se obtuvo {response.status_code}.')
+        return response
+    return run
@@ -0,0 +1,376 @@
+"""
+Sincronización de calendarios externos (``ExternalCalendar``) en bloques
+ocupados por profesional.
+
+Cada sincronización compara los VEVENT del archivo con los ya importados por
+``(uid, recurrence_id)``: los que tienen el mismo hash no se tocan, los de
+SEQUENCE menor a la guardada se ignoran (versión vieja) y solo los nuevos o
+modificados se expanden y escriben. Las ocurrencias se expanden únicamente
+dentro del horizonte de slots (``OPEN_SLOTS_HORIZON_DAYS``); cuando el
+horizonte avanza, ``sync_calendars`` vuelve a expandir desde ``raw`` los
+eventos recurrentes o que empiezan después del límite anterior. Al terminar
+se regeneran los slots libres de los días afectados.
+
+Las descargas no se hacen durante las peticiones de la API: crear, modificar
+o pedir la sincronización de un calendario marca ``sync_requested_at`` y
+``sync_calendars --pending`` (cron cada minuto) las procesa. Solo se
+descargan URLs cuyo servidor es una dirección pública, también tras cada
+redirección, para que la función no sirva para sondear la red interna.
+"""
+
+import hashlib
+import http.client
+import ipaddress
+import socket
+import time
+import urllib.error
+import urllib.request
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from . import slots
+from .ical import IcsError, busy_intervals, parse_datetime, parse_events
+from .models import ExternalBusyBlock, ExternalCalendar, ExternalEvent
+
+
+class CalendarSyncError(Exception):
+    """No se pudo descargar o interpretar el calendario."""
+
+
+class SyncResult:
+    """Resumen de una sincronización."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.blocks = 0
+        self.not_modified = False
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'deleted': self.deleted,
+            'blocks': self.blocks,
+            'not_modified': self.not_modified,
+            'elapsed_seconds': round(self.elapsed, 3),
+        }
+
+
+def _horizon(today):
+    return slots.day_start(today), today + timedelta(days=settings.OPEN_SLOTS_HORIZON_DAYS)
+
+
+def _latest_versions(events):
+    """Un evento por ``(uid, recurrence_id)``, el de mayor SEQUENCE."""
+    latest = {}
+    for event in events:
+        key = (event.uid, event.recurrence_id)
+        if key not in latest or event.sequence >= latest[key].sequence:
+            latest[key] = event
+    return latest
+
+
+def _effective_hash(event, overrides):
+    # Las ocurrencias reemplazadas cambian la expansión del evento principal
+    if event.recurrence_id or not overrides.get(event.uid):
+        return event.content_hash
+    return hashlib.sha1(
+        (event.content_hash + ','.join(sorted(overrides[event.uid]))).encode()
+    ).hexdigest()
+
+
+@transaction.atomic
+def sync_events(calendar, events, feed_hash, today=None):
+    """
+    Sincroniza ``events`` (``IcsEvent`` del archivo completo) con lo importado
+    del calendario y regenera los slots libres de los días afectados.
+    """
+    result = SyncResult()
+    today = today or timezone.localdate()
+    range_start, horizon_end = _horizon(today)
+    range_end = slots.day_start(horizon_end + timedelta(days=1))
+    previous_until = calendar.expanded_until
+    extending = previous_until is None or previous_until < horizon_end
+    default_tz = timezone.get_current_timezone()
+
+    latest = _latest_versions(events)
+    overrides = {}
+    for uid, recurrence_id in latest:
+        if recurrence_id:
+            overrides.setdefault(uid, set()).add(recurrence_id)
+    existing = {
+        (uid, recurrence_id): (pk, sequence, content_hash)
+        for pk, uid, recurrence_id, sequence, content_hash in ExternalEvent.objects.filter(
+            calendar=calendar
+        ).values_list('pk', 'uid', 'recurrence_id', 'sequence', 'content_hash')
+    }
+
+    to_create, to_update, to_expand = [], [], []
+    for key, event in latest.items():
+        content_hash = _effective_hash(event, overrides)
+        stored = existing.get(key)
+        if stored is not None:
+            pk, sequence, stored_hash = stored
+            if event.sequence < sequence:
+                result.unchanged += 1
+                continue
+            if stored_hash == content_hash:
+                # Sin cambios: solo se expande lo que entra al horizonte
+                if extending and (event.recurring or previous_until is None
+                                  or _starts_after(event, previous_until, default_tz)):
+                    to_expand.append((pk, event))
+                result.unchanged += 1
+                continue
+            to_update.append(ExternalEvent(
+                pk=pk, calendar=calendar, uid=event.uid, recurrence_id=event.recurrence_id,
+                sequence=event.sequence, content_hash=content_hash, recurring=event.recurring, raw=event.raw,
+            ))
+            to_expand.append((pk, event))
+            result.updated += 1
+        else:
+            to_create.append((event, ExternalEvent(
+                calendar=calendar, uid=event.uid, recurrence_id=event.recurrence_id,
+                sequence=event.sequence, content_hash=content_hash, recurring=event.recurring, raw=event.raw,
+            )))
+            result.created += 1
+    removed = [pk for key, (pk, _, _) in existing.items() if key not in latest]
+    result.deleted = len(removed)
+
+    # Días cuyos slots cambian: los de los bloques que se descartan...
+    touched_ids = removed + [pk for pk, _ in to_expand]
+    changed = ExternalBusyBlock.objects.filter(event_id__in=touched_ids).aggregate(
+        first=Min('start_time'), last=Max('end_time')
+    ) if touched_ids else {'first': None, 'last': None}
+    bounds = [value for value in changed.values() if value is not None]
+
+    ExternalEvent.objects.filter(pk__in=removed).delete()
+    ExternalBusyBlock.objects.filter(event_id__in=[pk for pk, _ in to_expand]).delete()
+    ExternalBusyBlock.objects.filter(event__calendar=calendar, end_time__lte=range_start).delete()
+    if to_update:
+        ExternalEvent.objects.bulk_update(to_update, ['sequence', 'content_hash', 'recurring', 'raw'], batch_size=500)
+    if to_create:
+        ExternalEvent.objects.bulk_create([row for _, row in to_create], batch_size=500)
+        to_expand.extend((row.pk, event) for event, row in to_create)
+
+    blocks = []
+    for pk, event in to_expand:
+        overridden = () if event.recurrence_id else overrides.get(event.uid, ())
+        try:
+            intervals = busy_intervals(event, range_start, range_end, default_tz, overridden)
+        except IcsError:
+            # Un evento ilegible no invalida el resto del calendario
+            continue
+        blocks.extend((pk, start, end) for start, end in intervals)
+    _insert_blocks(calendar.professional_id, blocks)
+    result.blocks = len(blocks)
+
+    # ...y los de los bloques nuevos
+    if blocks:
+        bounds.append(min(start for _, start, _ in blocks))
+        bounds.append(max(end for _, _, end in blocks))
+    if bounds:
+        slots.refresh_interval(calendar.professional_id, max(min(bounds), range_start), min(max(bounds), range_end))
+
+    calendar.content_hash = feed_hash
+    calendar.expanded_until = horizon_end
+    calendar.last_synced_at = timezone.now()
+    calendar.last_error = ''
+    calendar.save(update_fields=['content_hash', 'expanded_until', 'last_synced_at', 'last_error',
+                                 'etag', 'last_modified'])
+    result.elapsed = time.perf_counter() - result.started
+    return result
+
+
+def _insert_blocks(professional_id, blocks, batch_size=1000):
+    # INSERT directo: con miles de ocurrencias, armar una instancia de modelo
+    # por bloque cuesta más que la expansión de las reglas
+    table = connection.ops.quote_name(ExternalBusyBlock._meta.db_table)
+    adapt = connection.ops.adapt_datetimefield_value
+    sql = f'INSERT INTO {table} (professional_id, event_id, start_time, end_time) VALUES (%s, %s, %s, %s)'
+    with connection.cursor() as cursor:
+        for index in range(0, len(blocks), batch_size):
+            cursor.executemany(sql, [
+                (professional_id, event_id, adapt(start), adapt(end))
+                for event_id, start, end in blocks[index:index + batch_size]
+            ])
+
+
+def _starts_after(event, boundary, default_tz):
+    """Si el evento (no recurrente) empieza después del límite de la expansión anterior."""
+    dtstart = event.properties.get('DTSTART')
+    if not dtstart:
+        return False
+    start, _ = parse_datetime(dtstart[0][1], dtstart[0][0], default_tz)
+    return start >= slots.day_start(boundary)
+
+
+def sync_calendar_text(calendar, text, today=None):
+    """Sincroniza el calendario con el contenido completo de un archivo ``.ics``."""
+    feed_hash = hashlib.sha1(text.encode()).hexdigest()
+    today = today or timezone.localdate()
+    if feed_hash == calendar.content_hash and calendar.expanded_until and calendar.expanded_until >= _horizon(today)[1]:
+        result = SyncResult()
+        result.unchanged = calendar.events.count()
+        calendar.last_synced_at = timezone.now()
+        calendar.last_error = ''
+        calendar.save(update_fields=['last_synced_at', 'last_error', 'etag', 'last_modified'])
+        return result
+    try:
+        events = list(parse_events(text, timezone.get_current_timezone()))
+    except IcsError as exc:
+        raise CalendarSyncError(str(exc))
+    return sync_events(calendar, events, feed_hash, today)
+
+
+def extend_calendar(calendar, today=None):
+    """Expande los eventos ya importados hasta el horizonte actual, sin volver a leer el origen."""
+    if calendar.expanded_until is not None and calendar.expanded_until >= _horizon(today or timezone.localdate())[1]:
+        return SyncResult()
+    raw = '\r\n'.join(calendar.events.values_list('raw', flat=True).iterator())
+    events = list(parse_events(raw, timezone.get_current_timezone()))
+    return sync_events(calendar, events, calendar.content_hash, today)
+
+
+# ======= DESCARGA =======
+
+NOT_PUBLIC_MESSAGE = 'La URL del calendario debe apuntar a un servidor público.'
+MAX_REDIRECTS = 5
+
+
+def _is_public(address):
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    # is_global excluye loopback, redes privadas, link-local (metadatos de la nube) y reservadas
+    return ip.is_global and not ip.is_multicast
+
+
+def validate_calendar_url(url):
+    """Rechaza las URLs que no son http(s) o cuyo servidor resuelve a una dirección no pública."""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise CalendarSyncError('La URL del calendario debe ser http o https.')
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port, proto=socket.IPPROTO_TCP)
+    except (OSError, UnicodeError, ValueError):
+        raise CalendarSyncError('No se pudo resolver el servidor del calendario.')
+    if not all(_is_public(address[4][0]) for address in addresses):
+        raise CalendarSyncError(NOT_PUBLIC_MESSAGE)
+
+
+def _check_peer(connection):
+    # Se verifica la dirección efectivamente conectada: el DNS puede cambiar
+    # entre la validación de la URL y la conexión
+    if not _is_public(connection.sock.getpeername()[0]):
+        connection.close()
+        raise CalendarSyncError(NOT_PUBLIC_MESSAGE)
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def connect(self):
+        super().connect()
+        _check_peer(self)
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def connect(self):
+        super().connect()
+        _check_peer(self)
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+
+class _RedirectHandler(urllib.request.HTTPRedirectHandler):
+    max_redirections = MAX_REDIRECTS
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        validate_calendar_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def _opener():
+    # Sin proxies del entorno: la dirección verificada es la del servidor del calendario
+    return urllib.request.build_opener(
+        urllib.request.ProxyHandler({}), _PublicHTTPHandler, _PublicHTTPSHandler, _RedirectHandler,
+    )
+
+
+def fetch_calendar(calendar):
+    """
+    Descarga el calendario con una petición condicional (ETag /
+    Last-Modified). Retorna el texto, o None si no cambió desde la última
+    descarga.
+    """
+    validate_calendar_url(calendar.url)
+    request = urllib.request.Request(calendar.url, headers={'User-Agent': 'FenixClinicas calendar sync'})
+    if calendar.etag:
+        request.add_header('If-None-Match', calendar.etag)
+    if calendar.last_modified:
+        request.add_header('If-Modified-Since', calendar.last_modified)
+    max_bytes = settings.EXTERNAL_CALENDAR_MAX_BYTES
+    try:
+        with _opener().open(request, timeout=settings.EXTERNAL_CALENDAR_TIMEOUT) as response:
+            body = response.read(max_bytes + 1)
+            headers = response.headers
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return None
+        raise CalendarSyncError(f'El servidor respondió {exc.code} al descargar el calendario.')
+    except (urllib.error.URLError, OSError) as exc:
+        raise CalendarSyncError(f'No se pudo descargar el calendario: {exc}.')
+    if len(body) > max_bytes:
+        raise CalendarSyncError(f'El calendario supera el tamaño máximo ({max_bytes} bytes).')
+    calendar.etag = headers.get('ETag', '')
+    calendar.last_modified = headers.get('Last-Modified', '')
+    return body.decode(headers.get_content_charset() or 'utf-8', errors='replace')
+
+
+def request_sync(calendar):
+    """Deja la sincronización del calendario pendiente para ``sync_calendars --pending``."""
+    calendar.sync_requested_at = timezone.now()
+    ExternalCalendar.objects.filter(pk=calendar.pk).update(sync_requested_at=calendar.sync_requested_at)
+
+
+def claim_pending(calendar):
+    """Toma la sincronización pendiente del calendario; False si otro proceso ya la tomó."""
+    return bool(ExternalCalendar.objects.filter(
+        pk=calendar.pk, sync_requested_at=calendar.sync_requested_at
+    ).update(sync_requested_at=None))
+
+
+def sync_calendar(calendar, today=None):
+    """
+    Sincroniza un calendario desde su URL (o solo extiende el horizonte si
+    no cambió o si fue subido como archivo). Los errores quedan en
+    ``last_error`` y se vuelven a lanzar como ``CalendarSyncError``.
+    """
+    try:
+        text = fetch_calendar(calendar) if calendar.url else None
+        if text is None:
+            result = extend_calendar(calendar, today)
+            result.not_modified = True
+            return result
+        return sync_calendar_text(calendar, text, today)
+    except CalendarSyncError as exc:
+        ExternalCalendar.objects.filter(pk=calendar.pk).update(last_error=str(exc))
+        calendar.last_error = str(exc)
+        raise
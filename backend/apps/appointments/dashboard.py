@@ -0,0 +1,115 @@
+"""
+Datos del dashboard: estadísticas, próximas citas, agenda del día y
+notificaciones sin leer, armados con pocas consultas y cacheados por usuario.
+
+La caché de cada usuario lleva un número de versión que se incrementa cuando
+cambia una de sus citas o marca notificaciones como leídas, por lo que el
+TTL corto (``DASHBOARD_CACHE_SECONDS``) solo acota cambios ajenos, como los
+que ve un administrador.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.notifications.models import Notification
+from fenix_core.fast_serializers import ResponseFragments, serialize
+from apps.notifications.serializers import NotificationSerializer
+from .models import Appointment
+from .serializers import AppointmentSerializer
+
+STATUSES = ('scheduled', 'confirmed', 'completed', 'cancelled', 'no_show')
+TODAY_SCHEDULE_LIMIT = 50
+NOTIFICATIONS_LIMIT = 10
+
+
+def dashboard_appointments(user):
+    """Citas visibles para el usuario en el dashboard según su rol."""
+    if user.is_admin:
+        return Appointment.objects.all()
+    if hasattr(user, 'professional_profile') and user.professional_profile:
+        return Appointment.objects.filter(professional=user)
+    return Appointment.objects.filter(patient=user)
+
+
+def with_serializer_relations(queryset):
+    """Carga por adelantado lo que recorre ``AppointmentSerializer``."""
+    return queryset.select_related(
+        'patient__professional_profile', 'professional__professional_profile'
+    ).prefetch_related('attachments')
+
+
+def appointment_stats(queryset):
+    """Totales por estado y por período en una única consulta agregada."""
+    # Fecha local, la misma que usa today_schedule
+    today = timezone.localdate()
+
+    def day_start(day):
+        # Equivalente a start_time__date sin convertir cada fila a fecha local
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    return queryset.order_by().aggregate(
+        total=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status in STATUSES},
+        today=Count('id', filter=Q(start_time__gte=day_start(today),
+                                   start_time__lt=day_start(today + timedelta(days=1)))),
+        this_week=Count('id', filter=Q(start_time__gte=day_start(today - timedelta(days=today.weekday())))),
+        this_month=Count('id', filter=Q(start_time__gte=day_start(today.replace(day=1)))),
+    )
+
+
+def upcoming(queryset, limit):
+    return with_serializer_relations(
+        queryset.filter(start_time__gt=timezone.now()).order_by('start_time')
+    )[:limit]
+
+
+def today_schedule(queryset):
+    start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return with_serializer_relations(
+        queryset.filter(start_time__gte=start, start_time__lt=start + timedelta(days=1)).order_by('start_time')
+    )[:TODAY_SCHEDULE_LIMIT]
+
+
+def _version_key(user_id):
+    return f'dashboard:version:{user_id}'
+
+
+def invalidate_dashboard(*user_ids):
+    """Invalida el dashboard cacheado de los usuarios indicados."""
+    for user_id in set(user_ids):
+        key = _version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def build_dashboard_bundle(user, limit=5):
+    """Arma (o lee de la caché) el contenido completo del dashboard del usuario."""
+    version = cache.get(_version_key(user.id), 0)
+    # El día local forma parte de la clave: a medianoche cambian today y today_schedule
+    cache_key = f'dashboard:bundle:{user.id}:{version}:{limit}:{timezone.localdate().isoformat()}'
+    bundle = cache.get(cache_key)
+    if bundle is not None:
+        return bundle
+
+    appointments = dashboard_appointments(user)
+    unread = Notification.objects.filter(user=user, read_at__isnull=True)
+    # Ambas listas comparten los usuarios ya serializados
+    context = {'fragments': ResponseFragments()}
+    bundle = {
+        'stats': appointment_stats(appointments),
+        'upcoming_appointments': serialize(AppointmentSerializer, upcoming(appointments, limit), True, context),
+        'today_schedule': serialize(AppointmentSerializer, today_schedule(appointments), True, context),
+        'notifications': {
+            'unread_count': unread.count(),
+            'results': list(NotificationSerializer(unread[:NOTIFICATIONS_LIMIT], many=True).data),
+        },
+        'generated_at': timezone.now().isoformat(),
+    }
+    cache.set(cache_key, bundle, settings.DASHBOARD_CACHE_SECONDS)
+    return bundle
@@ -0,0 +1,137 @@
+"""
+Exportación de citas a CSV, XLSX y JSON con memoria constante.
+
+Las filas se leen con ``.values_list()`` + ``.iterator()`` (sin instanciar
+modelos ni cachear el queryset) y se escriben en bloques, de modo que el
+consumo de memoria no depende de la cantidad de citas exportadas.
+"""
+
+import csv
+import io
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from fenix_core.renderers import StreamingJSONListRenderer
+from .models import Appointment
+
+
+EXPORT_CHUNK_SIZE = 2000
+CSV_ROWS_PER_WRITE = 500
+# Límite de filas de una hoja de Excel (menos la fila de encabezado)
+XLSX_MAX_ROWS = 1048575
+
+EXPORT_COLUMNS = (
+    ('id', 'ID'),
+    ('start_time', 'Inicio'),
+    ('end_time', 'Fin'),
+    ('status', 'Estado'),
+    ('patient__first_name', 'Nombre paciente'),
+    ('patient__last_name', 'Apellido paciente'),
+    ('patient__email', 'Email paciente'),
+    ('professional__first_name', 'Nombre profesional'),
+    ('professional__last_name', 'Apellido profesional'),
+    ('professional__professional_profile__specialty', 'Especialidad'),
+    ('payment_status', 'Estado de pago'),
+    ('payment_amount', 'Monto'),
+    ('reason', 'Motivo'),
+    ('created_at', 'Creada'),
+)
+
+_STATUS_LABELS = {key: str(label) for key, label in Appointment.STATUS_CHOICES}
+_PAYMENT_LABELS = {
+    key: str(label) for key, label in Appointment._meta.get_field('payment_status').choices
+}
+_DATETIME_COLUMNS = {index for index, (field, _) in enumerate(EXPORT_COLUMNS)
+                     if field in ('start_time', 'end_time', 'created_at')}
+_STATUS_COLUMN = [field for field, _ in EXPORT_COLUMNS].index('status')
+_PAYMENT_COLUMN = [field for field, _ in EXPORT_COLUMNS].index('payment_status')
+# Excel y otras planillas interpretan como fórmula una celda que empieza con alguno de estos caracteres
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _spreadsheet_row(row):
+    """
+    Antepone ``'`` a los textos que Excel evaluaría como fórmula (nombres y
+    motivos los escribe el usuario), para CSV y XLSX.
+    """
+    return [
+        f"'{value}" if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES) else value
+        for value in row
+    ]
+
+
+def export_rows(queryset):
+    """
+    Genera las filas de la exportación con fechas en hora local y estados
+    legibles, leyendo el queryset por bloques.
+    """
+    current_timezone = timezone.get_current_timezone()
+    rows = queryset.values_list(*(field for field, _ in EXPORT_COLUMNS)).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        row = list(row)
+        for index in _DATETIME_COLUMNS:
+            if row[index] is not None:
+                row[index] = row[index].astimezone(current_timezone).replace(tzinfo=None, microsecond=0)
+        row[_STATUS_COLUMN] = _STATUS_LABELS.get(row[_STATUS_COLUMN], row[_STATUS_COLUMN])
+        row[_PAYMENT_COLUMN] = _PAYMENT_LABELS.get(row[_PAYMENT_COLUMN], row[_PAYMENT_COLUMN])
+        yield row
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM para que Excel detecte UTF-8 (nombres con acentos)
+    buffer.write('\ufeff')
+    writer.writerow([header for _, header in EXPORT_COLUMNS])
+    for index, row in enumerate(rows, 1):
+        writer.writerow(_spreadsheet_row(row))
+        if index % CSV_ROWS_PER_WRITE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def csv_response(queryset, filename):
+    """Respuesta CSV en streaming: el primer byte sale antes de leer todas las filas."""
+    response = StreamingHttpResponse(_csv_chunks(export_rows(queryset)), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def json_response(queryset, filename):
+    """Respuesta JSON en streaming: un arreglo de objetos con los campos de la exportación."""
+    fields = [field for field, _ in EXPORT_COLUMNS]
+    items = (dict(zip(fields, row)) for row in export_rows(queryset))
+    renderer = StreamingJSONListRenderer(chunk_size=CSV_ROWS_PER_WRITE)
+    response = StreamingHttpResponse(renderer.iter_render(items), content_type=renderer.media_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.json"'
+    return response
+
+
+def xlsx_response(queryset, filename):
+    """
+    Respuesta XLSX generada con el modo ``write_only`` de openpyxl sobre un
+    archivo temporal, que luego se envía por bloques. Para volúmenes muy
+    grandes conviene CSV, que no necesita generar el archivo completo antes
+    de empezar a responder.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Citas')
+    sheet.append([header for _, header in EXPORT_COLUMNS])
+    for row in export_rows(queryset[:XLSX_MAX_ROWS]):
+        sheet.append(_spreadsheet_row(row))
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -0,0 +1,166 @@
+"""
+Feed iCalendar (.ics) con las citas de cada usuario, para suscribirse desde
+el calendario del teléfono.
+
+Los clientes de calendario no envían credenciales, por lo que la URL lleva un
+token secreto por usuario (``CalendarFeedToken``) y consultan el feed cada
+pocos minutos. La versión del feed (última ``updated_at`` y cantidad de citas
+del período) se guarda en la caché y se invalida cuando cambia una cita del
+usuario: una consulta sin cambios responde 304 con dos lecturas de la caché
+(token y versión), sin leer citas. Cuando hay cambios, el cuerpo se genera
+en bloques sobre ``values_list().iterator()``.
+"""
+
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .ical import escape_text, fold_line, format_utc
+from .models import Appointment, CalendarFeedToken
+from .slots import day_start
+
+FEED_CHUNK_SIZE = 500
+TOKEN_CACHE_PREFIX = 'ics_feed:token:'
+VERSION_CACHE_PREFIX = 'ics_feed:version:'
+GENERATION_KEY = 'ics_feed:generation'
+# Segundos que se recuerda un token inexistente (evita consultas repetidas)
+MISSING_TOKEN_SECONDS = 60
+
+FEED_COLUMNS = (
+    'id', 'start_time', 'end_time', 'status', 'reason', 'updated_at', 'patient_id',
+    'patient__first_name', 'patient__last_name', 'professional__first_name', 'professional__last_name',
+)
+_STATUS = {
+    'scheduled': 'TENTATIVE',
+    'confirmed': 'CONFIRMED',
+    'completed': 'CONFIRMED',
+    'no_show': 'CONFIRMED',
+    'cancelled': 'CANCELLED',
+}
+
+
+# ======= TOKENS =======
+
+def get_or_create_token(user):
+    token = CalendarFeedToken.objects.filter(user=user).values_list('token', flat=True).first()
+    if token is None:
+        token = CalendarFeedToken.objects.create(user=user, token=secrets.token_urlsafe(32)).token
+    return token
+
+
+def rotate_token(user):
+    """Reemplaza el token del usuario; la URL anterior deja de funcionar."""
+    previous = CalendarFeedToken.objects.filter(user=user).values_list('token', flat=True).first()
+    token = secrets.token_urlsafe(32)
+    CalendarFeedToken.objects.update_or_create(user=user, defaults={'token': token})
+    if previous:
+        cache.delete(f'{TOKEN_CACHE_PREFIX}{previous}')
+    return token
+
+
+def resolve_token(token):
+    """ID del usuario dueño del token (desde la caché), o None."""
+    key = f'{TOKEN_CACHE_PREFIX}{token}'
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = CalendarFeedToken.objects.filter(token=token).values_list('user_id', flat=True).first() or 0
+        cache.set(key, user_id, timeout=None if user_id else MISSING_TOKEN_SECONDS)
+    return user_id or None
+
+
+# ======= VERSIÓN (ETag) =======
+
+def _window_start():
+    return timezone.localdate() - timedelta(days=settings.ICS_FEED_PAST_DAYS)
+
+
+def _version_key(user_id, window_start):
+    # El primer día del período forma parte de la clave: el feed cambia de un día a otro
+    return f'{VERSION_CACHE_PREFIX}{cache.get(GENERATION_KEY, 0)}:{window_start.isoformat()}:{user_id}'
+
+
+def feed_queryset(user_id, window_start=None):
+    """Citas del usuario (como paciente o profesional) desde ``ICS_FEED_PAST_DAYS`` días atrás."""
+    return Appointment.objects.filter(
+        Q(patient_id=user_id) | Q(professional_id=user_id),
+        start_time__gte=day_start(window_start or _window_start()),
+    )
+
+
+def feed_etag(user_id):
+    """ETag del feed: la última ``updated_at`` y la cantidad de citas, cacheadas hasta el próximo cambio."""
+    window_start = _window_start()
+    key = _version_key(user_id, window_start)
+    etag = cache.get(key)
+    if etag is None:
+        version = feed_queryset(user_id, window_start).order_by().aggregate(
+            last=Max('updated_at'), count=Count('id')
+        )
+        last = version['last'].isoformat() if version['last'] else ''
+        etag = hashlib.sha1(f"{user_id}:{window_start}:{last}:{version['count']}".encode()).hexdigest()
+        cache.set(key, etag, timeout=2 * 24 * 3600)
+    return f'"{etag}"'
+
+
+def invalidate_feeds(*user_ids):
+    window_start = _window_start()
+    cache.delete_many([_version_key(user_id, window_start) for user_id in set(user_ids) if user_id])
+
+
+def invalidate_all_feeds():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+# ======= CUERPO =======
+
+def _event(row, user_id, stamp):
+    (appointment_id, start, end, status, reason, updated_at, patient_id,
+     patient_first, patient_last, professional_first, professional_last) = row
+    if patient_id == user_id:
+        other = f'{professional_first} {professional_last}'.strip()
+    else:
+        other = f'{patient_first} {patient_last}'.strip()
+    lines = [
+        b'BEGIN:VEVENT\r\n',
+        f'UID:appointment-{appointment_id}@fenixclinicas\r\n'.encode(),
+        f'DTSTAMP:{stamp}\r\n'.encode(),
+        f'LAST-MODIFIED:{format_utc(updated_at)}\r\n'.encode(),
+        # Entero creciente con cada modificación de la cita
+        f'SEQUENCE:{int(updated_at.timestamp())}\r\n'.encode(),
+        f'DTSTART:{format_utc(start)}\r\n'.encode(),
+        f'DTEND:{format_utc(end)}\r\n'.encode(),
+        f'STATUS:{_STATUS.get(status, "CONFIRMED")}\r\n'.encode(),
+        fold_line(f'SUMMARY:{escape_text(f"Cita con {other}")}'),
+    ]
+    if reason:
+        lines.append(fold_line(f'DESCRIPTION:{escape_text(reason)}'))
+    lines.append(b'END:VEVENT\r\n')
+    return b''.join(lines)
+
+
+def iter_feed(user_id):
+    """Genera el calendario en bloques de ``FEED_CHUNK_SIZE`` citas."""
+    stamp = format_utc(timezone.now())
+    yield (
+        b'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//FenixClinicas//Citas//ES\r\n'
+        b'CALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\nX-WR-CALNAME:FenixClinicas\r\n'
+    )
+    rows = feed_queryset(user_id).order_by('start_time').values_list(*FEED_COLUMNS).iterator(
+        chunk_size=FEED_CHUNK_SIZE
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(_event(row, user_id, stamp))
+        if len(chunk) >= FEED_CHUNK_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+    chunk.append(b'END:VCALENDAR\r\n')
+    yield b''.join(chunk)
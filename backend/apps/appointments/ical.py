@@ -0,0 +1,375 @@
+"""
+Lectura y escritura de calendarios iCalendar (RFC 5545).
+
+``parse_events`` recorre el archivo una sola vez y devuelve un ``IcsEvent``
+por cada VEVENT con su UID, RECURRENCE-ID, SEQUENCE, el texto del componente
+y un hash de su contenido (sin DTSTAMP, que muchos servidores regeneran en
+cada descarga), de modo que la sincronización pueda descartar los eventos
+que no cambiaron sin interpretarlos.
+
+``busy_intervals`` convierte un evento en intervalos ocupados dentro de un
+rango. Las reglas diarias y semanales (la gran mayoría en calendarios de
+consultorios) se expanden de forma aritmética saltando directamente al
+rango pedido, sin recorrer las ocurrencias anteriores; el resto de las RRULE
+se delega en ``dateutil.rrule``.
+
+``escape_text``, ``fold_line`` y ``format_utc`` arman las líneas de los
+calendarios que se exportan (``feeds.py``).
+"""
+
+import hashlib
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import rrulestr
+
+# Ocurrencias máximas por evento dentro del rango (protege de reglas por minuto)
+MAX_OCCURRENCES = 5000
+# Propiedades que se interpretan; el resto solo participa del hash
+_PROPERTIES = {
+    'UID', 'RECURRENCE-ID', 'SEQUENCE', 'DTSTART', 'DTEND', 'DURATION',
+    'RRULE', 'RDATE', 'EXDATE', 'STATUS', 'TRANSP',
+}
+_WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+_FAST_RULE_PARTS = {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY', 'WKST'}
+_DURATION_RE = re.compile(
+    r'^([-+])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$'
+)
+_zones = {}
+
+
+class IcsError(ValueError):
+    """El archivo no es un calendario iCalendar válido."""
+
+
+class IcsEvent:
+    """Un VEVENT: identificación, hash del contenido y propiedades interpretables."""
+    __slots__ = ('uid', 'recurrence_id', 'sequence', 'content_hash', 'raw', 'properties')
+
+    def __init__(self, lines, properties, default_tz):
+        self.raw = '\r\n'.join(lines)
+        self.properties = properties
+        self.content_hash = hashlib.sha1(
+            '\n'.join(line for line in lines if not line.startswith('DTSTAMP')).encode()
+        ).hexdigest()
+        self.uid = self.value('UID') or self.content_hash
+        sequence = (self.value('SEQUENCE') or '').strip()
+        self.sequence = int(sequence) if sequence.isdigit() else 0
+        recurrence_id = properties.get('RECURRENCE-ID')
+        self.recurrence_id = ''
+        if recurrence_id:
+            params, value = recurrence_id[0]
+            self.recurrence_id = occurrence_key(*parse_datetime(value, params, default_tz))
+
+    def value(self, name):
+        entries = self.properties.get(name)
+        return entries[0][1] if entries else None
+
+    @property
+    def recurring(self):
+        return 'RRULE' in self.properties or 'RDATE' in self.properties
+
+
+def unfold(text):
+    """Líneas lógicas del archivo: une las continuaciones (líneas que empiezan con espacio o tab)."""
+    lines = []
+    for line in text.lstrip('\ufeff').replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def split_line(line):
+    """``NOMBRE;PARAM=valor:VALOR`` -> ``(nombre, {param: valor}, valor)``."""
+    if '"' in line:
+        # Los parámetros entre comillas pueden contener ':' y ';'
+        quoted = False
+        for index, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ':' and not quoted:
+                break
+        else:
+            return None
+        head, value = line[:index], line[index + 1:]
+    else:
+        head, sep, value = line.partition(':')
+        if not sep:
+            return None
+    name, *raw_params = head.split(';')
+    params = {}
+    for param in raw_params:
+        key, _, param_value = param.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def parse_events(text, default_tz):
+    """
+    Genera los ``IcsEvent`` del archivo (los VALARM anidados se ignoran);
+    las horas sin zona se interpretan en ``default_tz``.
+    """
+    lines = unfold(text)
+    if lines and not lines[0].upper().startswith('BEGIN:'):
+        raise IcsError('El archivo no es un calendario iCalendar.')
+    event_lines = None
+    properties = None
+    depth = 0
+    for line in lines:
+        upper = line.upper()
+        if event_lines is None:
+            if upper == 'BEGIN:VEVENT':
+                event_lines, properties, depth = [line], {}, 0
+            continue
+        event_lines.append(line)
+        if upper.startswith('BEGIN:'):
+            depth += 1
+        elif upper.startswith('END:'):
+            if depth:
+                depth -= 1
+            else:
+                yield IcsEvent(event_lines, properties, default_tz)
+                event_lines = None
+        elif not depth:
+            name = upper.split(';', 1)[0].split(':', 1)[0]
+            if name in _PROPERTIES:
+                parsed = split_line(line)
+                if parsed:
+                    properties.setdefault(parsed[0], []).append(parsed[1:])
+
+
+def _zone(name, default):
+    if not name:
+        return default
+    zone = _zones.get(name)
+    if zone is None:
+        try:
+            zone = ZoneInfo(name.lstrip('/'))
+        except (ZoneInfoNotFoundError, ValueError):
+            # TZID propios (p. ej. nombres de Windows): se usa la zona de la clínica
+            zone = default
+        _zones[name] = zone
+    return zone
+
+
+def parse_datetime(value, params, default_tz):
+    """
+    ``(datetime, es_fecha)``: aware en la zona del TZID, en UTC si termina en
+    ``Z`` o en ``default_tz`` si es flotante; las fechas (VALUE=DATE) son la
+    medianoche local de ``default_tz``.
+    """
+    value = value.strip()
+    try:
+        if params.get('VALUE') == 'DATE' or len(value) == 8:
+            return datetime(int(value[:4]), int(value[4:6]), int(value[6:8]), tzinfo=default_tz), True
+        parsed = datetime(
+            int(value[:4]), int(value[4:6]), int(value[6:8]),
+            int(value[9:11]), int(value[11:13]), int(value[13:15] or 0),
+        )
+    except (ValueError, IndexError):
+        raise IcsError(f'Fecha inválida: {value!r}.')
+    if value.endswith('Z'):
+        return parsed.replace(tzinfo=dt_timezone.utc), False
+    return parsed.replace(tzinfo=_zone(params.get('TZID'), default_tz)), False
+
+
+def parse_duration(value):
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        raise IcsError(f'Duración inválida: {value!r}.')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -duration if sign == '-' else duration
+
+
+def occurrence_key(start, is_date):
+    """Identificador estable de una ocurrencia, igual al de su RECURRENCE-ID."""
+    if is_date:
+        return start.date().isoformat()
+    return start.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _date_list(event, name, default_tz):
+    values = []
+    for params, raw in event.properties.get(name, ()):
+        if params.get('VALUE') == 'PERIOD':
+            continue
+        values.extend(parse_datetime(value, params, default_tz) for value in raw.split(',') if value)
+    return values
+
+
+def _parse_rule(value):
+    return dict(part.split('=', 1) for part in value.upper().split(';') if '=' in part)
+
+
+def _fast_occurrences(rule, start, first_date, last_date):
+    """
+    Ocurrencias de una regla DAILY o WEEKLY cuya fecha local está entre
+    ``first_date`` y ``last_date``, calculando el primer período del rango en
+    vez de recorrer los anteriores. Retorna None si la regla no es de este tipo.
+    """
+    if not set(rule) <= _FAST_RULE_PARTS or rule.get('FREQ') not in ('DAILY', 'WEEKLY'):
+        return None
+    try:
+        interval = int(rule.get('INTERVAL', 1))
+        count = int(rule['COUNT']) if 'COUNT' in rule else None
+        byday = [_WEEKDAYS[day] for day in rule['BYDAY'].split(',')] if 'BYDAY' in rule else None
+        wkst = _WEEKDAYS[rule.get('WKST', 'MO')]
+    except (KeyError, ValueError):
+        # BYDAY con posición (1MO, -1FR) u otros valores: los resuelve dateutil
+        return None
+    if interval < 1:
+        return None
+    until = None
+    if 'UNTIL' in rule:
+        until, until_is_date = parse_datetime(rule['UNTIL'], {}, start.tzinfo)
+        if until_is_date:
+            until = until.replace(hour=23, minute=59, second=59)
+
+    freq = rule['FREQ']
+    if freq == 'DAILY' and byday is not None:
+        if interval != 1:
+            return None
+        # FREQ=DAILY;BYDAY=... equivale a la regla semanal con esos días
+        freq = 'WEEKLY'
+
+    zone, clock, start_date = start.tzinfo, start.timetz().replace(tzinfo=None), start.date()
+    occurrences = []
+    if freq == 'DAILY':
+        index = max(0, (first_date - start_date).days // interval)
+        while True:
+            day = start_date + timedelta(days=index * interval)
+            if day > last_date or (count is not None and index >= count):
+                break
+            if day >= first_date:
+                occurrences.append(datetime.combine(day, clock, tzinfo=zone))
+            index += 1
+    else:
+        offsets = sorted({(day - wkst) % 7 for day in (byday or [start.weekday()])})
+        week_zero = start_date - timedelta(days=(start.weekday() - wkst) % 7)
+        # Ocurrencias de la primera semana (las anteriores a DTSTART no cuentan)
+        first_week = [offset for offset in offsets if week_zero + timedelta(days=offset) >= start_date]
+        week = max(0, (first_date - week_zero).days // (7 * interval))
+        while True:
+            week_start = week_zero + timedelta(days=7 * interval * week)
+            if week_start > last_date:
+                break
+            index = 0 if week == 0 else len(first_week) + (week - 1) * len(offsets)
+            for offset in first_week if week == 0 else offsets:
+                day = week_start + timedelta(days=offset)
+                if count is not None and index >= count:
+                    break
+                index += 1
+                if first_date <= day <= last_date:
+                    occurrences.append(datetime.combine(day, clock, tzinfo=zone))
+            if count is not None and index >= count:
+                break
+            week += 1
+    if until is not None:
+        occurrences = [occurrence for occurrence in occurrences if occurrence <= until]
+    return occurrences
+
+
+def _rule_occurrences(value, start, range_start, range_end):
+    rule = _parse_rule(value)
+    local_from = range_start.astimezone(start.tzinfo).date() - timedelta(days=1)
+    local_to = range_end.astimezone(start.tzinfo).date() + timedelta(days=1)
+    occurrences = _fast_occurrences(rule, start, max(local_from, start.date()), local_to)
+    if occurrences is not None:
+        return occurrences
+    if 'UNTIL' in rule and not rule['UNTIL'].endswith('Z'):
+        # dateutil exige UNTIL en UTC cuando DTSTART tiene zona
+        until, until_is_date = parse_datetime(rule['UNTIL'], {}, start.tzinfo)
+        if until_is_date:
+            until = until.replace(hour=23, minute=59, second=59)
+        rule['UNTIL'] = until.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    try:
+        recurrence = rrulestr('RRULE:' + ';'.join(f'{key}={part}' for key, part in rule.items()), dtstart=start)
+    except (ValueError, TypeError) as exc:
+        raise IcsError(f'RRULE inválida: {value!r} ({exc}).')
+    occurrences = []
+    for occurrence in islice(recurrence.xafter(range_start - timedelta(days=1), inc=True), MAX_OCCURRENCES):
+        if occurrence >= range_end:
+            break
+        occurrences.append(occurrence)
+    return occurrences
+
+
+def busy_intervals(event, range_start, range_end, default_tz, overridden=()):
+    """
+    Intervalos ``(inicio, fin)`` (UTC) en que el evento ocupa la agenda y que
+    se superponen con ``[range_start, range_end)``. ``overridden`` son las
+    claves de ocurrencia reemplazadas por otro VEVENT con RECURRENCE-ID.
+    Los eventos cancelados o marcados como transparentes no ocupan la agenda.
+    """
+    if (event.value('STATUS') or '').upper() == 'CANCELLED' or (event.value('TRANSP') or '').upper() == 'TRANSPARENT':
+        return []
+    dtstart = event.properties.get('DTSTART')
+    if not dtstart:
+        return []
+    start, is_date = parse_datetime(dtstart[0][1], dtstart[0][0], default_tz)
+    if event.properties.get('DTEND'):
+        params, value = event.properties['DTEND'][0]
+        duration = parse_datetime(value, params, default_tz)[0] - start
+    elif event.value('DURATION'):
+        duration = parse_duration(event.value('DURATION'))
+    else:
+        duration = timedelta(days=1) if is_date else timedelta(0)
+    if duration <= timedelta(0):
+        return []
+
+    if event.value('RRULE'):
+        occurrences = _rule_occurrences(event.value('RRULE'), start, range_start - duration, range_end)
+    else:
+        occurrences = [start]
+    occurrences.extend(value for value, _ in _date_list(event, 'RDATE', default_tz))
+    excluded = {occurrence_key(*value) for value in _date_list(event, 'EXDATE', default_tz)}
+    excluded.update(overridden)
+
+    intervals = set()
+    for occurrence in occurrences[:MAX_OCCURRENCES]:
+        end = occurrence + duration
+        if end <= range_start or occurrence >= range_end:
+            continue
+        if excluded and occurrence_key(occurrence, is_date) in excluded:
+            continue
+        intervals.add((occurrence.astimezone(dt_timezone.utc), end.astimezone(dt_timezone.utc)))
+    return sorted(intervals)
+
+
+# ======= ESCRITURA =======
+
+def escape_text(value):
+    """Escapa un valor TEXT (RFC 5545, 3.3.11)."""
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    """Pliega la línea cada 75 octetos (sin cortar caracteres UTF-8) y agrega el fin de línea."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return encoded + b'\r\n'
+    parts = []
+    start, limit = 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # No cortar dentro de una secuencia UTF-8 (bytes de continuación 10xxxxxx)
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end])
+        start, limit = end, 74
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.users.importers import BaseCSVImporter, ImportRowError
+from .models import Appointment
+from .signals import appointments_bulk_changed
+
+User = get_user_model()
+
+_STATUSES = {key for key, _ in Appointment.STATUS_CHOICES}
+_PAYMENT_STATUSES = {key for key, _ in Appointment._meta.get_field('payment_status').choices}
+_DATETIME_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S')
+
+
+class AppointmentImporter(BaseCSVImporter):
+    """
+    Importa el historial de citas. Pacientes y profesionales se resuelven por
+    email con mapas en memoria. Al ser datos históricos no se valida la
+    disponibilidad ni la superposición, y ``bulk_create`` no envía las
+    notificaciones por correo de ``signals.py``.
+    """
+    required_columns = ('patient_email', 'professional_email', 'start_time')
+    default_duration = timedelta(minutes=30)
+
+    def prepare(self):
+        users = User.objects.filter(role__in=('patient', 'professional')).values_list('email', 'role', 'id')
+        self.patients = {}
+        self.professionals = {}
+        for email, role, user_id in users.iterator():
+            target = self.patients if role == 'patient' else self.professionals
+            target[email.lower()] = user_id
+        self.current_timezone = timezone.get_current_timezone()
+        self.months = set()
+
+    def parse_datetime(self, value, column):
+        for fmt in _DATETIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                raise ImportRowError(f'{column}: fecha y hora inválida {value!r}.')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, self.current_timezone)
+        return parsed
+
+    def build(self, row):
+        patient_id = self.patients.get(self.required(row, 'patient_email').lower())
+        if patient_id is None:
+            raise ImportRowError(f'No existe un paciente con email {row["patient_email"]}.')
+        professional_id = self.professionals.get(self.required(row, 'professional_email').lower())
+        if professional_id is None:
+            raise ImportRowError(f'No existe un profesional con email {row["professional_email"]}.')
+
+        start_time = self.parse_datetime(row['start_time'], 'start_time')
+        if row.get('end_time'):
+            end_time = self.parse_datetime(row['end_time'], 'end_time')
+        else:
+            end_time = start_time + self.default_duration
+        if start_time >= end_time:
+            raise ImportRowError('La hora de inicio debe ser anterior a la hora de fin.')
+
+        status = row.get('status') or 'completed'
+        if status not in _STATUSES:
+            raise ImportRowError(f'Estado inválido: {status!r}.')
+        payment_status = row.get('payment_status') or 'pending'
+        if payment_status not in _PAYMENT_STATUSES:
+            raise ImportRowError(f'Estado de pago inválido: {payment_status!r}.')
+
+        self.months.add(start_time.astimezone(self.current_timezone).date().replace(day=1))
+        return self.check_field_limits(Appointment(
+            patient_id=patient_id,
+            professional_id=professional_id,
+            start_time=start_time,
+            end_time=end_time,
+            status=status,
+            reason=row.get('reason', ''),
+            notes=row.get('notes', ''),
+            payment_status=payment_status,
+            payment_amount=self.parse_decimal(row.get('payment_amount'), 'payment_amount'),
+            reminder_sent=start_time < timezone.now(),
+        ))
+
+    def save_batch(self, batch):
+        return Appointment.objects.bulk_create(batch)
+
+    def finish(self, result):
+        # bulk_create no dispara post_save: se recalculan los resúmenes de los meses importados
+        appointments_bulk_changed.send(sender=Appointment, months=self.months)
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.appointments.archive import archive_appointments, ensure_partitions, partitioning_supported
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve las citas cerradas antiguas a la tabla de archivo por lotes. '
+        'En PostgreSQL crea antes las particiones anuales que falten.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.APPOINTMENT_ARCHIVE_AFTER_DAYS,
+                            help='Antigüedad mínima (por fecha de inicio) de las citas a archivar.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Citas movidas por transacción.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo informa cuántas citas se archivarían.')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--older-than-days y --batch-size deben ser positivos.')
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+
+        if partitioning_supported() and not options['dry_run']:
+            for partition in ensure_partitions():
+                self.stdout.write(f'Partición creada: {partition}')
+
+        moved = archive_appointments(before, options['batch_size'], options['dry_run'])
+        verb = 'se archivarían' if options['dry_run'] else 'archivadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{moved} citas anteriores al {timezone.localtime(before):%d/%m/%Y} {verb}.'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.appointments.slots import check_open_slots, refresh_professional
+
+
+class Command(BaseCommand):
+    help = 'Verifica los slots libres materializados contra las disponibilidades y las citas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('professional_ids', nargs='*', type=int,
+                            help='Profesionales a verificar (por defecto todos).')
+        parser.add_argument('--fix', action='store_true',
+                            help='Regenera el horizonte de los profesionales con diferencias.')
+
+    def handle(self, *args, **options):
+        problems = check_open_slots(options['professional_ids'] or None)
+        for professional_id, (missing, extra) in sorted(problems.items()):
+            if missing is None:
+                self.stdout.write(f'Profesional {professional_id}: sin horizonte materializado.')
+            else:
+                self.stdout.write(
+                    f'Profesional {professional_id}: {len(missing)} slots faltantes, {len(extra)} sobrantes.'
+                )
+                for start, end in (missing + extra)[:5]:
+                    self.stdout.write(f'    {start:%Y-%m-%d %H:%M} - {end:%H:%M}')
+            if options['fix']:
+                refresh_professional(professional_id)
+
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Los slots libres coinciden con la fuente de verdad.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'{len(problems)} profesionales regenerados.'))
+        else:
+            raise CommandError(f'{len(problems)} profesionales con diferencias (use --fix para corregir).')
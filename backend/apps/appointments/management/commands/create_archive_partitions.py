@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments.archive import ensure_partitions, partitioning_supported
+
+
+class Command(BaseCommand):
+    help = 'Crea las particiones anuales de la tabla de citas archivadas (solo PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years-ahead', type=int, default=1,
+                            help='Años futuros para los que se crean particiones por adelantado.')
+
+    def handle(self, *args, **options):
+        if not partitioning_supported():
+            self.stdout.write('El motor de base de datos no admite particiones; el archivo usa una tabla común.')
+            return
+        created = ensure_partitions(options['years_ahead'])
+        for partition in created:
+            self.stdout.write(f'Partición creada: {partition}')
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} particiones creadas.'))
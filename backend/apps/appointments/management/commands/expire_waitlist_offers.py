@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments.waitlist import expire_offers
+
+
+class Command(BaseCommand):
+    help = (
+        'Vence las ofertas de la lista de espera sin respuesta (el horario pasa a la siguiente '
+        'entrada) y las solicitudes cuyo rango de días ya pasó (ejecutar cada minuto).'
+    )
+
+    def handle(self, *args, **options):
+        offers, entries = expire_offers()
+        self.stdout.write(self.style.SUCCESS(
+            f'{offers} ofertas vencidas, {entries} solicitudes vencidas.'
+        ))
@@ -0,0 +1,245 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.appointments.models import ProfessionalAvailability, Appointment, AppointmentAttachment
+from apps.appointments.signals import appointments_bulk_changed
+from apps.users.models import ProfessionalProfile
+
+User = get_user_model()
+
+SYNTHETIC_DOMAIN = 'synthetic.fenix.test'
+DEFAULT_PASSWORD = 'Fenix.synthetic.2024'
+
+FIRST_NAMES = (
+    'María', 'Juan', 'Lucía', 'Martín', 'Sofía', 'Diego', 'Valentina', 'Pablo', 'Camila', 'Tomás',
+    'Julieta', 'Nicolás', 'Florencia', 'Agustín', 'Carolina', 'Federico', 'Paula', 'Santiago',
+)
+LAST_NAMES = (
+    'González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Díaz', 'Martínez', 'Pérez', 'García',
+    'Sánchez', 'Romero', 'Sosa', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores', 'Benítez',
+)
+SPECIALTIES = (
+    'Clínica Médica', 'Cardiología', 'Dermatología', 'Pediatría', 'Traumatología',
+    'Ginecología', 'Oftalmología', 'Psicología',
+)
+REASONS = (
+    'Control de rutina', 'Consulta por dolor', 'Seguimiento de tratamiento', 'Revisión de estudios',
+    'Primera consulta', 'Renovación de receta', '',
+)
+# Turnos de atención posibles (mañana / tarde)
+SHIFTS = (
+    ((time(8, 0), time(12, 0)),),
+    ((time(9, 0), time(13, 0)), (time(14, 0), time(18, 0))),
+    ((time(14, 0), time(20, 0)),),
+    ((time(8, 30), time(12, 30)), (time(15, 0), time(19, 0))),
+)
+# Mezcla de estados para citas pasadas y futuras
+PAST_STATUS_WEIGHTS = (('completed', 78), ('cancelled', 13), ('no_show', 9))
+FUTURE_STATUS_WEIGHTS = (('scheduled', 60), ('confirmed', 34), ('cancelled', 6))
+
+SLOT_MINUTES = 30
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos reproducibles (profesionales, disponibilidades, pacientes '
+        'y años de historial de citas) para pruebas de rendimiento locales.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio.')
+        parser.add_argument('--professionals', type=int, default=20, help='Cantidad de profesionales.')
+        parser.add_argument('--patients', type=int, default=1000, help='Cantidad de pacientes.')
+        parser.add_argument('--years', type=float, default=2, help='Años de historial de citas.')
+        parser.add_argument('--future-days', type=int, default=60, help='Días de agenda futura.')
+        parser.add_argument('--occupancy', type=float, default=0.6,
+                            help='Fracción de slots ocupados en días pasados (0-1).')
+        parser.add_argument('--attachment-ratio', type=float, default=0.03,
+                            help='Fracción de citas completadas con adjunto.')
+        parser.add_argument('--flush', action='store_true',
+                            help='Elimina los datos sintéticos existentes antes de generar.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        if options['flush']:
+            deleted, _ = User.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').delete()
+            self.stdout.write(f'Eliminados {deleted} registros sintéticos previos.')
+        elif User.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').exists():
+            self.stderr.write('Ya existen datos sintéticos. Use --flush para regenerarlos.')
+            return
+
+        with transaction.atomic():
+            password = make_password(DEFAULT_PASSWORD)
+            User.objects.create(
+                email=f'admin@{SYNTHETIC_DOMAIN}', first_name='Admin', last_name='Sintético',
+                role='admin', is_staff=True, is_superuser=True, password=password,
+            )
+            professionals = self._create_professionals(rng, options['professionals'], password)
+            patients = self._create_patients(rng, options['patients'], password)
+            schedules = self._create_availabilities(rng, professionals)
+            appointments = self._create_appointments(rng, professionals, patients, schedules, options)
+            attachments = self._create_attachments(rng, appointments, options['attachment_ratio'])
+            # bulk_create no dispara post_save: se recalculan los resúmenes derivados
+            appointments_bulk_changed.send(sender=Appointment, months=None)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generados {len(professionals)} profesionales, {len(patients)} pacientes, '
+            f'{len(appointments)} citas y {attachments} adjuntos (semilla {options["seed"]}). '
+            f'Contraseña de todos los usuarios: {DEFAULT_PASSWORD}'
+        ))
+
+    def _person(self, rng):
+        return rng.choice(FIRST_NAMES), f'{rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+    def _create_professionals(self, rng, count, password):
+        users = []
+        for index in range(count):
+            first_name, last_name = self._person(rng)
+            users.append(User(
+                email=f'profesional{index}@{SYNTHETIC_DOMAIN}',
+                first_name=first_name,
+                last_name=last_name,
+                role='professional',
+                password=password,
+                phone_number=f'+54 11 4{rng.randint(0, 9999999):07d}',
+            ))
+        # bulk_create no dispara post_save, por lo que los perfiles se crean aquí
+        users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        ProfessionalProfile.objects.bulk_create([
+            ProfessionalProfile(
+                user=user,
+                specialty=SPECIALTIES[index % len(SPECIALTIES)],
+                license_number=f'MN-{100000 + index}',
+                education='Universidad de Buenos Aires',
+                experience=f'{rng.randint(2, 30)} años de experiencia',
+                consultation_fee=Decimal(rng.choice((8000, 10000, 12000, 15000, 18000))),
+            )
+            for index, user in enumerate(users)
+        ], batch_size=BATCH_SIZE)
+        return users
+
+    def _create_patients(self, rng, count, password):
+        users = []
+        for index in range(count):
+            first_name, last_name = self._person(rng)
+            users.append(User(
+                email=f'paciente{index}@{SYNTHETIC_DOMAIN}',
+                first_name=first_name,
+                last_name=last_name,
+                role='patient',
+                password=password,
+                phone_number=f'+54 11 5{rng.randint(0, 9999999):07d}',
+                date_of_birth=datetime(1940, 1, 1).date() + timedelta(days=rng.randint(0, 365 * 80)),
+            ))
+        return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+    def _create_availabilities(self, rng, professionals):
+        """Crea la agenda semanal y retorna {professional_id: {día: [(inicio, fin)]}}."""
+        availabilities = []
+        schedules = {}
+        for professional in professionals:
+            days = sorted(rng.sample(range(6), rng.randint(3, 5)))
+            shift = rng.choice(SHIFTS)
+            schedule = schedules[professional.id] = {}
+            for day in days:
+                schedule[day] = list(shift)
+                for start, end in shift:
+                    availabilities.append(ProfessionalAvailability(
+                        professional=professional, day_of_week=day, start_time=start, end_time=end,
+                    ))
+        ProfessionalAvailability.objects.bulk_create(availabilities, batch_size=BATCH_SIZE)
+        return schedules
+
+    def _pick_status(self, rng, weights):
+        return rng.choices([status for status, _ in weights], [weight for _, weight in weights])[0]
+
+    def _create_appointments(self, rng, professionals, patients, schedules, options):
+        now = timezone.now()
+        today = timezone.localdate()
+        first_day = today - timedelta(days=int(options['years'] * 365))
+        last_day = today + timedelta(days=options['future_days'])
+        fees = dict(ProfessionalProfile.objects.filter(
+            user__in=professionals
+        ).values_list('user_id', 'consultation_fee'))
+        slot = timedelta(minutes=SLOT_MINUTES)
+
+        appointments = []
+        created_at = []
+        for professional in professionals:
+            schedule = schedules[professional.id]
+            day = first_day
+            while day <= last_day:
+                for start, end in schedule.get(day.weekday(), ()):
+                    slot_start = timezone.make_aware(datetime.combine(day, start))
+                    block_end = timezone.make_aware(datetime.combine(day, end))
+                    while slot_start + slot <= block_end:
+                        in_past = slot_start < now
+                        # La agenda futura está menos ocupada cuanto más lejos está
+                        occupancy = options['occupancy'] if in_past else options['occupancy'] * 0.5
+                        if rng.random() < occupancy:
+                            status = self._pick_status(
+                                rng, PAST_STATUS_WEIGHTS if in_past else FUTURE_STATUS_WEIGHTS
+                            )
+                            fee = fees[professional.id]
+                            payment_status = 'pending'
+                            if status == 'completed':
+                                payment_status = 'paid' if rng.random() < 0.92 else 'pending'
+                            elif status == 'cancelled' and rng.random() < 0.2:
+                                payment_status = 'refunded'
+                            lead_time = timedelta(hours=max(1.0, rng.expovariate(1 / (24 * 9))))
+                            booked_at = min(slot_start - lead_time, now)
+                            appointments.append(Appointment(
+                                patient=rng.choice(patients),
+                                professional=professional,
+                                start_time=slot_start,
+                                end_time=slot_start + slot,
+                                status=status,
+                                reason=rng.choice(REASONS),
+                                payment_status=payment_status,
+                                payment_amount=fee if payment_status != 'pending' or rng.random() < 0.5 else None,
+                                reminder_sent=in_past,
+                            ))
+                            created_at.append(booked_at)
+                        slot_start += slot
+                day += timedelta(days=1)
+
+        appointments = Appointment.objects.bulk_create(appointments, batch_size=BATCH_SIZE)
+
+        # auto_now_add pisa created_at en bulk_create; se restaura la fecha de reserva simulada
+        for appointment, booked_at in zip(appointments, created_at):
+            appointment.created_at = booked_at
+            appointment.updated_at = max(booked_at, min(appointment.end_time, now))
+        Appointment.objects.bulk_update(appointments, ['created_at', 'updated_at'], batch_size=BATCH_SIZE)
+        return appointments
+
+    def _create_attachments(self, rng, appointments, ratio):
+        completed = [appointment for appointment in appointments if appointment.status == 'completed']
+        if not completed or ratio <= 0:
+            return 0
+        # Todos los adjuntos comparten un único archivo para no llenar MEDIA_ROOT
+        file_name = 'appointment_attachments/synthetic/resultado.txt'
+        if not default_storage.exists(file_name):
+            file_name = default_storage.save(file_name, ContentFile(b'Resultado de estudio sintetico\n'))
+        attachments = [
+            AppointmentAttachment(
+                appointment=appointment,
+                title=rng.choice(('Resultado de laboratorio', 'Receta', 'Informe de estudio')),
+                file=file_name,
+                uploaded_by=appointment.professional,
+            )
+            for appointment in completed
+            if rng.random() < ratio
+        ]
+        AppointmentAttachment.objects.bulk_create(attachments, batch_size=BATCH_SIZE)
+        return len(attachments)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.appointments.importers import AppointmentImporter
+from apps.users.importers import PatientImporter, ProfessionalImporter, UserImporter
+from apps.users.invites import send_invites
+
+IMPORTERS = {
+    'patients': PatientImporter,
+    'professionals': ProfessionalImporter,
+    'appointments': AppointmentImporter,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa pacientes, profesionales (con perfil) o historial de citas desde un CSV con '
+        'validación en una pasada e inserciones por lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help='Tipo de datos a importar.')
+        parser.add_argument('path', help='Ruta del archivo CSV (UTF-8, con encabezado).')
+        parser.add_argument('--dry-run', action='store_true', help='Solo valida, no inserta.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Filas por bulk_create.')
+        parser.add_argument('--send-invites', action='store_true',
+                            help='Envía la invitación para definir contraseña a los usuarios creados.')
+
+    def handle(self, *args, **options):
+        importer = IMPORTERS[options['kind']](dry_run=options['dry_run'], batch_size=options['batch_size'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as handle:
+                result = importer.run(handle)
+        except OSError as exc:
+            raise CommandError(f'No se pudo leer el archivo: {exc}')
+
+        for error in result.errors:
+            self.stderr.write(f'Línea {error["line"]}: {error["error"]}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... y {result.error_count - len(result.errors)} errores más.')
+
+        summary = result.as_dict()
+        action = 'validadas' if options['dry_run'] else 'importadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary["created"]} de {summary["rows"]} filas {action} en {summary["elapsed_seconds"]} s '
+            f'({summary["rows_per_second"]} filas/s), {summary["error_count"]} con errores.'
+        ))
+
+        if options['send_invites'] and isinstance(importer, UserImporter) and not options['dry_run']:
+            sent = send_invites(result.created_objects)
+            self.stdout.write(f'Invitaciones enviadas: {sent}')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments.slots import rebuild_open_slots, roll_forward
+
+
+class Command(BaseCommand):
+    help = (
+        'Descarta los slots libres de días pasados y extiende el horizonte materializado '
+        'hasta OPEN_SLOTS_HORIZON_DAYS días (ejecutar cada noche).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Regenera el horizonte completo de todos los profesionales.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = rebuild_open_slots()
+            self.stdout.write(self.style.SUCCESS(f'Slots libres regenerados para {count} profesionales.'))
+            return
+        extended, created = roll_forward()
+        self.stdout.write(self.style.SUCCESS(
+            f'Horizonte extendido para {extended} profesionales: {created} slots nuevos.'
+        ))
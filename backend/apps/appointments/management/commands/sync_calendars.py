@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments.calendar_sync import CalendarSyncError, claim_pending, sync_calendar
+from apps.appointments.models import ExternalCalendar
+
+
+class Command(BaseCommand):
+    help = (
+        'Sincroniza los calendarios externos (.ics) con URL y extiende hasta el horizonte de slots '
+        'los eventos ya importados (ejecutar cada noche, después de roll_open_slots). Con --pending '
+        'solo procesa las sincronizaciones pedidas desde la API (ejecutar cada minuto).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendar', type=int, action='append', dest='calendars',
+                            help='ID de calendario a sincronizar (se puede repetir).')
+        parser.add_argument('--pending', action='store_true',
+                            help='Solo los calendarios con una sincronización pedida desde la API.')
+
+    def handle(self, *args, **options):
+        calendars = ExternalCalendar.objects.select_related('professional')
+        if options['calendars']:
+            calendars = calendars.filter(pk__in=options['calendars'])
+        if options['pending']:
+            calendars = calendars.filter(sync_requested_at__isnull=False).order_by('sync_requested_at')
+        synced = failed = 0
+        for calendar in calendars:
+            if options['pending'] and not claim_pending(calendar):
+                continue
+            try:
+                result = sync_calendar(calendar)
+            except CalendarSyncError as exc:
+                failed += 1
+                self.stderr.write(f'{calendar}: {exc}')
+                continue
+            synced += 1
+            self.stdout.write(
+                f'{calendar}: {result.created} nuevos, {result.updated} modificados, '
+                f'{result.deleted} eliminados, {result.blocks} bloques ({result.elapsed:.2f} s)'
+            )
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f'Calendarios sincronizados: {synced}; con errores: {failed}.'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['start_time'], name='appointment_start_time_idx'),
+        ),
+    ]
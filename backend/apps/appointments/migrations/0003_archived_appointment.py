@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# En PostgreSQL la tabla de archivo se crea particionada por rango de
+# start_time (la clave primaria debe incluir la columna de partición); las
+# particiones anuales se agregan con ``create_archive_partitions``. En los
+# demás motores es una tabla común.
+POSTGRES_ARCHIVE_TABLE = """
+CREATE TABLE {table} (
+    id bigint NOT NULL,
+    patient_id bigint NOT NULL REFERENCES {users} (id) DEFERRABLE INITIALLY DEFERRED,
+    professional_id bigint NOT NULL REFERENCES {users} (id) DEFERRABLE INITIALLY DEFERRED,
+    start_time timestamp with time zone NOT NULL,
+    end_time timestamp with time zone NOT NULL,
+    status varchar(20) NOT NULL,
+    reason text NOT NULL,
+    notes text NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL,
+    payment_status varchar(20) NOT NULL,
+    payment_amount numeric(10, 2) NULL,
+    reminder_sent boolean NOT NULL,
+    archived_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, start_time)
+) PARTITION BY RANGE (start_time);
+CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+CREATE INDEX archived_appt_patient_idx ON {table} (patient_id, start_time);
+CREATE INDEX archived_appt_prof_idx ON {table} (professional_id, start_time);
+"""
+
+
+def create_archive_table(apps, schema_editor):
+    model = apps.get_model('appointments', 'ArchivedAppointment')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(model)
+        return
+    users = model._meta.get_field('patient').related_model._meta.db_table
+    schema_editor.execute(POSTGRES_ARCHIVE_TABLE.format(table=model._meta.db_table, users=users))
+
+
+def drop_archive_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model('appointments', 'ArchivedAppointment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('appointments', '0002_appointment_start_time_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='ArchivedAppointment',
+                fields=[
+                    ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                    ('start_time', models.DateTimeField(verbose_name='hora de inicio')),
+                    ('end_time', models.DateTimeField(verbose_name='hora de fin')),
+                    ('status', models.CharField(choices=[('scheduled', 'Programada'), ('confirmed', 'Confirmada'), ('completed', 'Completada'), ('cancelled', 'Cancelada'), ('no_show', 'No asistió')], max_length=20, verbose_name='estado')),
+                    ('reason', models.TextField(blank=True, verbose_name='motivo de la consulta')),
+                    ('notes', models.TextField(blank=True, verbose_name='notas')),
+                    ('created_at', models.DateTimeField()),
+                    ('updated_at', models.DateTimeField()),
+                    ('payment_status', models.CharField(choices=[('pending', 'Pendiente'), ('paid', 'Pagado'), ('refunded', 'Reembolsado')], max_length=20, verbose_name='estado de pago')),
+                    ('payment_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='monto')),
+                    ('reminder_sent', models.BooleanField(default=False, verbose_name='recordatorio enviado')),
+                    ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='archivada el')),
+                    ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_patient_appointments', to=settings.AUTH_USER_MODEL)),
+                    ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_professional_appointments', to=settings.AUTH_USER_MODEL)),
+                ],
+                options={
+                    'verbose_name': 'cita archivada',
+                    'verbose_name_plural': 'citas archivadas',
+                    'ordering': ['-start_time'],
+                    'indexes': [models.Index(fields=['patient', 'start_time'], name='archived_appt_patient_idx'), models.Index(fields=['professional', 'start_time'], name='archived_appt_prof_idx')],
+                },
+            ),
+        ]),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_initial'),
+        ('appointments', '0003_archived_appointment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenSlotCoverage',
+            fields=[
+                ('professional', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='open_slot_coverage', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('valid_from', models.DateField(verbose_name='desde')),
+                ('valid_until', models.DateField(verbose_name='hasta')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'cobertura de slots libres',
+                'verbose_name_plural': 'coberturas de slots libres',
+            },
+        ),
+        migrations.CreateModel(
+            name='OpenSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(verbose_name='hora de inicio')),
+                ('end_time', models.DateTimeField(verbose_name='hora de fin')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'slot libre',
+                'verbose_name_plural': 'slots libres',
+                'ordering': ['start_time'],
+                'indexes': [models.Index(fields=['start_time'], name='open_slot_start_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='openslot',
+            constraint=models.UniqueConstraint(fields=('professional', 'start_time'), name='open_slot_professional_start_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('appointments', '0004_open_slots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('vacation', 'Vacaciones'), ('holiday', 'Feriado'), ('blocked', 'Horario bloqueado')], default='blocked', max_length=20, verbose_name='tipo')),
+                ('start_time', models.DateTimeField(verbose_name='desde')),
+                ('end_time', models.DateTimeField(verbose_name='hasta')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='motivo')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('professional', models.ForeignKey(blank=True, help_text='Vacío para un feriado de toda la clínica.', limit_choices_to={'role': 'professional'}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_exceptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'excepción de disponibilidad',
+                'verbose_name_plural': 'excepciones de disponibilidad',
+                'ordering': ['start_time'],
+                'indexes': [models.Index(fields=['professional', 'start_time'], name='avail_exception_prof_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('appointments', '0005_availability_exception'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='nombre')),
+                ('url', models.URLField(blank=True, max_length=500, verbose_name='URL del calendario')),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('content_hash', models.CharField(blank=True, max_length=40)),
+                ('expanded_until', models.DateField(blank=True, null=True, verbose_name='expandido hasta')),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True, verbose_name='última sincronización')),
+                ('last_error', models.TextField(blank=True, verbose_name='último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('professional', models.ForeignKey(limit_choices_to={'role': 'professional'}, on_delete=django.db.models.deletion.CASCADE, related_name='external_calendars', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'calendario externo',
+                'verbose_name_plural': 'calendarios externos',
+                'ordering': ['professional', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExternalEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.CharField(max_length=255)),
+                ('recurrence_id', models.CharField(blank=True, max_length=20)),
+                ('sequence', models.PositiveIntegerField(default=0)),
+                ('content_hash', models.CharField(max_length=40)),
+                ('recurring', models.BooleanField(default=False)),
+                ('raw', models.TextField()),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='appointments.externalcalendar')),
+            ],
+            options={
+                'verbose_name': 'evento externo',
+                'verbose_name_plural': 'eventos externos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExternalBusyBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(verbose_name='hora de inicio')),
+                ('end_time', models.DateTimeField(verbose_name='hora de fin')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='appointments.externalevent')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='external_busy_blocks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'bloque ocupado externo',
+                'verbose_name_plural': 'bloques ocupados externos',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='externalevent',
+            constraint=models.UniqueConstraint(fields=('calendar', 'uid', 'recurrence_id'), name='external_event_uid_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='externalbusyblock',
+            index=models.Index(fields=['professional', 'start_time'], name='external_busy_prof_start_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('appointments', '0006_external_calendars'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarFeedToken',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calendar_feed_token', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'token de feed de calendario',
+                'verbose_name_plural': 'tokens de feed de calendario',
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:45
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('appointments', '0007_calendar_feed_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('specialty', models.CharField(blank=True, max_length=100, verbose_name='especialidad')),
+                ('date_from', models.DateField(verbose_name='desde el día')),
+                ('date_to', models.DateField(verbose_name='hasta el día')),
+                ('time_from', models.TimeField(default=datetime.time(0, 0), verbose_name='desde la hora')),
+                ('time_to', models.TimeField(default=datetime.time(23, 59, 59, 999999), verbose_name='hasta la hora')),
+                ('status', models.CharField(choices=[('waiting', 'En espera'), ('offered', 'Con oferta pendiente'), ('booked', 'Cita reservada'), ('expired', 'Vencida'), ('cancelled', 'Cancelada')], default='waiting', max_length=20, verbose_name='estado')),
+                ('notes', models.TextField(blank=True, verbose_name='notas')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('patient', models.ForeignKey(limit_choices_to={'role': 'patient'}, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+                ('professional', models.ForeignKey(blank=True, limit_choices_to={'role': 'professional'}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'entrada de lista de espera',
+                'verbose_name_plural': 'lista de espera',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WaitlistOffer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(verbose_name='hora de inicio')),
+                ('end_time', models.DateTimeField(verbose_name='hora de fin')),
+                ('expires_at', models.DateTimeField(verbose_name='vence')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('accepted', 'Aceptada'), ('declined', 'Rechazada'), ('expired', 'Vencida')], default='pending', max_length=20, verbose_name='estado')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('appointment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_offers', to='appointments.appointment')),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers', to='appointments.waitlistentry')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_offers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'oferta de lista de espera',
+                'verbose_name_plural': 'ofertas de lista de espera',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['professional', 'status', 'start_time'], name='waitlist_offer_hold_idx'), models.Index(fields=['status', 'expires_at'], name='waitlist_offer_expiry_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WaitlistDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(max_length=110)),
+                ('day', models.DateField()),
+                ('time_from', models.TimeField()),
+                ('time_to', models.TimeField()),
+                ('created_at', models.DateTimeField()),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='appointments.waitlistentry')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target', 'day', 'created_at'], name='waitlist_day_match_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='externalcalendar',
+            name='sync_requested_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='sincronización pedida'),
+        ),
+    ]
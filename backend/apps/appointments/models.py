@@ -3,6 +3,7 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from datetime import time
 
 
 class ProfessionalAvailability(models.Model):
@@ -62,6 +63,62 @@ class ProfessionalAvailability(models.Model):
                 ))
 
 
+class AvailabilityExceptionQuerySet(models.QuerySet):
+    def affecting(self, professional, start, end):
+        """Excepciones del profesional o de toda la clínica que se superponen con ``[start, end)``."""
+        return self.filter(
+            models.Q(professional=professional) | models.Q(professional__isnull=True),
+            start_time__lt=end,
+            end_time__gt=start,
+        )
+
+
+class AvailabilityException(models.Model):
+    """
+    Excepción al patrón semanal: vacaciones o tiempo bloqueado de un
+    profesional, o feriado de toda la clínica (sin profesional). Durante el
+    intervalo ``[start_time, end_time)`` no se ofrecen slots ni se aceptan citas.
+    """
+    KIND_CHOICES = (
+        ('vacation', _('Vacaciones')),
+        ('holiday', _('Feriado')),
+        ('blocked', _('Horario bloqueado')),
+    )
+
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='availability_exceptions',
+        limit_choices_to={'role': 'professional'},
+        null=True,
+        blank=True,
+        help_text=_('Vacío para un feriado de toda la clínica.'),
+    )
+    kind = models.CharField(_('tipo'), max_length=20, choices=KIND_CHOICES, default='blocked')
+    start_time = models.DateTimeField(_('desde'))
+    end_time = models.DateTimeField(_('hasta'))
+    reason = models.CharField(_('motivo'), max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AvailabilityExceptionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('excepción de disponibilidad')
+        verbose_name_plural = _('excepciones de disponibilidad')
+        ordering = ['start_time']
+        indexes = [
+            models.Index(fields=['professional', 'start_time'], name='avail_exception_prof_idx'),
+        ]
+
+    def __str__(self):
+        who = self.professional.get_full_name() if self.professional_id else 'Toda la clínica'
+        return f"{who} - {self.get_kind_display()} {self.start_time:%d/%m/%Y %H:%M} - {self.end_time:%d/%m/%Y %H:%M}"
+
+    def clean(self):
+        if self.start_time and self.end_time and self.start_time >= self.end_time:
+            raise ValidationError(_('La fecha de inicio debe ser anterior a la fecha de fin.'))
+
+
 class Appointment(models.Model):
     """
     Modelo para las citas médicas.
@@ -107,6 +164,9 @@ class Appointment(models.Model):
         verbose_name = _('cita')
         verbose_name_plural = _('citas')
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['start_time'], name='appointment_start_time_idx'),
+        ]
 
     def __str__(self):
         return f"Cita: {self.patient.get_full_name()} con {self.professional.get_full_name()} - {self.start_time.strftime('%d/%m/%Y %H:%M')}"
@@ -148,6 +208,20 @@ class Appointment(models.Model):
             
             if not availability.exists():
                 raise ValidationError(_('El profesional no está disponible en este horario.'))
+
+            # Verificar que no caiga en vacaciones, bloqueos o feriados
+            if AvailabilityException.objects.affecting(self.professional, self.start_time, self.end_time).exists():
+                raise ValidationError(_('El profesional no atiende en este horario.'))
+
+            # Verificar que no se superponga con calendarios externos del profesional
+            if ExternalBusyBlock.objects.filter(
+                professional=self.professional, start_time__lt=self.end_time, end_time__gt=self.start_time
+            ).exists():
+                raise ValidationError(_('El profesional tiene un compromiso externo en este horario.'))
+
+            # Verificar que el horario no esté retenido por una oferta de la lista de espera
+            if WaitlistOffer.objects.holding(self.professional, self.start_time, self.end_time).exists():
+                raise ValidationError(_('Este horario está reservado temporalmente para un paciente en lista de espera.'))
     
     @property
     def duration_minutes(self):
@@ -189,3 +263,337 @@ class AppointmentAttachment(models.Model):
         
     def __str__(self):
         return f"{self.title} - {self.appointment}"
+
+
+class ArchivedAppointment(models.Model):
+    """
+    Citas cerradas (completadas, canceladas o ausentes) de años anteriores,
+    movidas fuera de ``Appointment`` por ``archive_appointments`` para que la
+    tabla e índices activos contengan solo la agenda reciente. Conserva el ID
+    original de la cita. En PostgreSQL la tabla está particionada por rango
+    de ``start_time`` (ver ``archive.py``).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    patient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_patient_appointments'
+    )
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_professional_appointments'
+    )
+    start_time = models.DateTimeField(_('hora de inicio'))
+    end_time = models.DateTimeField(_('hora de fin'))
+    status = models.CharField(_('estado'), max_length=20, choices=Appointment.STATUS_CHOICES)
+    reason = models.TextField(_('motivo de la consulta'), blank=True)
+    notes = models.TextField(_('notas'), blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    payment_status = models.CharField(_('estado de pago'), max_length=20,
+                                      choices=Appointment._meta.get_field('payment_status').choices)
+    payment_amount = models.DecimalField(_('monto'), max_digits=10, decimal_places=2, null=True, blank=True)
+    reminder_sent = models.BooleanField(_('recordatorio enviado'), default=False)
+    archived_at = models.DateTimeField(_('archivada el'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('cita archivada')
+        verbose_name_plural = _('citas archivadas')
+        ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['patient', 'start_time'], name='archived_appt_patient_idx'),
+            models.Index(fields=['professional', 'start_time'], name='archived_appt_prof_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cita archivada #{self.id} - {self.start_time:%d/%m/%Y %H:%M}"
+
+
+class OpenSlot(models.Model):
+    """
+    Slot libre materializado de un profesional (ver ``slots.py``). Se mantiene
+    de forma incremental a partir de las disponibilidades y las citas, dentro
+    del horizonte cubierto por ``OpenSlotCoverage``.
+    """
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='open_slots',
+    )
+    start_time = models.DateTimeField(_('hora de inicio'))
+    end_time = models.DateTimeField(_('hora de fin'))
+
+    class Meta:
+        verbose_name = _('slot libre')
+        verbose_name_plural = _('slots libres')
+        ordering = ['start_time']
+        constraints = [
+            # También sirve de índice para la lectura por rango de cada profesional
+            models.UniqueConstraint(fields=['professional', 'start_time'], name='open_slot_professional_start_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['start_time'], name='open_slot_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"Slot libre {self.professional_id} - {self.start_time:%d/%m/%Y %H:%M}"
+
+
+class OpenSlotCoverage(models.Model):
+    """Días (locales, inclusive) cuyos slots libres están materializados para un profesional."""
+    professional = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='open_slot_coverage',
+    )
+    valid_from = models.DateField(_('desde'))
+    valid_until = models.DateField(_('hasta'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('cobertura de slots libres')
+        verbose_name_plural = _('coberturas de slots libres')
+
+    def __str__(self):
+        return f"Slots de {self.professional_id}: {self.valid_from} - {self.valid_until}"
+
+    def covers(self, date_from, date_to):
+        return self.valid_from <= date_from and date_to <= self.valid_until
+
+
+class ExternalCalendar(models.Model):
+    """
+    Calendario iCalendar externo de un profesional (otro consultorio, agenda
+    personal). Se sincroniza desde ``url`` o desde un archivo subido (``url``
+    vacía) y sus eventos ocupan la agenda como ``ExternalBusyBlock``.
+    """
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='external_calendars',
+        limit_choices_to={'role': 'professional'},
+    )
+    name = models.CharField(_('nombre'), max_length=100)
+    url = models.URLField(_('URL del calendario'), max_length=500, blank=True)
+    # Validadores HTTP de la última descarga (peticiones condicionales)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=40, blank=True)
+    expanded_until = models.DateField(_('expandido hasta'), null=True, blank=True)
+    last_synced_at = models.DateTimeField(_('última sincronización'), null=True, blank=True)
+    last_error = models.TextField(_('último error'), blank=True)
+    # Sincronización pedida desde la API, pendiente para sync_calendars --pending
+    sync_requested_at = models.DateTimeField(_('sincronización pedida'), null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('calendario externo')
+        verbose_name_plural = _('calendarios externos')
+        ordering = ['professional', 'name']
+
+    def __str__(self):
+        return f"{self.name} ({self.professional.get_full_name()})"
+
+
+class ExternalEvent(models.Model):
+    """
+    VEVENT importado de un calendario externo. ``uid``, ``recurrence_id``,
+    ``sequence`` y ``content_hash`` permiten reescribir solo los eventos que
+    cambiaron; ``raw`` guarda el componente para volver a expandirlo cuando
+    avanza el horizonte.
+    """
+    calendar = models.ForeignKey(ExternalCalendar, on_delete=models.CASCADE, related_name='events')
+    uid = models.CharField(max_length=255)
+    recurrence_id = models.CharField(max_length=20, blank=True)
+    sequence = models.PositiveIntegerField(default=0)
+    content_hash = models.CharField(max_length=40)
+    recurring = models.BooleanField(default=False)
+    raw = models.TextField()
+
+    class Meta:
+        verbose_name = _('evento externo')
+        verbose_name_plural = _('eventos externos')
+        constraints = [
+            models.UniqueConstraint(fields=['calendar', 'uid', 'recurrence_id'], name='external_event_uid_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.uid} {self.recurrence_id}".strip()
+
+
+class ExternalBusyBlock(models.Model):
+    """Intervalo ocupado por un evento externo, expandido dentro del horizonte de slots."""
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='external_busy_blocks',
+    )
+    event = models.ForeignKey(ExternalEvent, on_delete=models.CASCADE, related_name='blocks')
+    start_time = models.DateTimeField(_('hora de inicio'))
+    end_time = models.DateTimeField(_('hora de fin'))
+
+    class Meta:
+        verbose_name = _('bloque ocupado externo')
+        verbose_name_plural = _('bloques ocupados externos')
+        indexes = [
+            models.Index(fields=['professional', 'start_time'], name='external_busy_prof_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ocupado {self.professional_id} - {self.start_time:%d/%m/%Y %H:%M}"
+
+
+class CalendarFeedToken(models.Model):
+    """Token secreto de la URL del feed .ics de las citas de un usuario (ver ``feeds.py``)."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='calendar_feed_token',
+    )
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('token de feed de calendario')
+        verbose_name_plural = _('tokens de feed de calendario')
+
+    def __str__(self):
+        return f"Feed de {self.user_id}"
+
+
+class WaitlistEntry(models.Model):
+    """
+    Paciente en lista de espera para un profesional o para cualquier
+    profesional de una especialidad, dentro de un rango de días y de un
+    horario diario aceptable. Mientras espera, sus días quedan indexados en
+    ``WaitlistDay`` (ver ``waitlist.py``).
+    """
+    STATUS_CHOICES = (
+        ('waiting', _('En espera')),
+        ('offered', _('Con oferta pendiente')),
+        ('booked', _('Cita reservada')),
+        ('expired', _('Vencida')),
+        ('cancelled', _('Cancelada')),
+    )
+
+    patient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        limit_choices_to={'role': 'patient'},
+    )
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_requests',
+        limit_choices_to={'role': 'professional'},
+        null=True,
+        blank=True,
+    )
+    specialty = models.CharField(_('especialidad'), max_length=100, blank=True)
+    date_from = models.DateField(_('desde el día'))
+    date_to = models.DateField(_('hasta el día'))
+    time_from = models.TimeField(_('desde la hora'), default=time.min)
+    time_to = models.TimeField(_('hasta la hora'), default=time.max)
+    status = models.CharField(_('estado'), max_length=20, choices=STATUS_CHOICES, default='waiting')
+    notes = models.TextField(_('notas'), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('entrada de lista de espera')
+        verbose_name_plural = _('lista de espera')
+        ordering = ['created_at']
+
+    def __str__(self):
+        target = self.professional.get_full_name() if self.professional_id else self.specialty
+        return f"{self.patient.get_full_name()} - {target} ({self.date_from:%d/%m/%Y} - {self.date_to:%d/%m/%Y})"
+
+    @property
+    def target_key(self):
+        """Clave por la que se busca la entrada: el profesional o la especialidad."""
+        return f'p:{self.professional_id}' if self.professional_id else f's:{self.specialty.lower()}'
+
+
+class WaitlistDay(models.Model):
+    """
+    Un día de una entrada en espera. Índice del emparejamiento: al liberarse
+    un horario se buscan por igualdad ``(target, day)`` solo las entradas que
+    aceptan ese día, sin recorrer la lista de espera completa.
+    """
+    entry = models.ForeignKey(WaitlistEntry, on_delete=models.CASCADE, related_name='days')
+    target = models.CharField(max_length=110)
+    day = models.DateField()
+    time_from = models.TimeField()
+    time_to = models.TimeField()
+    # Copia de la antigüedad de la entrada: el índice ya devuelve el orden de llegada
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['target', 'day', 'created_at'], name='waitlist_day_match_idx'),
+        ]
+
+
+class WaitlistOfferQuerySet(models.QuerySet):
+    def active(self):
+        """Ofertas pendientes y vigentes: retienen su horario aunque aún no se hayan vencido."""
+        return self.filter(status='pending', expires_at__gt=timezone.now())
+
+    def holding(self, professional, start, end):
+        """Ofertas pendientes y vigentes que retienen parte de ``[start, end)`` del profesional."""
+        return self.active().filter(
+            professional=professional,
+            start_time__lt=end,
+            end_time__gt=start,
+        )
+
+
+class WaitlistOffer(models.Model):
+    """
+    Horario liberado ofrecido a una entrada de la lista de espera. Mientras
+    está pendiente y no venció, el horario queda retenido para el paciente.
+    """
+    STATUS_CHOICES = (
+        ('pending', _('Pendiente')),
+        ('accepted', _('Aceptada')),
+        ('declined', _('Rechazada')),
+        ('expired', _('Vencida')),
+    )
+
+    entry = models.ForeignKey(WaitlistEntry, on_delete=models.CASCADE, related_name='offers')
+    professional = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_offers',
+    )
+    start_time = models.DateTimeField(_('hora de inicio'))
+    end_time = models.DateTimeField(_('hora de fin'))
+    expires_at = models.DateTimeField(_('vence'))
+    status = models.CharField(_('estado'), max_length=20, choices=STATUS_CHOICES, default='pending')
+    appointment = models.ForeignKey(
+        Appointment, on_delete=models.SET_NULL, related_name='waitlist_offers', null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = WaitlistOfferQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('oferta de lista de espera')
+        verbose_name_plural = _('ofertas de lista de espera')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['professional', 'status', 'start_time'], name='waitlist_offer_hold_idx'),
+            models.Index(fields=['status', 'expires_at'], name='waitlist_offer_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"Oferta {self.entry_id} - {self.start_time:%d/%m/%Y %H:%M} ({self.get_status_display()})"
+
+    @property
+    def is_active(self):
+        return self.status == 'pending' and self.expires_at > timezone.now()
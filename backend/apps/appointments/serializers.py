@@ -1,9 +1,15 @@
 from rest_framework import serializers
 from django.utils import timezone
 from django.db.models import Q
+from django.conf import settings
 from datetime import datetime, timedelta
 
-from .models import ProfessionalAvailability, Appointment, AppointmentAttachment
+from .models import (
+    ProfessionalAvailability, AvailabilityException, Appointment, AppointmentAttachment, ExternalBusyBlock,
+    ExternalCalendar, WaitlistEntry, WaitlistOffer,
+)
+from .calendar_sync import CalendarSyncError, validate_calendar_url
+from .slots import EXTERNAL_BUSY_MESSAGE, WAITLIST_HOLD_MESSAGE, exception_message
 from apps.users.serializers import UserSerializer
 
 
@@ -17,6 +23,101 @@ class ProfessionalAvailabilitySerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
         
 
+class AvailabilityExceptionSerializer(serializers.ModelSerializer):
+    """Serializer para el modelo AvailabilityException."""
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    
+    class Meta:
+        model = AvailabilityException
+        fields = ('id', 'professional', 'kind', 'kind_display', 'start_time', 'end_time', 'reason', 'created_at')
+        read_only_fields = ('id', 'created_at')
+    
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError({"start_time": "La fecha de inicio debe ser anterior a la fecha de fin."})
+        
+        professional = attrs.get('professional')
+        if professional and not professional.is_professional:
+            raise serializers.ValidationError({"professional": "El usuario seleccionado no es un profesional."})
+        
+        return attrs
+
+
+class ExternalCalendarSerializer(serializers.ModelSerializer):
+    """Serializer para el modelo ExternalCalendar."""
+    
+    class Meta:
+        model = ExternalCalendar
+        fields = ('id', 'professional', 'name', 'url', 'expanded_until', 'last_synced_at', 'last_error',
+                  'sync_requested_at', 'created_at')
+        read_only_fields = ('id', 'expanded_until', 'last_synced_at', 'last_error', 'sync_requested_at', 'created_at')
+    
+    def validate_professional(self, value):
+        if not value.is_professional:
+            raise serializers.ValidationError("El usuario seleccionado no es un profesional.")
+        return value
+    
+    def validate_url(self, value):
+        if value:
+            try:
+                validate_calendar_url(value)
+            except CalendarSyncError as exc:
+                raise serializers.ValidationError(str(exc))
+        return value
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """Serializer para el modelo WaitlistEntry."""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = ('id', 'patient', 'professional', 'specialty', 'date_from', 'date_to', 'time_from', 'time_to',
+                  'status', 'status_display', 'notes', 'created_at')
+        read_only_fields = ('id', 'status', 'created_at')
+        # Los pacientes se anotan a sí mismos (ver WaitlistEntryViewSet.perform_create)
+        extra_kwargs = {'patient': {'required': False}}
+    
+    def validate(self, attrs):
+        professional = attrs.get('professional')
+        specialty = attrs.get('specialty', '').strip()
+        date_from, date_to = attrs['date_from'], attrs['date_to']
+        time_from = attrs.get('time_from', WaitlistEntry._meta.get_field('time_from').default)
+        time_to = attrs.get('time_to', WaitlistEntry._meta.get_field('time_to').default)
+        
+        if professional is None and not specialty:
+            raise serializers.ValidationError({"professional": "Indique un profesional o una especialidad."})
+        if professional is not None and not professional.is_professional:
+            raise serializers.ValidationError({"professional": "El usuario seleccionado no es un profesional."})
+        if date_from > date_to:
+            raise serializers.ValidationError({"date_from": "La fecha de inicio debe ser anterior a la fecha de fin."})
+        if date_to < timezone.localdate():
+            raise serializers.ValidationError({"date_to": "El rango de días debe incluir días futuros."})
+        if (date_to - date_from).days >= settings.WAITLIST_MAX_DAYS:
+            raise serializers.ValidationError({
+                "date_to": f"El rango no puede superar {settings.WAITLIST_MAX_DAYS} días."
+            })
+        if time_from >= time_to:
+            raise serializers.ValidationError({"time_from": "La hora de inicio debe ser anterior a la hora de fin."})
+        
+        attrs['specialty'] = specialty
+        return attrs
+
+
+class WaitlistOfferSerializer(serializers.ModelSerializer):
+    """Serializer para el modelo WaitlistOffer."""
+    professional_name = serializers.CharField(source='professional.get_full_name', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = WaitlistOffer
+        fields = ('id', 'entry', 'professional', 'professional_name', 'start_time', 'end_time', 'expires_at',
+                  'status', 'status_display', 'appointment', 'created_at')
+        read_only_fields = fields
+
+
 class AppointmentAttachmentSerializer(serializers.ModelSerializer):
     """Serializer para el modelo AppointmentAttachment."""
     uploaded_by_name = serializers.CharField(source='uploaded_by.get_full_name', read_only=True)
@@ -118,6 +219,24 @@ class AppointmentCreateSerializer(AppointmentSerializer):
                 raise serializers.ValidationError({
                     "start_time": "El profesional no está disponible en este horario."
                 })
+
+            # Verificar que no caiga en vacaciones, bloqueos o feriados
+            exception = AvailabilityException.objects.affecting(
+                professional, start_time, end_time
+            ).values_list('kind', 'reason').first()
+
+            if exception:
+                raise serializers.ValidationError({"start_time": exception_message(*exception)})
+
+            # Verificar que no se superponga con calendarios externos del profesional
+            if ExternalBusyBlock.objects.filter(
+                professional=professional, start_time__lt=end_time, end_time__gt=start_time
+            ).exists():
+                raise serializers.ValidationError({"start_time": EXTERNAL_BUSY_MESSAGE})
+
+            # Verificar que el horario no esté retenido por una oferta de la lista de espera
+            if WaitlistOffer.objects.holding(professional, start_time, end_time).exists():
+                raise serializers.ValidationError({"start_time": WAITLIST_HOLD_MESSAGE})
                 
         return attrs
 
@@ -133,6 +252,39 @@ class AvailableSlotSerializer(serializers.Serializer):
     professional_name = serializers.CharField()
 
 
+class AvailableSlotTimesSerializer(serializers.Serializer):
+    """Inicio y fin de un horario (slots alternativos o cita en conflicto)."""
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+
+class PatientHistorySerializer(serializers.Serializer):
+    """
+    Serializer para el historial de un paciente. Recibe los diccionarios de
+    ``archive.patient_history``, que pueden venir de citas activas o archivadas.
+    """
+    id = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    status = serializers.CharField()
+    status_display = serializers.SerializerMethodField()
+    reason = serializers.CharField()
+    notes = serializers.CharField()
+    payment_status = serializers.CharField()
+    payment_amount = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    professional_id = serializers.IntegerField()
+    professional_name = serializers.SerializerMethodField()
+    archived = serializers.BooleanField()
+
+    _status_labels = dict(Appointment.STATUS_CHOICES)
+
+    def get_status_display(self, obj):
+        return str(self._status_labels.get(obj['status'], obj['status']))
+
+    def get_professional_name(self, obj):
+        return f"{obj['professional__first_name']} {obj['professional__last_name']}"
+
+
 class AppointmentStatisticsSerializer(serializers.Serializer):
     """
     Serializer para estadísticas de citas.
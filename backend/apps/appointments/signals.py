@@ -1,11 +1,46 @@
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver, Signal
+from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
+from django.db import transaction
 from django.utils import timezone
+from datetime import timedelta
 
-from .models import Appointment
+from .dashboard import invalidate_dashboard
+from .feeds import invalidate_all_feeds, invalidate_feeds
+from .models import (
+    Appointment, AvailabilityException, ExternalBusyBlock, ExternalCalendar, ProfessionalAvailability,
+    WaitlistEntry, WaitlistOffer,
+)
+from . import slots, waitlist
+
+# Se envía cuando se crean o modifican citas en bloque (bulk_create, update,
+# importaciones) sin pasar por save(). Argumento ``months``: conjunto de
+# fechas (primer día del mes, hora local) afectadas, o None si son todas.
+appointments_bulk_changed = Signal()
+
+# Valores previos de la cita que usan los receptores de post_save de todas las
+# apps: slots libres, feeds .ics y lista de espera (aquí), resumen de ingresos
+# (analytics) y notificaciones. Se leen en una sola consulta por guardado.
+PREVIOUS_FIELDS = ('professional_id', 'start_time', 'end_time', 'status', 'payment_status', 'payment_amount')
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_previous_values(sender, instance, raw=False, **kwargs):
+    instance._previous_values = None
+    if raw or not instance.pk:
+        return
+    instance._previous_values = Appointment.objects.filter(pk=instance.pk).values(*PREVIOUS_FIELDS).first()
+
+
+def previous_values(instance, fields):
+    """Valores de ``fields`` antes del guardado en curso, o None si la cita es nueva."""
+    previous = getattr(instance, '_previous_values', None)
+    if previous is None:
+        return None
+    return tuple(previous[field] for field in fields)
 
 
 @receiver(post_save, sender=Appointment)
@@ -107,3 +142,192 @@ def setup_appointment_tracking(sender, instance, **kwargs):
     if not hasattr(instance, 'tracker'):
         from model_utils.tracker import FieldTracker
         instance.tracker = FieldTracker(fields=['status'])
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_dashboards(sender, instance, **kwargs):
+    """Invalida el dashboard cacheado del paciente y del profesional de la cita."""
+    invalidate_dashboard(instance.patient_id, instance.professional_id)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_calendar_feeds(sender, instance, **kwargs):
+    """Invalida la versión del feed .ics del paciente y del profesional (también del anterior si cambió)."""
+    previous = previous_values(instance, ('professional_id',))
+    invalidate_feeds(instance.patient_id, instance.professional_id, previous[0] if previous else None)
+
+
+# ======= SLOTS LIBRES MATERIALIZADOS =======
+
+SLOT_FIELDS = ('professional_id', 'start_time', 'end_time', 'status')
+
+
+@receiver(post_save, sender=Appointment)
+def update_open_slots(sender, instance, raw=False, **kwargs):
+    """Regenera los días que ocupa la cita y también los que liberó si cambió de horario o estado."""
+    if raw:
+        return
+    current = tuple(getattr(instance, field) for field in SLOT_FIELDS)
+    previous = previous_values(instance, SLOT_FIELDS)
+    previous_blocks = previous is not None and previous[3] in slots.BLOCKING_STATUSES
+    current_blocks = current[3] in slots.BLOCKING_STATUSES
+    if previous_blocks and current_blocks and previous[:3] == current[:3]:
+        return
+    if previous_blocks:
+        slots.refresh_interval(*previous[:3])
+    if current_blocks:
+        slots.refresh_interval(*current[:3])
+
+
+def _deleting_professional(kwargs, professional_id):
+    # Al borrar al profesional, sus slots y su cobertura se eliminan en cascada;
+    # al borrar a un paciente, sus citas sí liberan horarios
+    origin = kwargs.get('origin')
+    return isinstance(origin, get_user_model()) and origin.pk == professional_id
+
+
+@receiver(post_delete, sender=Appointment)
+def release_open_slots(sender, instance, **kwargs):
+    if instance.status in slots.BLOCKING_STATUSES and not _deleting_professional(kwargs, instance.professional_id):
+        slots.refresh_interval(instance.professional_id, instance.start_time, instance.end_time)
+
+
+@receiver(post_save, sender=ProfessionalAvailability)
+@receiver(post_delete, sender=ProfessionalAvailability)
+def refresh_professional_slots(sender, instance, raw=False, **kwargs):
+    """Un cambio del patrón semanal afecta a todo el horizonte del profesional."""
+    if raw or _deleting_professional(kwargs, instance.professional_id):
+        return
+    slots.invalidate_weekly_windows(instance.professional_id)
+    slots.refresh_professional(instance.professional_id)
+
+
+EXCEPTION_FIELDS = ('professional_id', 'start_time', 'end_time')
+
+
+@receiver(pre_save, sender=AvailabilityException)
+def remember_exception_values(sender, instance, raw=False, **kwargs):
+    """Guarda profesional e intervalo previos para regenerar también los días que la excepción liberó."""
+    instance._slots_previous = None
+    if raw or not instance.pk:
+        return
+    instance._slots_previous = AvailabilityException.objects.filter(pk=instance.pk).values_list(
+        *EXCEPTION_FIELDS
+    ).first()
+
+
+def _refresh_exception(professional_id, start, end):
+    slots.invalidate_exceptions(professional_id)
+    if professional_id is None:
+        slots.refresh_clinic_interval(start, end)
+    else:
+        slots.refresh_interval(professional_id, start, end)
+
+
+@receiver(post_save, sender=AvailabilityException)
+def refresh_exception_slots(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = tuple(getattr(instance, field) for field in EXCEPTION_FIELDS)
+    previous = getattr(instance, '_slots_previous', None)
+    if previous is not None and previous != current:
+        _refresh_exception(*previous)
+    _refresh_exception(*current)
+
+
+@receiver(post_delete, sender=AvailabilityException)
+def release_exception_slots(sender, instance, **kwargs):
+    if not _deleting_professional(kwargs, instance.professional_id):
+        _refresh_exception(instance.professional_id, instance.start_time, instance.end_time)
+
+
+@receiver(pre_save, sender=ExternalCalendar)
+def remember_calendar_professional(sender, instance, raw=False, **kwargs):
+    instance._slots_previous = None
+    if raw or not instance.pk:
+        return
+    instance._slots_previous = ExternalCalendar.objects.filter(pk=instance.pk).values_list(
+        'professional_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=ExternalCalendar)
+def move_calendar_blocks(sender, instance, raw=False, **kwargs):
+    """Si el calendario cambia de profesional, sus bloques ocupados pasan al nuevo."""
+    previous = getattr(instance, '_slots_previous', None)
+    if raw or previous is None or previous == instance.professional_id:
+        return
+    ExternalBusyBlock.objects.filter(event__calendar=instance).update(professional_id=instance.professional_id)
+    slots.refresh_professional(previous)
+    slots.refresh_professional(instance.professional_id)
+
+
+@receiver(post_delete, sender=ExternalCalendar)
+def release_calendar_slots(sender, instance, **kwargs):
+    """Los bloques se eliminan en cascada con el calendario: se libera su horizonte."""
+    if not _deleting_professional(kwargs, instance.professional_id):
+        slots.refresh_professional(instance.professional_id)
+
+
+# ======= LISTA DE ESPERA =======
+
+@receiver(post_save, sender=Appointment)
+def offer_cancelled_slot(sender, instance, raw=False, **kwargs):
+    """Una cita cancelada que ocupaba la agenda se ofrece a la lista de espera al confirmar la transacción."""
+    previous = previous_values(instance, SLOT_FIELDS)
+    if raw or previous is None or previous[3] not in slots.BLOCKING_STATUSES or instance.status != 'cancelled':
+        return
+    professional_id, start, end = previous[:3]
+    transaction.on_commit(
+        lambda: waitlist.offer_freed_slot(professional_id, start, end, exclude_patient_id=instance.patient_id)
+    )
+
+
+@receiver(post_save, sender=WaitlistEntry)
+def index_waitlist_entry(sender, instance, raw=False, **kwargs):
+    if not raw:
+        waitlist.index_entry(instance)
+
+
+@receiver(pre_save, sender=WaitlistOffer)
+def remember_offer_status(sender, instance, raw=False, **kwargs):
+    instance._slots_previous = None
+    if raw or not instance.pk:
+        return
+    instance._slots_previous = WaitlistOffer.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=WaitlistOffer)
+def refresh_offer_slots(sender, instance, created, raw=False, **kwargs):
+    """Una oferta pendiente retiene su horario: se regenera al crearla y al cerrarla."""
+    if raw:
+        return
+    was_pending = not created and getattr(instance, '_slots_previous', None) == 'pending'
+    if was_pending != (instance.status == 'pending'):
+        slots.refresh_interval(instance.professional_id, instance.start_time, instance.end_time)
+
+
+@receiver(post_delete, sender=WaitlistOffer)
+def release_offer_slots(sender, instance, **kwargs):
+    if instance.status == 'pending' and not _deleting_professional(kwargs, instance.professional_id):
+        slots.refresh_interval(instance.professional_id, instance.start_time, instance.end_time)
+
+
+@receiver(appointments_bulk_changed)
+def refresh_bulk_open_slots(sender, months=None, **kwargs):
+    """Regenera el horizonte si los cambios en bloque tocan alguno de sus meses."""
+    today = timezone.localdate()
+    horizon_end = today + timedelta(days=settings.OPEN_SLOTS_HORIZON_DAYS)
+    if months is not None and not any(
+        month <= horizon_end and (month.replace(day=28) + timedelta(days=4)).replace(day=1) > today
+        for month in months
+    ):
+        return
+    slots.rebuild_open_slots()
+
+
+@receiver(appointments_bulk_changed)
+def invalidate_bulk_calendar_feeds(sender, months=None, **kwargs):
+    invalidate_all_feeds()
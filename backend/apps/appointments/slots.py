@@ -0,0 +1,655 @@
+"""
+Slots libres de los profesionales.
+
+``compute_open_slots`` genera los slots de 30 minutos a partir del patrón
+semanal de ``ProfessionalAvailability``, restando las excepciones
+(``AvailabilityException``: vacaciones, bloqueos y feriados de la clínica) y
+descontando las citas programadas o confirmadas, los horarios ocupados en
+calendarios externos (``ExternalBusyBlock``) y los retenidos por ofertas de la
+lista de espera (``WaitlistOffer``); es la fuente de verdad.
+Para no recalcularlos en cada búsqueda se materializan en ``OpenSlot``
+durante un horizonte móvil (``OPEN_SLOTS_HORIZON_DAYS`` días desde hoy),
+registrado por profesional en ``OpenSlotCoverage``:
+
+- al crear, mover, cancelar o eliminar una cita se regeneran solo los días
+  que tocaba antes y después del cambio;
+- al cambiar una disponibilidad se regenera el horizonte del profesional;
+- al cambiar una excepción se regeneran los días que toca, para su
+  profesional o para todos si es de la clínica;
+- al sincronizar un calendario externo se regeneran los días de los
+  bloques que cambiaron (``calendar_sync.py``);
+- al crear o cerrar una oferta de la lista de espera se regenera el día
+  del horario retenido (``waitlist.py``);
+- ``roll_open_slots`` (nocturno) descarta los días pasados y extiende el
+  horizonte;
+- ``check_open_slots`` compara el almacén con la fuente de verdad.
+
+Una búsqueda dentro del horizonte es una única lectura por rango sobre el
+índice (profesional, inicio); fuera de él se calcula en el momento.
+
+``next_available_slots`` busca los primeros slots libres entre varios
+profesionales mezclando con un heap un flujo perezoso por profesional, y
+``check_availability`` valida un horario puntual con las mismas reglas que la
+creación de citas.
+"""
+
+import heapq
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Appointment, AvailabilityException, ExternalBusyBlock, OpenSlot, OpenSlotCoverage, ProfessionalAvailability,
+    WaitlistOffer,
+)
+
+SLOT_DURATION = timedelta(minutes=30)
+# Estados que ocupan un slot en la agenda
+BLOCKING_STATUSES = ('scheduled', 'confirmed')
+COVERAGE_CACHE_PREFIX = 'open_slots:coverage:'
+WINDOWS_CACHE_PREFIX = 'open_slots:windows:'
+EXCEPTIONS_CACHE_PREFIX = 'open_slots:exceptions:'
+EXCEPTIONS_VERSION_KEY = 'open_slots:exceptions:version'
+CHECK_ALTERNATIVES = 3
+EXTERNAL_BUSY_MESSAGE = 'El profesional tiene un compromiso externo en este horario.'
+WAITLIST_HOLD_MESSAGE = 'Este horario está reservado temporalmente para un paciente en lista de espera.'
+CHECK_ALTERNATIVES_DAYS = 14
+
+
+def day_start(day):
+    """Inicio (aware) del día local ``day``."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def local_days(start, end):
+    """Días locales que toca el intervalo ``[start, end)``."""
+    first = timezone.localtime(start).date()
+    last = timezone.localtime(end - timedelta(microseconds=1)).date() if end > start else first
+    return first, last
+
+
+def load_weekly_windows(professional_ids):
+    """``{professional_id: [ventanas del lunes, ..., domingo]}`` con ventanas ``(inicio, fin)`` como ``time``."""
+    windows = defaultdict(lambda: [[] for _ in range(7)])
+    for professional_id, day, start, end in ProfessionalAvailability.objects.filter(
+        professional_id__in=professional_ids, is_available=True
+    ).values_list('professional_id', 'day_of_week', 'start_time', 'end_time'):
+        windows[professional_id][day].append((start, end))
+    for days in windows.values():
+        for day_windows in days:
+            day_windows.sort()
+    return windows
+
+
+def cached_weekly_windows(professional_id):
+    """Patrón semanal de un profesional desde la caché (se invalida al cambiar sus disponibilidades)."""
+    key = f'{WINDOWS_CACHE_PREFIX}{professional_id}'
+    windows = cache.get(key)
+    if windows is None:
+        windows = load_weekly_windows([professional_id])[professional_id]
+        cache.set(key, windows, timeout=None)
+    return windows
+
+
+def invalidate_weekly_windows(professional_id):
+    transaction.on_commit(lambda: cache.delete(f'{WINDOWS_CACHE_PREFIX}{professional_id}'))
+
+
+def _exceptions_key(professional_id):
+    # Los feriados de la clínica cambian la versión y con ella todas las claves
+    return f'{EXCEPTIONS_CACHE_PREFIX}{cache.get(EXCEPTIONS_VERSION_KEY, 0)}:{professional_id}'
+
+
+def cached_exceptions(professional_id):
+    """
+    Excepciones vigentes ``[(inicio, fin, tipo, motivo)]`` que afectan al
+    profesional (propias y de toda la clínica), desde la caché.
+    """
+    key = _exceptions_key(professional_id)
+    exceptions = cache.get(key)
+    if exceptions is None:
+        exceptions = list(AvailabilityException.objects.filter(
+            Q(professional_id=professional_id) | Q(professional__isnull=True),
+            end_time__gt=timezone.now(),
+        ).order_by('start_time').values_list('start_time', 'end_time', 'kind', 'reason'))
+        cache.set(key, exceptions, timeout=None)
+    return exceptions
+
+
+def invalidate_exceptions(professional_id):
+    """Invalida las excepciones cacheadas del profesional, o las de todos si es un feriado de la clínica."""
+    def invalidate():
+        if professional_id is not None:
+            cache.delete(_exceptions_key(professional_id))
+            return
+        try:
+            cache.incr(EXCEPTIONS_VERSION_KEY)
+        except ValueError:
+            cache.set(EXCEPTIONS_VERSION_KEY, 1, timeout=None)
+    transaction.on_commit(invalidate)
+
+
+def _merge(intervals):
+    """Une intervalos ``(inicio, fin)`` superpuestos o contiguos en una lista ordenada ``[[inicio, fin]]``."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def load_busy_intervals(professional_ids, date_from, date_to):
+    """
+    Intervalos ocupados (unidos y ordenados) de cada profesional entre dos
+    días locales: citas que ocupan la agenda, bloques de calendarios externos
+    y horarios retenidos por ofertas pendientes de la lista de espera.
+    """
+    raw = defaultdict(list)
+    for professional_id, start, end in Appointment.objects.filter(
+        professional_id__in=professional_ids,
+        status__in=BLOCKING_STATUSES,
+        start_time__lt=day_start(date_to + timedelta(days=1)),
+        end_time__gt=day_start(date_from),
+    ).values_list('professional_id', 'start_time', 'end_time'):
+        raw[professional_id].append((start, end))
+    # Horarios ocupados en calendarios externos importados
+    for professional_id, start, end in ExternalBusyBlock.objects.filter(
+        professional_id__in=professional_ids,
+        start_time__lt=day_start(date_to + timedelta(days=1)),
+        end_time__gt=day_start(date_from),
+    ).values_list('professional_id', 'start_time', 'end_time'):
+        raw[professional_id].append((start, end))
+    # Retenciones vigentes de la lista de espera: las vencidas liberan el horario
+    # aunque ``expire_waitlist_offers`` todavía no haya cambiado su estado
+    for professional_id, start, end in WaitlistOffer.objects.active().filter(
+        professional_id__in=professional_ids,
+        start_time__lt=day_start(date_to + timedelta(days=1)),
+        end_time__gt=day_start(date_from),
+    ).values_list('professional_id', 'start_time', 'end_time'):
+        raw[professional_id].append((start, end))
+    return {professional_id: _merge(intervals) for professional_id, intervals in raw.items()}
+
+
+def load_exceptions(professional_ids, date_from, date_to):
+    """
+    Intervalos bloqueados por ``AvailabilityException`` (unidos y ordenados)
+    de cada profesional entre dos días locales, en una única consulta: los
+    propios más los feriados de toda la clínica.
+    """
+    professional_ids = list(professional_ids)
+    own, clinic_wide = defaultdict(list), []
+    for professional_id, start, end in AvailabilityException.objects.filter(
+        Q(professional_id__in=professional_ids) | Q(professional__isnull=True),
+        start_time__lt=day_start(date_to + timedelta(days=1)),
+        end_time__gt=day_start(date_from),
+    ).values_list('professional_id', 'start_time', 'end_time'):
+        (clinic_wide if professional_id is None else own[professional_id]).append((start, end))
+    if not clinic_wide:
+        return {professional_id: _merge(intervals) for professional_id, intervals in own.items()}
+    return {
+        professional_id: _merge(own.get(professional_id, []) + clinic_wide)
+        for professional_id in professional_ids
+    }
+
+
+def subtract_intervals(windows, blocked):
+    """
+    Resta de las ventanas ``[(inicio, fin)]`` (ordenadas) los intervalos
+    ``blocked`` (unidos y ordenados) y devuelve los tramos que quedan libres.
+    """
+    blocked_ends = [end for _, end in blocked]
+    pieces = []
+    for start, end in windows:
+        index = bisect_right(blocked_ends, start)
+        while start < end and index < len(blocked) and blocked[index][0] < end:
+            if blocked[index][0] > start:
+                pieces.append((start, blocked[index][0]))
+            start = max(start, blocked[index][1])
+            index += 1
+        if start < end:
+            pieces.append((start, end))
+    return pieces
+
+
+def generate_slots(weekly_windows, busy, date_from, date_to, blocked=()):
+    """
+    Slots libres ``(inicio, fin)`` ordenados entre ``date_from`` y ``date_to``
+    (inclusive). A las ventanas de cada día se les restan primero las
+    excepciones ``blocked``; cada tramo resultante se divide en slots desde su
+    inicio, como en la vista original, y un slot se descarta si se superpone
+    con un intervalo ocupado (búsqueda binaria sobre los fines de ``busy``).
+    """
+    busy_ends = [end for _, end in busy]
+    slots = {}
+    day = date_from
+    while day <= date_to:
+        windows = [
+            (timezone.make_aware(datetime.combine(day, window_start)),
+             timezone.make_aware(datetime.combine(day, window_end)))
+            for window_start, window_end in weekly_windows[day.weekday()]
+        ]
+        if blocked:
+            windows = subtract_intervals(windows, blocked)
+        for slot_start, window_close in windows:
+            while slot_start + SLOT_DURATION <= window_close:
+                slot_end = slot_start + SLOT_DURATION
+                index = bisect_right(busy_ends, slot_start)
+                if index == len(busy) or busy[index][0] >= slot_end:
+                    slots[slot_start] = slot_end
+                slot_start = slot_end
+        day += timedelta(days=1)
+    return sorted(slots.items())
+
+
+def compute_open_slots(professional_ids, date_from, date_to):
+    """Fuente de verdad: ``{professional_id: [(inicio, fin), ...]}`` con cuatro consultas en total."""
+    professional_ids = list(professional_ids)
+    windows = load_weekly_windows(professional_ids)
+    busy = load_busy_intervals(professional_ids, date_from, date_to)
+    blocked = load_exceptions(professional_ids, date_from, date_to)
+    return {
+        professional_id: generate_slots(
+            windows[professional_id], busy.get(professional_id, []), date_from, date_to,
+            blocked.get(professional_id, ()),
+        ) if professional_id in windows else []
+        for professional_id in professional_ids
+    }
+
+
+# ======= ALMACÉN MATERIALIZADO =======
+
+def _horizon(today=None):
+    today = today or timezone.localdate()
+    return today, today + timedelta(days=settings.OPEN_SLOTS_HORIZON_DAYS)
+
+
+def get_coverage(professional_id):
+    """``(valid_from, valid_until)`` materializado del profesional, o None (cacheado)."""
+    key = f'{COVERAGE_CACHE_PREFIX}{professional_id}'
+    coverage = cache.get(key)
+    if coverage is None:
+        coverage = _coverage_row(professional_id) or ()
+        cache.set(key, coverage, timeout=None)
+    return coverage or None
+
+
+def _set_coverage(professional_id, valid_from, valid_until):
+    OpenSlotCoverage.objects.update_or_create(
+        professional_id=professional_id, defaults={'valid_from': valid_from, 'valid_until': valid_until}
+    )
+    # Tras el commit, para que ninguna lectura vea la cobertura nueva antes que los slots
+    transaction.on_commit(lambda: cache.delete(f'{COVERAGE_CACHE_PREFIX}{professional_id}'))
+
+
+def _replace_slots(slots_by_professional, date_from, date_to):
+    """Reemplaza los slots materializados de los profesionales en el rango de días."""
+    if not slots_by_professional:
+        return
+    OpenSlot.objects.filter(
+        professional_id__in=list(slots_by_professional),
+        start_time__gte=day_start(date_from),
+        start_time__lt=day_start(date_to + timedelta(days=1)),
+    ).delete()
+    OpenSlot.objects.bulk_create(
+        [
+            OpenSlot(professional_id=professional_id, start_time=start, end_time=end)
+            for professional_id, slots in slots_by_professional.items()
+            for start, end in slots
+        ],
+        batch_size=1000,
+    )
+
+
+def open_slots(professional_id, date_from, date_to):
+    """
+    Slots libres materializados ``[(inicio, fin, nombre, apellido)]`` del
+    rango (nombre y apellido del profesional, en la misma consulta), o None
+    si el rango no está dentro del horizonte materializado.
+    """
+    coverage = get_coverage(professional_id)
+    if coverage is None or not (coverage[0] <= date_from and date_to <= coverage[1]):
+        return None
+    return list(
+        OpenSlot.objects.filter(
+            professional_id=professional_id,
+            start_time__gte=day_start(date_from),
+            start_time__lt=day_start(date_to + timedelta(days=1)),
+        ).order_by('start_time').values_list(
+            'start_time', 'end_time', 'professional__first_name', 'professional__last_name'
+        )
+    )
+
+
+def _coverage_row(professional_id, lock=False):
+    # Las escrituras leen la cobertura de la base, no de la caché
+    queryset = OpenSlotCoverage.objects.filter(professional_id=professional_id)
+    if lock:
+        queryset = queryset.select_for_update()
+    return queryset.values_list('valid_from', 'valid_until').first()
+
+
+@transaction.atomic
+def refresh_open_slots(professional_id, date_from, date_to):
+    """Regenera los días ``[date_from, date_to]`` del profesional que estén dentro de su horizonte."""
+    # El bloqueo de la cobertura serializa las regeneraciones del profesional:
+    # la segunda espera a que la primera confirme y calcula con sus citas
+    coverage = _coverage_row(professional_id, lock=True)
+    if coverage is None:
+        return
+    date_from, date_to = max(date_from, coverage[0]), min(date_to, coverage[1])
+    if date_from > date_to:
+        return
+    _replace_slots(compute_open_slots([professional_id], date_from, date_to), date_from, date_to)
+
+
+def refresh_interval(professional_id, start, end):
+    """Regenera los días que toca el intervalo ``[start, end)`` de una cita."""
+    refresh_open_slots(professional_id, *local_days(start, end))
+
+
+def refresh_professional(professional_id):
+    """Regenera el horizonte completo del profesional (o lo materializa si aún no tiene)."""
+    coverage = _coverage_row(professional_id)
+    if coverage is None:
+        rebuild_open_slots([professional_id])
+    else:
+        refresh_open_slots(professional_id, *coverage)
+
+
+@transaction.atomic
+def refresh_clinic_interval(start, end):
+    """
+    Regenera, para todos los profesionales materializados, los días que toca
+    un feriado de toda la clínica; los profesionales con la misma cobertura se
+    calculan juntos.
+    """
+    date_from, date_to = local_days(start, end)
+    groups = defaultdict(list)
+    for professional_id, valid_from, valid_until in OpenSlotCoverage.objects.select_for_update().filter(
+        valid_from__lte=date_to, valid_until__gte=date_from
+    ).order_by('professional_id').values_list('professional_id', 'valid_from', 'valid_until'):
+        groups[(max(date_from, valid_from), min(date_to, valid_until))].append(professional_id)
+    for (day_from, day_to), professional_ids in groups.items():
+        _replace_slots(compute_open_slots(professional_ids, day_from, day_to), day_from, day_to)
+
+
+@transaction.atomic
+def rebuild_open_slots(professional_ids=None, today=None):
+    """Materializa desde cero el horizonte completo de los profesionales indicados (o de todos)."""
+    if professional_ids is None:
+        professional_ids = get_user_model().objects.filter(role='professional').values_list('id', flat=True)
+    professional_ids = list(professional_ids)
+    date_from, date_to = _horizon(today)
+    OpenSlot.objects.filter(professional_id__in=professional_ids).delete()
+    _replace_slots(compute_open_slots(professional_ids, date_from, date_to), date_from, date_to)
+    for professional_id in professional_ids:
+        _set_coverage(professional_id, date_from, date_to)
+    return len(professional_ids)
+
+
+@transaction.atomic
+def roll_forward(today=None):
+    """
+    Descarta los slots de días pasados y extiende el horizonte de cada
+    profesional hasta hoy + ``OPEN_SLOTS_HORIZON_DAYS``. Los profesionales sin
+    cobertura (nuevos) se materializan completos. Retorna la cantidad de
+    profesionales extendidos y de slots creados.
+    """
+    date_from, date_to = _horizon(today)
+    OpenSlot.objects.filter(start_time__lt=day_start(date_from)).delete()
+
+    # Se agrupan por día desde el que hay que extender: normalmente es uno solo
+    pending = defaultdict(list)
+    professional_ids = get_user_model().objects.filter(role='professional').values_list('id', flat=True)
+    coverages = dict(
+        OpenSlotCoverage.objects.select_for_update().order_by('professional_id')
+        .values_list('professional_id', 'valid_until')
+    )
+    for professional_id in professional_ids:
+        valid_until = coverages.get(professional_id)
+        start = date_from if valid_until is None or valid_until < date_from else valid_until + timedelta(days=1)
+        pending[start].append(professional_id)
+
+    created = extended = 0
+    for start, ids in pending.items():
+        if start <= date_to:
+            slots = compute_open_slots(ids, start, date_to)
+            _replace_slots(slots, start, date_to)
+            created += sum(len(items) for items in slots.values())
+        for professional_id in ids:
+            _set_coverage(professional_id, date_from, date_to)
+        extended += len(ids)
+    return extended, created
+
+
+def check_open_slots(professional_ids=None):
+    """
+    Compara el almacén con ``compute_open_slots`` dentro de la cobertura de
+    cada profesional. Retorna ``{professional_id: (faltantes, sobrantes)}``
+    solo para los profesionales con diferencias; un profesional sin
+    cobertura figura con ``(None, None)``.
+    """
+    if professional_ids is None:
+        professional_ids = get_user_model().objects.filter(role='professional').values_list('id', flat=True)
+    coverages = {
+        professional_id: (valid_from, valid_until)
+        for professional_id, valid_from, valid_until in OpenSlotCoverage.objects.filter(
+            professional_id__in=list(professional_ids)
+        ).values_list('professional_id', 'valid_from', 'valid_until')
+    }
+    problems = {}
+    for professional_id in professional_ids:
+        if professional_id not in coverages:
+            problems[professional_id] = (None, None)
+            continue
+        valid_from, valid_until = coverages[professional_id]
+        expected = set(compute_open_slots([professional_id], valid_from, valid_until)[professional_id])
+        stored = set(OpenSlot.objects.filter(
+            professional_id=professional_id,
+            start_time__gte=day_start(valid_from),
+            start_time__lt=day_start(valid_until + timedelta(days=1)),
+        ).values_list('start_time', 'end_time'))
+        if expected != stored:
+            problems[professional_id] = (sorted(expected - stored), sorted(stored - expected))
+    return problems
+
+
+# ======= PRÓXIMOS SLOTS ENTRE VARIOS PROFESIONALES =======
+
+NEXT_AVAILABLE_FIRST_CHUNK_DAYS = 1
+
+
+class _SlotChunks:
+    """
+    Slots de los profesionales cargados por bloques de días consecutivos,
+    cada bloque del doble de días que el anterior. Un bloque se carga para
+    todos los profesionales aún activos a la vez: del almacén materializado
+    si todos lo tienen cubierto (una consulta) y si no, calculado (dos).
+    """
+
+    def __init__(self, professional_ids, first_day, last_day):
+        self.active = set(professional_ids)
+        self.first_day = first_day
+        self.last_day = last_day
+        self.coverages = dict(
+            (professional_id, (valid_from, valid_until))
+            for professional_id, valid_from, valid_until in OpenSlotCoverage.objects.filter(
+                professional_id__in=self.active
+            ).values_list('professional_id', 'valid_from', 'valid_until')
+        )
+        self.chunks = []
+
+    def get(self, index):
+        """Bloque ``index`` como ``(primer día, último día, {professional_id: slots})``, o None si no hay más."""
+        while len(self.chunks) <= index:
+            day_from = self.chunks[-1][1] + timedelta(days=1) if self.chunks else self.first_day
+            if day_from > self.last_day or not self.active:
+                return None
+            size = NEXT_AVAILABLE_FIRST_CHUNK_DAYS * 2 ** len(self.chunks)
+            day_to = min(day_from + timedelta(days=size - 1), self.last_day)
+            self.chunks.append((day_from, day_to, self._load(day_from, day_to)))
+        return self.chunks[index]
+
+    def _load(self, day_from, day_to):
+        covered = [
+            professional_id for professional_id in self.active
+            if professional_id in self.coverages
+            and self.coverages[professional_id][0] <= day_from and day_to <= self.coverages[professional_id][1]
+        ]
+        slots = defaultdict(list)
+        if covered:
+            for professional_id, start, end in OpenSlot.objects.filter(
+                professional_id__in=covered,
+                start_time__gte=day_start(day_from),
+                start_time__lt=day_start(day_to + timedelta(days=1)),
+            ).order_by('start_time').values_list('professional_id', 'start_time', 'end_time'):
+                slots[professional_id].append((start, end))
+        missing = self.active.difference(covered)
+        if missing:
+            slots.update(compute_open_slots(missing, day_from, day_to))
+        return slots
+
+
+def next_available_slots(professional_ids, after, count, max_days, per_professional=None):
+    """
+    Los ``count`` primeros slots libres ``(inicio, fin, professional_id)``
+    desde ``after`` entre los profesionales indicados, buscando como mucho
+    ``max_days`` días.
+
+    Cada profesional es un flujo ordenado de slots y un heap los mezcla.
+    Cuando un flujo agota su bloque de días deja en el heap una marca con el
+    inicio del bloque siguiente, que solo se carga si la marca llega a salir
+    del heap antes de completar ``count``: el trabajo depende del tamaño de
+    la respuesta y no de profesionales × días. ``per_professional`` limita
+    cuántos slots aporta cada profesional.
+    """
+    # Sin ninguna ventana semanal un profesional nunca tiene slots
+    professional_ids = list(ProfessionalAvailability.objects.filter(
+        professional_id__in=list(professional_ids), is_available=True
+    ).order_by().values_list('professional_id', flat=True).distinct())
+    if not professional_ids or count <= 0:
+        return []
+    first_day = timezone.localtime(after).date()
+    chunks = _SlotChunks(professional_ids, first_day, first_day + timedelta(days=max_days - 1))
+    heap = []
+
+    def advance(professional_id, index, position):
+        """Empuja el siguiente slot del profesional, o la marca del bloque siguiente."""
+        chunk = chunks.get(index)
+        if chunk is None:
+            chunks.active.discard(professional_id)
+            return
+        items = chunk[2].get(professional_id, ())
+        while position < len(items) and items[position][0] < after:
+            position += 1
+        if position < len(items):
+            start, end = items[position]
+            heapq.heappush(heap, (start, professional_id, end, index, position + 1))
+        elif chunk[1] < chunks.last_day:
+            heapq.heappush(heap, (day_start(chunk[1] + timedelta(days=1)), professional_id, None, index + 1, 0))
+        else:
+            chunks.active.discard(professional_id)
+
+    for professional_id in professional_ids:
+        advance(professional_id, 0, 0)
+
+    results = []
+    taken = defaultdict(int)
+    while heap and len(results) < count:
+        start, professional_id, end, index, position = heapq.heappop(heap)
+        if end is None:
+            advance(professional_id, index, 0)
+            continue
+        results.append((start, end, professional_id))
+        taken[professional_id] += 1
+        if per_professional is not None and taken[professional_id] >= per_professional:
+            # No se cargan más bloques para este profesional
+            chunks.active.discard(professional_id)
+            continue
+        advance(professional_id, index, position)
+    return results
+
+
+# ======= VERIFICACIÓN PUNTUAL =======
+
+def exception_message(kind, reason):
+    """Mensaje de validación para un horario que cae dentro de una excepción."""
+    label = reason or dict(AvailabilityException.KIND_CHOICES)[kind]
+    return f'El profesional no atiende en este horario ({label}).'
+
+
+def check_availability(professional_id, start, end):
+    """
+    Verifica si el profesional puede atender en ``[start, end)`` con las
+    reglas de ``AppointmentCreateSerializer``: horario futuro y bien formado,
+    dentro de una ventana semanal, fuera de toda excepción (ambas leídas de la
+    caché) y sin superponerse con citas que ocupan la agenda (una consulta por
+    el índice de inicio), con bloques de calendarios externos ni con horarios
+    retenidos por la lista de espera.
+
+    Retorna ``{'available', 'reason', 'message', 'conflict', 'alternatives'}``;
+    si no está disponible, ``alternatives`` trae los próximos slots libres del
+    profesional desde el horario pedido.
+    """
+    result = {'available': False, 'reason': None, 'message': '', 'conflict': None, 'alternatives': []}
+    now = timezone.now()
+    if start >= end:
+        result.update(reason='invalid_range', message='La hora de inicio debe ser anterior a la hora de fin.')
+    elif start <= now:
+        result.update(reason='past', message='La cita debe programarse para un momento futuro.')
+    else:
+        local_start, local_end = timezone.localtime(start), timezone.localtime(end)
+        fits = local_start.date() == local_end.date() and any(
+            window_start <= local_start.time() and local_end.time() <= window_end
+            for window_start, window_end in cached_weekly_windows(professional_id)[local_start.weekday()]
+        )
+        exception = next((
+            (kind, reason) for exception_start, exception_end, kind, reason in cached_exceptions(professional_id)
+            if exception_start < end and start < exception_end
+        ), None)
+        if not fits:
+            result.update(reason='outside_availability', message='El profesional no está disponible en este horario.')
+        elif exception:
+            result.update(reason='exception', message=exception_message(*exception))
+        else:
+            conflict = Appointment.objects.filter(
+                professional_id=professional_id,
+                status__in=BLOCKING_STATUSES,
+                start_time__lt=end,
+                end_time__gt=start,
+            ).order_by('start_time').values('start_time', 'end_time').first()
+            external = None if conflict else ExternalBusyBlock.objects.filter(
+                professional_id=professional_id,
+                start_time__lt=end,
+                end_time__gt=start,
+            ).order_by('start_time').values('start_time', 'end_time').first()
+            hold = None if conflict or external else WaitlistOffer.objects.holding(
+                professional_id, start, end
+            ).order_by('start_time').values('start_time', 'end_time').first()
+            if conflict:
+                result.update(reason='conflict', conflict=conflict,
+                              message='El profesional ya tiene una cita programada en este horario.')
+            elif external:
+                result.update(reason='external_busy', conflict=external, message=EXTERNAL_BUSY_MESSAGE)
+            elif hold:
+                result.update(reason='waitlist_hold', conflict=hold, message=WAITLIST_HOLD_MESSAGE)
+            else:
+                result.update(available=True, reason='available')
+
+    if not result['available']:
+        result['alternatives'] = [
+            {'start_time': slot_start, 'end_time': slot_end}
+            for slot_start, slot_end, _ in next_available_slots(
+                [professional_id], max(start, now), CHECK_ALTERNATIVES, CHECK_ALTERNATIVES_DAYS
+            )
+        ]
+    return result
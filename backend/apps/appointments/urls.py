@@ -3,24 +3,47 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     ProfessionalAvailabilityViewSet,
+    AvailabilityExceptionViewSet,
+    ExternalCalendarViewSet,
+    WaitlistEntryViewSet,
+    WaitlistOfferViewSet,
     AppointmentViewSet,
     AppointmentAttachmentViewSet,
     AvailableSlotsView,
+    NextAvailableSlotsView,
+    CheckAvailabilityView,
+    CalendarFeedView,
+    appointment_feed,
+    PatientHistoryView,
     dashboard_stats,
-    upcoming_appointments
+    upcoming_appointments,
+    dashboard_bundle
 )
+from .importers import AppointmentImporter
+from apps.users.views import CSVImportView
 
 # Configuración del router
 router = DefaultRouter()
 router.register(r'availabilities', ProfessionalAvailabilityViewSet, basename='availability')
+router.register(r'exceptions', AvailabilityExceptionViewSet, basename='availability-exception')
+router.register(r'calendars', ExternalCalendarViewSet, basename='external-calendar')
+router.register(r'waitlist', WaitlistEntryViewSet, basename='waitlist-entry')
+router.register(r'waitlist-offers', WaitlistOfferViewSet, basename='waitlist-offer')
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
 router.register(r'attachments', AppointmentAttachmentViewSet, basename='attachment')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('available-slots/', AvailableSlotsView.as_view(), name='available-slots'),
+    path('next-available/', NextAvailableSlotsView.as_view(), name='next-available'),
+    path('check-availability/', CheckAvailabilityView.as_view(), name='check-availability'),
+    path('feed/', CalendarFeedView.as_view(), name='calendar-feed'),
+    path('feed/<str:token>.ics', appointment_feed, name='appointment-feed'),
+    path('patient/<int:patient_id>/history/', PatientHistoryView.as_view(), name='patient-history'),
+    path('import/', CSVImportView.as_view(importer_class=AppointmentImporter), name='import-appointments'),
     
     # Rutas del Dashboard
     path('dashboard/stats/', dashboard_stats, name='dashboard-stats'),
     path('dashboard/upcoming-appointments/', upcoming_appointments, name='dashboard-upcoming-appointments'),
+    path('dashboard/bundle/', dashboard_bundle, name='dashboard-bundle'),
 ]
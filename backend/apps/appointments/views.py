@@ -1,22 +1,51 @@
 from rest_framework import viewsets, status, permissions, generics
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.views import APIView
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import condition
+from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Count, Q, Sum
 from datetime import datetime, timedelta, time
 import json
 
-from .models import ProfessionalAvailability, Appointment, AppointmentAttachment
+from .models import (
+    ProfessionalAvailability, AvailabilityException, Appointment, AppointmentAttachment, ExternalCalendar,
+    WaitlistEntry, WaitlistOffer,
+)
+from .archive import has_attended, patient_history
+from .calendar_sync import CalendarSyncError, request_sync, sync_calendar_text
+from .dashboard import (
+    appointment_stats, build_dashboard_bundle, dashboard_appointments, upcoming, with_serializer_relations
+)
+from .exports import csv_response, json_response, xlsx_response
+from .feeds import feed_etag, get_or_create_token, iter_feed, resolve_token, rotate_token
+from .slots import check_availability, compute_open_slots, next_available_slots, open_slots
+from .waitlist import WaitlistError, accept_offer, cancel_entry, decline_offer
 from .serializers import (
     ProfessionalAvailabilitySerializer,
+    AvailabilityExceptionSerializer,
+    ExternalCalendarSerializer,
+    WaitlistEntrySerializer,
+    WaitlistOfferSerializer,
     AppointmentSerializer,
     AppointmentCreateSerializer,
     AppointmentAttachmentSerializer,
     AvailableSlotSerializer,
-    AppointmentStatisticsSerializer
+    AvailableSlotTimesSerializer,
+    AppointmentStatisticsSerializer,
+    PatientHistorySerializer
 )
 from apps.users.permissions import IsAdminUser, IsProfessionalUser, IsPatientUser, IsOwnerOrAdmin
+from fenix_core.fast_serializers import FastSerializerMixin, serialize
+from fenix_core.idempotency import idempotent
+from fenix_core.throttling import StatsThrottle
 
 
 class ProfessionalAvailabilityViewSet(viewsets.ModelViewSet):
@@ -70,11 +99,241 @@ class ProfessionalAvailabilityViewSet(viewsets.ModelViewSet):
             )
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AvailabilityExceptionViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar vacaciones, bloqueos y feriados de la clínica.
+    """
+    serializer_class = AvailabilityExceptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Filtra las excepciones según el usuario y parámetros."""
+        user = self.request.user
+        queryset = AvailabilityException.objects.all()
+        if not user.is_admin:
+            if user.is_professional and self.request.method != 'GET':
+                # Los profesionales solo modifican sus propias excepciones
+                queryset = queryset.filter(professional=user)
+            elif user.is_professional:
+                # ...y ven además los feriados de la clínica
+                queryset = queryset.filter(Q(professional=user) | Q(professional__isnull=True))
+        
+        # Filtra por profesional (incluye los feriados de la clínica)
+        professional_id = self.request.query_params.get('professional_id')
+        if professional_id:
+            queryset = queryset.filter(Q(professional_id=professional_id) | Q(professional__isnull=True))
+        
+        # Filtra por rango de fechas
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        if start_date:
+            queryset = queryset.filter(end_time__date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(start_time__date__lte=end_date)
+        
+        return queryset.select_related('professional').order_by('start_time')
+    
+    def perform_create(self, serializer):
+        """Los profesionales solo crean excepciones propias; los feriados de la clínica, solo los administradores."""
+        user = self.request.user
+        if user.is_admin:
+            serializer.save()
+        else:
+            serializer.save(professional=user)
+    
+    def perform_update(self, serializer):
+        """Un profesional no puede reasignar su excepción ni convertirla en feriado de la clínica."""
+        if self.request.user.is_admin:
+            serializer.save()
+        else:
+            serializer.save(professional=self.request.user)
+    
+    def check_permissions(self, request):
+        """Verifica permisos específicos según el método y usuario."""
+        super().check_permissions(request)
+        
+        if request.method != 'GET' and not (request.user.is_professional or request.user.is_admin):
+            self.permission_denied(
+                request, message="Solo los profesionales o administradores pueden modificar las excepciones."
+            )
+
+
+class ExternalCalendarViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para los calendarios externos (.ics) de los profesionales. Los
+    calendarios con URL quedan pendientes de sincronizar al crearlos y con
+    ``sync`` (los descarga ``sync_calendars --pending``); los demás se cargan
+    subiendo el archivo con ``upload``.
+    """
+    serializer_class = ExternalCalendarSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = ExternalCalendar.objects.select_related('professional')
+        if not user.is_admin:
+            queryset = queryset.filter(professional=user)
+        return queryset
+    
+    def check_permissions(self, request):
+        """Solo los profesionales (sus propios calendarios) y los administradores."""
+        super().check_permissions(request)
+        if not (request.user.is_professional or request.user.is_admin):
+            self.permission_denied(
+                request, message="Solo los profesionales o administradores pueden gestionar calendarios externos."
+            )
+    
+    def _save_and_sync(self, serializer):
+        calendar = serializer.save() if self.request.user.is_admin else serializer.save(professional=self.request.user)
+        if calendar.url:
+            request_sync(calendar)
+    
+    def perform_create(self, serializer):
+        self._save_and_sync(serializer)
+    
+    def perform_update(self, serializer):
+        self._save_and_sync(serializer)
+    
+    @action(detail=True, methods=['post'])
+    def sync(self, request, pk=None):
+        """Deja pendiente la descarga del calendario desde su URL; el resultado queda en last_synced_at/last_error."""
+        calendar = self.get_object()
+        if not calendar.url:
+            return Response({'error': 'Este calendario se carga subiendo el archivo .ics.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        request_sync(calendar)
+        return Response(self.get_serializer(calendar).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser])
+    def upload(self, request, pk=None):
+        """Sincroniza el calendario con un archivo .ics subido en el campo ``file``."""
+        calendar = self.get_object()
+        if calendar.url:
+            return Response({'error': 'Este calendario se sincroniza desde su URL.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Se requiere un archivo .ics en el campo "file".'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if upload.size > settings.EXTERNAL_CALENDAR_MAX_BYTES:
+            return Response({'error': 'El archivo supera el tamaño máximo permitido.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = sync_calendar_text(calendar, upload.read().decode('utf-8-sig', errors='replace'))
+        except CalendarSyncError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
+
+class WaitlistEntryViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para la lista de espera. Los pacientes crean y ven sus propias
+    solicitudes; los profesionales ven las que los incluyen (por nombre o por
+    especialidad). Las solicitudes no se editan: se cancelan con ``cancel``.
+    """
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'head', 'options']
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = WaitlistEntry.objects.select_related('patient', 'professional')
+        if user.is_professional:
+            specialty = getattr(getattr(user, 'professional_profile', None), 'specialty', '')
+            queryset = queryset.filter(
+                Q(professional=user) | Q(professional__isnull=True, specialty__iexact=specialty) if specialty
+                else Q(professional=user)
+            )
+        elif not user.is_admin:
+            queryset = queryset.filter(patient=user)
+        
+        status_param = self.request.query_params.get('status')
+        if status_param:
+            queryset = queryset.filter(status=status_param)
+        return queryset
+    
+    def perform_create(self, serializer):
+        """Los pacientes solo se anotan a sí mismos; los administradores indican el paciente."""
+        user = self.request.user
+        if user.is_patient:
+            serializer.save(patient=user)
+        elif user.is_admin:
+            if serializer.validated_data.get('patient') is None:
+                raise ValidationError({'patient': 'Indique el paciente.'})
+            serializer.save()
+        else:
+            raise PermissionDenied('Solo los pacientes o administradores pueden anotarse en la lista de espera.')
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancela la solicitud; una oferta pendiente pasa a la siguiente entrada."""
+        entry = self.get_object()
+        if not (request.user.is_admin or entry.patient_id == request.user.id):
+            raise PermissionDenied('Solo el paciente puede cancelar su solicitud.')
+        try:
+            cancel_entry(entry.pk)
+        except WaitlistError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({'status': 'Solicitud cancelada'})
+
+
+class WaitlistOfferViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Horarios ofrecidos desde la lista de espera. El paciente los acepta
+    (se crea la cita) o los rechaza (el horario pasa al siguiente) antes de
+    ``expires_at``.
+    """
+    serializer_class = WaitlistOfferSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = WaitlistOffer.objects.select_related('professional')
+        if user.is_professional:
+            queryset = queryset.filter(professional=user)
+        elif not user.is_admin:
+            queryset = queryset.filter(entry__patient=user)
+        
+        status_param = self.request.query_params.get('status')
+        if status_param:
+            queryset = queryset.filter(status=status_param)
+        return queryset
+    
+    def _check_can_respond(self):
+        # Los pacientes solo ven sus propias ofertas
+        if not (self.request.user.is_admin or self.request.user.is_patient):
+            raise PermissionDenied('Solo el paciente puede responder la oferta.')
+    
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        """Acepta la oferta y reserva la cita."""
+        offer = self.get_object()
+        self._check_can_respond()
+        try:
+            appointment = accept_offer(offer.pk)
+        except WaitlistError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response(AppointmentSerializer(appointment).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def decline(self, request, pk=None):
+        """Rechaza la oferta; el horario se ofrece a la siguiente entrada."""
+        offer = self.get_object()
+        self._check_can_respond()
+        try:
+            decline_offer(offer.pk)
+        except WaitlistError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({'status': 'Oferta rechazada'})
+
+
+class AppointmentViewSet(FastSerializerMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar las citas.
+    ``list`` y ``retrieve`` usan la serialización compilada.
     """
     permission_classes = [permissions.IsAuthenticated]
+    fast_serializer_classes = (AppointmentSerializer,)
     
     def get_serializer_class(self):
         """Selecciona el serializer adecuado según la acción."""
@@ -123,9 +382,16 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if today == 'true':
             today_date = timezone.now().date()
             queryset = queryset.filter(start_time__date=today_date)
-        
+
+        if self.action in ('list', 'retrieve'):
+            queryset = with_serializer_relations(queryset)
         return queryset.order_by('-start_time')
     
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """Crea la cita; un reintento con la misma ``Idempotency-Key`` devuelve la respuesta original."""
+        return super().create(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         """
         Al crear una cita, establece automáticamente al usuario actual como paciente
@@ -176,7 +442,28 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         appointment.mark_as_no_show()
         return Response({'status': 'Cita marcada como no asistida'})
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsAdminUser])
+    def export(self, request):
+        """
+        Exporta las citas en CSV o JSON (streaming) o XLSX para facturación.
+        Respeta los mismos filtros que el listado (status, date_from, date_to, today).
+        """
+        file_format = request.query_params.get('file_format', 'csv')
+        filename = f"citas_{timezone.localdate().strftime('%Y%m%d')}"
+        queryset = self.get_queryset()
+        
+        if file_format == 'csv':
+            return csv_response(queryset, filename)
+        if file_format == 'json':
+            return json_response(queryset, filename)
+        if file_format == 'xlsx':
+            return xlsx_response(queryset, filename)
+        return Response(
+            {'error': 'Formato no soportado. Use file_format=csv, file_format=json o file_format=xlsx.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    @action(detail=False, methods=['get'], throttle_classes=[StatsThrottle])
     def statistics(self, request):
         """Acción para obtener estadísticas de citas."""
         user = request.user
@@ -245,11 +532,33 @@ class AppointmentAttachmentViewSet(viewsets.ModelViewSet):
         serializer.save(uploaded_by=self.request.user)
 
 
+class PatientHistoryView(generics.ListAPIView):
+    """
+    Historial de citas de un paciente, de la más reciente a la más antigua.
+    Con ``include_archived=true`` incluye las citas movidas al archivo.
+    Los pacientes solo pueden consultar su propio historial y los profesionales
+    el de los pacientes con los que tienen o tuvieron alguna cita.
+    """
+    serializer_class = PatientHistorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        patient_id = self.kwargs['patient_id']
+        user = self.request.user
+        if user.is_patient and user.id != patient_id:
+            raise PermissionDenied('No tiene permiso para ver el historial de otro paciente.')
+        if user.is_professional and not has_attended(user.id, patient_id):
+            raise PermissionDenied('No tiene permiso para ver el historial de este paciente.')
+        include_archived = self.request.query_params.get('include_archived') == 'true'
+        return patient_history(patient_id, include_archived)
+
+
 class AvailableSlotsView(APIView):
     """
     Vista para obtener slots disponibles para citas con un profesional.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'slots'
     
     def get(self, request):
         """Obtiene slots disponibles según parámetros."""
@@ -280,65 +589,29 @@ class AvailableSlotsView(APIView):
             if (end_date - start_date).days > 30:
                 end_date = start_date + timedelta(days=30)
                 
-            # Obtener disponibilidades del profesional
-            availabilities = ProfessionalAvailability.objects.filter(
-                professional_id=professional_id,
-                is_available=True
-            )
-            
-            if not availabilities.exists():
-                return Response([])
-                
-            # Obtener citas existentes del profesional en el rango de fechas
-            existing_appointments = Appointment.objects.filter(
-                professional_id=professional_id,
-                start_time__date__gte=start_date,
-                start_time__date__lte=end_date,
-                status__in=['scheduled', 'confirmed']
-            )
-            
-            # Calcular slots disponibles
-            available_slots = []
-            current_date = start_date
-            slot_duration = timedelta(minutes=30)  # Duración predeterminada de 30 minutos
-            
-            while current_date <= end_date:
-                day_of_week = current_date.weekday()
-                
-                # Obtener disponibilidades para este día de la semana
-                day_availabilities = availabilities.filter(day_of_week=day_of_week)
-                
-                for availability in day_availabilities:
-                    # Crear datetime combinando la fecha actual con las horas de disponibilidad
-                    slot_start = datetime.combine(current_date, availability.start_time)
-                    slot_end = datetime.combine(current_date, availability.end_time)
-                    
-                    # Generar slots para este bloque de disponibilidad
-                    current_slot_start = slot_start
-                    
-                    while current_slot_start + slot_duration <= slot_end:
-                        current_slot_end = current_slot_start + slot_duration
-                        
-                        # Verificar si el slot se superpone con alguna cita existente
-                        is_available = True
-                        for appointment in existing_appointments:
-                            if (current_slot_start < appointment.end_time and
-                                current_slot_end > appointment.start_time):
-                                is_available = False
-                                break
-                                
-                        if is_available:
-                            available_slots.append({
-                                'start_time': current_slot_start,
-                                'end_time': current_slot_end,
-                                'professional_id': int(professional_id),
-                                'professional_name': availability.professional.get_full_name()
-                            })
-                            
-                        current_slot_start += slot_duration
-                
-                current_date += timedelta(days=1)
-                
+            professional_id = int(professional_id)
+
+            # Dentro del horizonte materializado: una lectura por rango del índice
+            rows = open_slots(professional_id, start_date, end_date)
+            if rows is None:
+                computed = compute_open_slots([professional_id], start_date, end_date)[professional_id]
+                first_name = last_name = ''
+                if computed:
+                    first_name, last_name = get_user_model().objects.values_list(
+                        'first_name', 'last_name'
+                    ).get(pk=professional_id)
+                rows = [(start, end, first_name, last_name) for start, end in computed]
+
+            available_slots = [
+                {
+                    'start_time': start,
+                    'end_time': end,
+                    'professional_id': professional_id,
+                    'professional_name': f'{first_name} {last_name}',
+                }
+                for start, end, first_name, last_name in rows
+            ]
+
             # Serializar y retornar los slots disponibles
             serializer = AvailableSlotSerializer(available_slots, many=True)
             return Response(serializer.data)
@@ -350,10 +623,155 @@ class AvailableSlotsView(APIView):
             )
 
 
+def _parse_datetime_param(value):
+    """Fecha y hora ISO 8601 con zona (la actual si no la indica), o None si no es válida."""
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        # Bien formada pero imposible, p. ej. 2027-02-30T10:00:00
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class CheckAvailabilityView(APIView):
+    """
+    Verificación puntual de un horario propuesto, pensada para validar el
+    formulario de reserva mientras el usuario escribe.
+
+    Parámetros: ``professional_id``, ``start_time`` y ``end_time`` (ISO 8601).
+    Responde ``available``, el motivo (``reason``: ``available``,
+    ``invalid_range``, ``past``, ``outside_availability``, ``exception``,
+    ``conflict``, ``external_busy`` o ``waitlist_hold``), el horario en
+    conflicto y, si no está disponible, alternativas.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            professional_id = int(params.get('professional_id', ''))
+        except ValueError:
+            return Response({'error': 'Se requiere ID del profesional'}, status=status.HTTP_400_BAD_REQUEST)
+
+        times = []
+        for name in ('start_time', 'end_time'):
+            value = _parse_datetime_param(params.get(name, ''))
+            if value is None:
+                return Response({'error': f'Formato de "{name}" inválido. Use ISO 8601.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            times.append(value)
+
+        result = check_availability(professional_id, *times)
+        result['alternatives'] = AvailableSlotTimesSerializer(result['alternatives'], many=True).data
+        if result['conflict']:
+            result['conflict'] = AvailableSlotTimesSerializer(result['conflict']).data
+        return Response(result)
+
+
+class NextAvailableSlotsView(APIView):
+    """
+    Próximos slots libres entre varios profesionales ("el primer turno con
+    cualquier dermatólogo"), ordenados por hora de inicio.
+
+    Parámetros: ``specialty`` o ``professional_ids`` (separados por coma),
+    ``count`` (por defecto 5, máximo 50), ``after`` (ISO 8601, por defecto
+    ahora), ``max_days`` (por defecto 90, máximo 365) y ``per_professional``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'slots'
+    MAX_COUNT = 50
+    MAX_DAYS = 365
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            count = min(int(params.get('count', 5)), self.MAX_COUNT)
+            max_days = min(int(params.get('max_days', 90)), self.MAX_DAYS)
+            per_professional = int(params['per_professional']) if params.get('per_professional') else None
+            professional_ids = [int(value) for value in params.get('professional_ids', '').split(',') if value]
+        except ValueError:
+            return Response({'error': 'Parámetros numéricos inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        after = timezone.now()
+        if params.get('after'):
+            requested = _parse_datetime_param(params['after'])
+            if requested is None:
+                return Response({'error': 'Formato de "after" inválido. Use ISO 8601.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            after = max(after, requested)
+
+        professionals = get_user_model().objects.filter(role='professional', is_active=True)
+        if professional_ids:
+            professionals = professionals.filter(id__in=professional_ids)
+        if params.get('specialty'):
+            professionals = professionals.filter(professional_profile__specialty=params['specialty'])
+
+        found = next_available_slots(
+            professionals.values_list('id', flat=True), after, count, max(max_days, 1), per_professional
+        )
+        names = {
+            professional_id: f'{first_name} {last_name}'
+            for professional_id, first_name, last_name in get_user_model().objects.filter(
+                id__in={professional_id for _, _, professional_id in found}
+            ).values_list('id', 'first_name', 'last_name')
+        }
+        serializer = AvailableSlotSerializer([
+            {
+                'start_time': start,
+                'end_time': end,
+                'professional_id': professional_id,
+                'professional_name': names[professional_id],
+            }
+            for start, end, professional_id in found
+        ], many=True)
+        return Response(serializer.data)
+
+
 # ======= VISTAS PARA EL DASHBOARD =======
 
+class CalendarFeedView(APIView):
+    """
+    URL del feed .ics con las citas del usuario autenticado. ``POST`` genera
+    una URL nueva e invalida la anterior.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _response(self, request, token):
+        return Response({'url': request.build_absolute_uri(reverse('appointment-feed', args=[token]))})
+
+    def get(self, request):
+        return self._response(request, get_or_create_token(request.user))
+
+    def post(self, request):
+        return self._response(request, rotate_token(request.user))
+
+
+def _feed_etag(request, token):
+    user_id = resolve_token(token)
+    return feed_etag(user_id) if user_id else None
+
+
+@condition(etag_func=_feed_etag)
+def appointment_feed(request, token):
+    """
+    Feed .ics de las citas del dueño del token, para clientes de calendario
+    (sin autenticación de la API). Responde 304 si el ETag no cambió.
+    """
+    user_id = resolve_token(token)
+    if user_id is None:
+        raise Http404
+    response = StreamingHttpResponse(iter_feed(user_id), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="citas.ics"'
+    # El cliente debe revalidar con el ETag en cada consulta
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([StatsThrottle])
 def dashboard_stats(request):
     """
     Obtiene estadísticas generales para el dashboard:
@@ -362,51 +780,8 @@ def dashboard_stats(request):
     - Citas de hoy, esta semana y este mes
     """
     try:
-        # Obtener todas las citas según el rol del usuario
-        user = request.user
-        
-        if user.is_admin:
-            # Los administradores ven todas las citas
-            appointments = Appointment.objects.all()
-        elif hasattr(user, 'professional_profile') and user.professional_profile:
-            # Los profesionales ven sus propias citas
-            appointments = Appointment.objects.filter(professional=user)
-        else:
-            # Los pacientes ven sus propias citas
-            appointments = Appointment.objects.filter(patient=user)
-        
-        # Calcular estadísticas generales
-        total = appointments.count()
-        
-        # Estadísticas por estado
-        status_counts = {
-            'scheduled': appointments.filter(status='scheduled').count(),
-            'confirmed': appointments.filter(status='confirmed').count(),
-            'completed': appointments.filter(status='completed').count(),
-            'cancelled': appointments.filter(status='cancelled').count(),
-            'no_show': appointments.filter(status='no_show').count(),
-        }
-        
-        # Fechas para filtros
-        today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday())
-        start_of_month = today.replace(day=1)
-        
-        # Citas por período de tiempo
-        time_counts = {
-            'today': appointments.filter(start_time__date=today).count(),
-            'this_week': appointments.filter(start_time__date__gte=start_of_week).count(),
-            'this_month': appointments.filter(start_time__date__gte=start_of_month).count(),
-        }
-        
-        # Combinar todos los datos estadísticos
-        stats = {
-            'total': total,
-            **status_counts,
-            **time_counts
-        }
-        
-        return Response(stats)
+        # Una sola consulta agregada sobre las citas visibles para el usuario
+        return Response(appointment_stats(dashboard_appointments(request.user)))
         
     except Exception as e:
         return Response(
@@ -429,38 +804,29 @@ def upcoming_appointments(request):
         except ValueError:
             limit = 5
         
-        # Obtener usuario actual
-        user = request.user
-        
-        # Fecha actual para filtrar solo citas futuras
-        now = timezone.now()
-        
-        # Obtener citas según rol del usuario
-        if user.is_admin:
-            # Administradores ven todas las próximas citas
-            appointments = Appointment.objects.filter(
-                start_time__gt=now
-            ).order_by('start_time')[:limit]
-        elif hasattr(user, 'professional_profile') and user.professional_profile:
-            # Profesionales ven sus próximas citas
-            appointments = Appointment.objects.filter(
-                professional=user,
-                start_time__gt=now
-            ).order_by('start_time')[:limit]
-        else:
-            # Pacientes ven sus próximas citas
-            appointments = Appointment.objects.filter(
-                patient=user,
-                start_time__gt=now
-            ).order_by('start_time')[:limit]
+        appointments = upcoming(dashboard_appointments(request.user), limit)
         
         # Serializar citas
-        serializer = AppointmentSerializer(appointments, many=True)
-        
-        return Response(serializer.data)
+        return Response(serialize(AppointmentSerializer, appointments, many=True))
         
     except Exception as e:
         return Response(
             {'error': f'Error al obtener próximas citas: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([StatsThrottle])
+def dashboard_bundle(request):
+    """
+    Devuelve en una sola respuesta las estadísticas, las próximas citas
+    (``limit``, 5 por defecto), la agenda de hoy y las notificaciones sin leer.
+    Se cachea por usuario durante ``DASHBOARD_CACHE_SECONDS``.
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 5)), 1), 50)
+    except ValueError:
+        limit = 5
+    return Response(build_dashboard_bundle(request.user, limit))
@@ -0,0 +1,199 @@
+"""
+Lista de espera con ofertas automáticas de horarios liberados.
+
+Cuando se cancela una cita que ocupaba la agenda, ``offer_freed_slot`` busca
+en ``WaitlistDay`` por igualdad ``(profesional o especialidad, día)`` las
+entradas que aceptan ese día, en orden de llegada, y ofrece el horario a la
+primera cuyo rango horario lo contiene. El costo depende de cuántas entradas
+esperan ese día para ese profesional, no del tamaño de la lista de espera.
+
+La oferta retiene el horario (cuenta como ocupado en ``slots.py``) durante
+``WAITLIST_OFFER_HOLD_MINUTES``. Si el paciente la rechaza o vence, la
+entrada vuelve a esperar y el horario se ofrece a la siguiente;
+``expire_waitlist_offers`` procesa los vencimientos cada minuto.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.models import Notification
+from apps.users.models import ProfessionalProfile
+from .models import Appointment, WaitlistDay, WaitlistEntry, WaitlistOffer
+from .slots import check_availability
+
+# Candidatas que se intentan reservar por horario liberado (otras pueden
+# haber sido tomadas por una cancelación concurrente)
+MATCH_BATCH = 20
+
+
+class WaitlistError(Exception):
+    """La oferta no se puede aceptar o rechazar en su estado actual."""
+
+
+def index_entry(entry):
+    """Reescribe los días indexados de la entrada (ninguno si no está en espera)."""
+    WaitlistDay.objects.filter(entry=entry).delete()
+    if entry.status != 'waiting':
+        return
+    day = max(entry.date_from, timezone.localdate())
+    days = []
+    while day <= entry.date_to:
+        days.append(WaitlistDay(
+            entry=entry, target=entry.target_key, day=day,
+            time_from=entry.time_from, time_to=entry.time_to, created_at=entry.created_at,
+        ))
+        day += timedelta(days=1)
+    WaitlistDay.objects.bulk_create(days)
+
+
+def _targets(professional_id):
+    specialty = ProfessionalProfile.objects.filter(user_id=professional_id).values_list('specialty', flat=True).first()
+    targets = [f'p:{professional_id}']
+    if specialty:
+        targets.append(f's:{specialty.lower()}')
+    return targets
+
+
+def _notify_offer(offer, patient_id):
+    when = timezone.localtime(offer.start_time).strftime('%d/%m/%Y %H:%M')
+    until = timezone.localtime(offer.expires_at).strftime('%H:%M')
+    Notification.objects.create(
+        user_id=patient_id,
+        type='waitlist_offer',
+        title='Se liberó un horario',
+        message=f'Hay un turno disponible el {when}. Confírmelo antes de las {until}.',
+        link=f'/waitlist/offers/{offer.id}',
+    )
+
+
+@transaction.atomic
+def offer_freed_slot(professional_id, start, end, exclude_patient_id=None):
+    """
+    Ofrece ``[start, end)`` del profesional a la primera entrada compatible
+    de la lista de espera. Retorna la oferta creada o None.
+    """
+    if start <= timezone.now():
+        return None
+    local_start, local_end = timezone.localtime(start), timezone.localtime(end)
+    if local_start.date() != local_end.date() or not check_availability(professional_id, start, end)['available']:
+        return None
+
+    # Las entradas que ya rechazaron o dejaron vencer este mismo horario no se repiten
+    already_offered = WaitlistOffer.objects.filter(
+        professional_id=professional_id, start_time=start
+    ).values_list('entry_id', flat=True)
+    candidates = WaitlistDay.objects.filter(
+        target__in=_targets(professional_id),
+        day=local_start.date(),
+        time_from__lte=local_start.time(),
+        time_to__gte=local_end.time(),
+    ).exclude(entry_id__in=already_offered).order_by('created_at').values_list('entry_id', flat=True)
+
+    for entry_id in candidates[:MATCH_BATCH]:
+        claimed = WaitlistEntry.objects.filter(pk=entry_id, status='waiting')
+        if exclude_patient_id:
+            claimed = claimed.exclude(patient_id=exclude_patient_id)
+        # Reserva atómica: otra cancelación concurrente pudo tomar la entrada
+        if not claimed.update(status='offered', updated_at=timezone.now()):
+            continue
+        WaitlistDay.objects.filter(entry_id=entry_id).delete()
+        offer = WaitlistOffer.objects.create(
+            entry_id=entry_id,
+            professional_id=professional_id,
+            start_time=start,
+            end_time=end,
+            expires_at=timezone.now() + timedelta(minutes=settings.WAITLIST_OFFER_HOLD_MINUTES),
+        )
+        _notify_offer(offer, WaitlistEntry.objects.filter(pk=entry_id).values_list('patient_id', flat=True).get())
+        return offer
+    return None
+
+
+def _locked_pending_offer(offer_id):
+    offer = WaitlistOffer.objects.select_for_update().select_related('entry').get(pk=offer_id)
+    if offer.status != 'pending':
+        raise WaitlistError('La oferta ya no está disponible.')
+    return offer
+
+
+@transaction.atomic
+def accept_offer(offer_id):
+    """Reserva la cita del horario ofrecido; retorna la cita creada."""
+    offer = _locked_pending_offer(offer_id)
+    if offer.expires_at <= timezone.now():
+        raise WaitlistError('La oferta venció.')
+    # Se libera la retención y se verifica el horario con las reglas de reserva
+    offer.status = 'accepted'
+    offer.save(update_fields=['status', 'updated_at'])
+    availability = check_availability(offer.professional_id, offer.start_time, offer.end_time)
+    if not availability['available']:
+        raise WaitlistError(availability['message'])
+    appointment = Appointment.objects.create(
+        patient_id=offer.entry.patient_id,
+        professional_id=offer.professional_id,
+        start_time=offer.start_time,
+        end_time=offer.end_time,
+        status='scheduled',
+        reason=offer.entry.notes or 'Turno asignado desde la lista de espera',
+    )
+    offer.appointment = appointment
+    offer.save(update_fields=['appointment', 'updated_at'])
+    offer.entry.status = 'booked'
+    offer.entry.save(update_fields=['status', 'updated_at'])
+    return appointment
+
+
+def _close_offer(offer, status):
+    """Cierra la oferta y, al confirmar la transacción, ofrece el horario a la siguiente entrada."""
+    offer.status = status
+    offer.save(update_fields=['status', 'updated_at'])
+    transaction.on_commit(lambda: offer_freed_slot(offer.professional_id, offer.start_time, offer.end_time))
+
+
+def _release(offer, status):
+    """Cierra la oferta y devuelve la entrada a la espera (o la vence si su rango ya pasó)."""
+    _close_offer(offer, status)
+    entry = offer.entry
+    entry.status = 'waiting' if entry.date_to >= timezone.localdate() else 'expired'
+    entry.save(update_fields=['status', 'updated_at'])
+
+
+@transaction.atomic
+def decline_offer(offer_id):
+    _release(_locked_pending_offer(offer_id), 'declined')
+
+
+@transaction.atomic
+def cancel_entry(entry_id):
+    """Cancela la solicitud; si tenía una oferta pendiente, el horario pasa a la siguiente entrada."""
+    entry = WaitlistEntry.objects.select_for_update().get(pk=entry_id)
+    if entry.status not in ('waiting', 'offered'):
+        raise WaitlistError('La solicitud ya no está en espera.')
+    for offer in entry.offers.select_for_update().filter(status='pending'):
+        _close_offer(offer, 'declined')
+    entry.status = 'cancelled'
+    entry.save(update_fields=['status', 'updated_at'])
+
+
+def expire_offers():
+    """Vence las ofertas sin respuesta y las entradas cuyo rango ya pasó; retorna ``(ofertas, entradas)``."""
+    expired_offers = 0
+    for offer_id in WaitlistOffer.objects.filter(
+        status='pending', expires_at__lte=timezone.now()
+    ).values_list('id', flat=True):
+        with transaction.atomic():
+            try:
+                _release(_locked_pending_offer(offer_id), 'expired')
+            except WaitlistError:
+                continue
+        expired_offers += 1
+
+    today = timezone.localdate()
+    stale = WaitlistEntry.objects.filter(status='waiting', date_to__lt=today)
+    WaitlistDay.objects.filter(entry__in=stale).delete()
+    expired_entries = stale.update(status='expired', updated_at=timezone.now())
+    WaitlistDay.objects.filter(day__lt=today).delete()
+    return expired_offers, expired_entries
@@ -0,0 +1,139 @@
+"""
+Infraestructura mínima de benchmarks para los caminos críticos de la API.
+
+Cada app declara sus casos en un módulo ``benchmarks.py`` con el decorador
+``benchmark``. Un caso recibe un ``BenchmarkContext`` y retorna una función
+sin argumentos que es la que se cronometra; todo lo que se haga antes de
+retornarla (buscar usuarios, armar requests) queda fuera de la medición.
+"""
+
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import autodiscover_modules
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+
+_registry = {}
+
+
+def benchmark(name, description=''):
+    """Registra un caso de benchmark."""
+    def decorator(func):
+        _registry[name] = (func, description or (func.__doc__ or '').strip())
+        return func
+    return decorator
+
+
+def get_benchmarks():
+    autodiscover_modules('benchmarks')
+    return dict(sorted(_registry.items()))
+
+
+class BenchmarkSkipped(Exception):
+    """El caso no puede ejecutarse con los datos disponibles."""
+
+
+class BenchmarkContext:
+    """Utilidades compartidas por los casos de benchmark."""
+
+    def __init__(self):
+        self.factory = APIRequestFactory(SERVER_NAME='localhost')
+        self._users = {}
+
+    def user(self, role):
+        """Retorna el primer usuario activo con el rol indicado."""
+        if role not in self._users:
+            user = get_user_model().objects.filter(role=role, is_active=True).order_by('id').first()
+            if user is None:
+                raise BenchmarkSkipped(f'No hay usuarios con rol {role!r}; ejecute generate_synthetic_data.')
+            self._users[role] = user
+        return self._users[role]
+
+    def call(self, view, path, user, method='get', data=None, view_kwargs=None, **extra):
+        """
+        Prepara una llamada a la vista autenticada como ``user`` y retorna la
+        función que la ejecuta y renderiza la respuesta.
+        """
+        def run():
+            request = getattr(self.factory, method)(path, data, **extra)
+            force_authenticate(request, user=user)
+            response = view(request, **(view_kwargs or {}))
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code >= 400:
+                raise AssertionError(f'{path} respondió {response.status_code}: {response.content[:200]!r}')
+            return response
+        return run
+
+
+def run_case(func, context, repeat):
+    """Ejecuta un caso y retorna sus tiempos (ms) y cantidad de consultas."""
+    target = func(context)
+    # Una ejecución de calentamiento que además cuenta las consultas SQL
+    with CaptureQueriesContext(connection) as queries:
+        output = target()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        target()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    result = {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(timings[0], 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'queries': len(queries.captured_queries),
+        'repeat': repeat,
+    }
+    # Si el caso produce bytes (o una respuesta no streaming) se informa el throughput
+    size = _output_size(output)
+    if size is not None and result['median_ms'] > 0:
+        result['bytes'] = size
+        result['mb_per_second'] = round(size / (result['median_ms'] / 1000) / 1e6, 2)
+    return result
+
+
+def _output_size(output):
+    if isinstance(output, (bytes, bytearray, str)):
+        return len(output)
+    if getattr(output, 'streaming', True) is False:
+        return len(output.content)
+    return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Compara los resultados con la línea base y retorna una lista de
+    regresiones ``(caso, motivo)``. Se considera regresión un aumento de la
+    mediana mayor a ``threshold`` (fracción) o cualquier consulta SQL extra.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or 'median_ms' not in result:
+            continue
+        if result['median_ms'] > previous['median_ms'] * (1 + threshold):
+            regressions.append((name, (
+                f'mediana {previous["median_ms"]:.2f} ms -> {result["median_ms"]:.2f} ms'
+            )))
+        if result['queries'] > previous['queries']:
+            regressions.append((name, f'consultas {previous["queries"]} -> {result["queries"]}'))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle).get('results', {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results, metadata):
+    with open(path, 'w') as handle:
+        json.dump({'metadata': metadata, 'results': results}, handle, indent=2, sort_keys=True)
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.monitoring.benchmarking import benchmark
+
+# Proceso nuevo que carga la aplicación WSGI (como un worker de gunicorn sin
+# --preload) y atiende una petición autenticada
+FIRST_REQUEST_SCRIPT = '''
+import io, sys
+from fenix_core.wsgi import application
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/v1/professionals/', 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+    'HTTP_AUTHORIZATION': 'Bearer ' + sys.argv[1],
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+statuses = []
+b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+print(statuses[0])
+'''
+
+
+@benchmark('startup_first_request', 'Arranque de un worker hasta responder su primera petición')
+def startup_first_request(ctx):
+    token = str(AccessToken.for_user(ctx.user('patient')))
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'fenix_core.settings')}
+
+    def run():
+        result = subprocess.run(
+            [sys.executable, '-c', FIRST_REQUEST_SCRIPT, token],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=False,
+        )
+        if not result.stdout.startswith('200'):
+            raise AssertionError(f'El worker respondió {result.stdout.strip()!r}: {result.stderr[-300:]}')
+    return run
@@ -0,0 +1,46 @@
+"""
+Backends de caché instrumentados para medir la tasa de aciertos.
+
+Se usan igual que los backends de Django, por ejemplo
+``'BACKEND': 'apps.monitoring.cache.InstrumentedLocMemCache'``.
+"""
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Cuenta hits y misses de ``get`` y ``get_many``."""
+    metrics_label = 'default'
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            CACHE_REQUESTS.inc(backend=self.metrics_label, result='miss')
+            return default
+        CACHE_REQUESTS.inc(backend=self.metrics_label, result='hit')
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version)
+        CACHE_REQUESTS.inc(len(values), backend=self.metrics_label, result='hit')
+        CACHE_REQUESTS.inc(len(keys) - len(values), backend=self.metrics_label, result='miss')
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    metrics_label = 'locmem'
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    metrics_label = 'filebased'
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    metrics_label = 'redis'
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .metrics import EMAIL_QUEUE_DEPTH, EMAIL_MESSAGES, EMAIL_SEND_LATENCY
+
+
+class InstrumentedEmailBackend(BaseEmailBackend):
+    """
+    Backend de correo que delega en ``EMAIL_DELIVERY_BACKEND`` y registra los
+    correos pendientes, enviados y fallidos.
+    """
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(
+            settings.EMAIL_DELIVERY_BACKEND, fail_silently=fail_silently, **kwargs
+        )
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        pending = len(email_messages)
+        if not pending:
+            return 0
+        sent = 0
+        EMAIL_QUEUE_DEPTH.inc(pending)
+        start = time.perf_counter()
+        try:
+            sent = self.backend.send_messages(email_messages) or 0
+        finally:
+            EMAIL_QUEUE_DEPTH.dec(pending)
+            EMAIL_SEND_LATENCY.observe(time.perf_counter() - start)
+            EMAIL_MESSAGES.inc(sent, result='sent')
+            EMAIL_MESSAGES.inc(pending - sent, result='failed')
+        return sent
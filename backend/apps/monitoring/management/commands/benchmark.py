@@ -0,0 +1,90 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+from apps.monitoring.benchmarking import (
+    BenchmarkContext,
+    BenchmarkSkipped,
+    compare,
+    get_benchmarks,
+    load_baseline,
+    run_case,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los benchmarks de los caminos críticos, registra tiempos y consultas SQL '
+        'y los compara con una línea base JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cases', nargs='*', help='Casos a ejecutar (por defecto todos).')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones cronometradas por caso.')
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'),
+                            help='Archivo JSON con la línea base.')
+        parser.add_argument('--save', action='store_true', help='Guarda los resultados como nueva línea base.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Aumento relativo de la mediana considerado regresión.')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Termina con error si se detectan regresiones.')
+        parser.add_argument('--list', action='store_true', help='Lista los casos disponibles.')
+
+    def handle(self, *args, **options):
+        benchmarks = get_benchmarks()
+        if options['list']:
+            for name, (_, description) in benchmarks.items():
+                self.stdout.write(f'{name:32} {description}')
+            return
+
+        selected = options['cases'] or list(benchmarks)
+        unknown = set(selected) - set(benchmarks)
+        if unknown:
+            raise CommandError(f'Casos desconocidos: {", ".join(sorted(unknown))}')
+
+        context = BenchmarkContext()
+        results = {}
+        # Las repeticiones superarían los límites de uso de las vistas (fenix_core/throttling.py)
+        unthrottled = override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}})
+        for name in selected:
+            func, _ = benchmarks[name]
+            try:
+                # Los casos que escriben en la base se deshacen al terminar
+                with unthrottled, transaction.atomic():
+                    results[name] = run_case(func, context, options['repeat'])
+                    transaction.set_rollback(True)
+            except BenchmarkSkipped as exc:
+                self.stdout.write(self.style.WARNING(f'{name:32} omitido: {exc}'))
+                continue
+            result = results[name]
+            throughput = f'  {result["mb_per_second"]:8.2f} MB/s' if 'mb_per_second' in result else ''
+            self.stdout.write(
+                f'{name:32} mediana {result["median_ms"]:9.2f} ms  p95 {result["p95_ms"]:9.2f} ms  '
+                f'consultas {result["queries"]:4d}{throughput}'
+            )
+
+        baseline = load_baseline(options['baseline'])
+        regressions = compare(results, baseline, options['threshold'])
+        for name, reason in regressions:
+            self.stdout.write(self.style.ERROR(f'REGRESIÓN {name}: {reason}'))
+        if baseline and not regressions:
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto de la línea base.'))
+
+        if options['save']:
+            os.makedirs(os.path.dirname(options['baseline']) or '.', exist_ok=True)
+            merged = {**baseline, **results}
+            save_baseline(options['baseline'], merged, {
+                'recorded_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'appointments': Appointment.objects.count(),
+            })
+            self.stdout.write(f'Línea base guardada en {options["baseline"]}')
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'Se detectaron {len(regressions)} regresiones.')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.appointments.dashboard import with_serializer_relations
+from apps.appointments.models import Appointment
+from apps.appointments.serializers import AppointmentSerializer
+from apps.users.models import CustomUser, ProfessionalProfile
+from apps.users.serializers import ProfessionalProfileSerializer, UserSerializer
+from fenix_core.fast_serializers import verify_equivalence
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la serialización compilada con la de DRF sobre datos reales '
+        '(citas, usuarios y perfiles profesionales) y falla ante cualquier diferencia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000, help='Objetos a comparar por serializer.')
+        parser.add_argument('--host', default='localhost',
+                            help='Host de la petición simulada para las URLs absolutas de archivos.')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        request = Request(APIRequestFactory().get('/', HTTP_HOST=options['host']))
+        cases = (
+            (AppointmentSerializer, with_serializer_relations(Appointment.objects.order_by('-start_time'))),
+            # Primero las citas con adjuntos, que recorren el serializer anidado de archivos
+            (AppointmentSerializer, with_serializer_relations(
+                Appointment.objects.filter(attachments__isnull=False).distinct().order_by('id'))),
+            (UserSerializer, CustomUser.objects.select_related('professional_profile').order_by('id')),
+            (ProfessionalProfileSerializer, ProfessionalProfile.objects.order_by('id')),
+        )
+        for serializer_class, queryset in cases:
+            instances = list(queryset[:limit])
+            for context in ({}, {'request': request}):
+                try:
+                    compared = verify_equivalence(serializer_class, instances, context)
+                except AssertionError as exc:
+                    raise CommandError(str(exc))
+                self.stdout.write(
+                    f'{serializer_class.__name__:32} {compared:6} objetos idénticos'
+                    f'{" (con petición)" if context else ""}'
+                )
+        self.stdout.write(self.style.SUCCESS('La serialización compilada coincide con DRF.'))
@@ -0,0 +1,342 @@
+import base64
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.appointments.management.commands.generate_synthetic_data import SYNTHETIC_DOMAIN, DEFAULT_PASSWORD
+
+
+# Mezcla de tráfico por rol: (acción, peso)
+PATIENT_MIX = (
+    ('browse_professionals', 30),
+    ('available_slots', 35),
+    ('my_appointments', 15),
+    ('book', 8),
+    ('token_refresh', 5),
+    ('dashboard_stats', 7),
+)
+STAFF_MIX = (
+    ('dashboard_stats', 35),
+    ('upcoming_appointments', 35),
+    ('my_appointments', 20),
+    ('token_refresh', 10),
+)
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class _Stats:
+    """Acumula latencias y resultados por endpoint de forma thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.client_errors = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.shed = defaultdict(int)
+
+    def record(self, endpoint, latency, status):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if status is None or status >= 500:
+                self.errors[endpoint] += 1
+                if status == 503:
+                    self.shed[endpoint] += 1
+            elif status >= 400:
+                self.client_errors[endpoint] += 1
+                if status == 429:
+                    self.throttled[endpoint] += 1
+
+
+class _Client:
+    """Cliente HTTP con conexión persistente para un usuario virtual."""
+
+    def __init__(self, base_url, stats, timeout):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+        self.connection = None
+        self.access = None
+        self.refresh = None
+        self.user_id = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        self.connection = cls(self.host, timeout=self.timeout)
+
+    def request(self, endpoint, method, path, params=None, body=None):
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if self.access:
+            headers['Authorization'] = f'Bearer {self.access}'
+        if self.connection is None:
+            self._connect()
+
+        start = time.perf_counter()
+        status, data = None, None
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            status = response.status
+            if payload and response.getheader('Content-Type', '').startswith('application/json'):
+                data = json.loads(payload)
+        except (OSError, http.client.HTTPException, ValueError):
+            # Se descarta la conexión y se reintenta en la próxima petición
+            self.connection.close()
+            self.connection = None
+        self.stats.record(endpoint, time.perf_counter() - start, status)
+        return status, data
+
+    def login(self, email, password):
+        """Inicia sesión y retorna el estado HTTP (None si falló la conexión)."""
+        status, data = self.request('token_obtain', 'POST', '/api/v1/users/token/',
+                                    body={'email': email, 'password': password})
+        if status != 200:
+            return status
+        self.access, self.refresh = data['access'], data['refresh']
+        # El ID del usuario viaja en el payload del JWT
+        payload = self.access.split('.')[1]
+        self.user_id = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))['user_id']
+        return status
+
+
+class _VirtualUser(threading.Thread):
+    """Usuario virtual que ejecuta acciones según la mezcla de su rol."""
+
+    def __init__(self, index, email, mix, deadline, options, stats, professional_ids, professional_pages):
+        super().__init__(daemon=True)
+        self.email = email
+        self.mix = mix
+        self.deadline = deadline
+        self.options = options
+        self.rng = random.Random(options['seed'] + index)
+        self.client = _Client(options['base_url'], stats, options['timeout'])
+        self.professional_ids = professional_ids
+        self.professional_pages = professional_pages
+        self.slots = []
+        self.login_status = None
+
+    def run(self):
+        self.login_status = self.client.login(self.email, self.options['password'])
+        if self.login_status != 200:
+            return
+        actions = [action for action, _ in self.mix]
+        weights = [weight for _, weight in self.mix]
+        think_time = self.options['think_time']
+        while time.monotonic() < self.deadline:
+            action = self.rng.choices(actions, weights)[0]
+            getattr(self, action)()
+            if think_time > 0:
+                time.sleep(self.rng.expovariate(1 / think_time))
+
+    # ----- Acciones -----
+
+    def browse_professionals(self):
+        self.client.request('professionals', 'GET', '/api/v1/professionals/',
+                            params={'page': self.rng.randint(1, self.professional_pages)})
+
+    def available_slots(self):
+        if not self.professional_ids:
+            return
+        date_from = date.today() + timedelta(days=self.rng.randint(0, 14))
+        _, data = self.client.request('available_slots', 'GET', '/api/v1/appointments/available-slots/', params={
+            'professional_id': self.rng.choice(self.professional_ids),
+            'date_from': date_from.isoformat(),
+            'date_to': (date_from + timedelta(days=7)).isoformat(),
+        })
+        if isinstance(data, list) and data:
+            self.slots = data
+
+    def book(self):
+        if not self.slots:
+            return self.available_slots()
+        slot = self.slots.pop(self.rng.randrange(len(self.slots)))
+        self.client.request('book', 'POST', '/api/v1/appointments/appointments/', body={
+            'patient': self.client.user_id,
+            'professional': slot['professional_id'],
+            'start_time': slot['start_time'],
+            'end_time': slot['end_time'],
+            'reason': 'Prueba de carga',
+        })
+
+    def my_appointments(self):
+        self.client.request('appointments_list', 'GET', '/api/v1/appointments/appointments/')
+
+    def dashboard_stats(self):
+        self.client.request('dashboard_stats', 'GET', '/api/v1/dashboard/stats/')
+
+    def upcoming_appointments(self):
+        self.client.request('upcoming_appointments', 'GET', '/api/v1/dashboard/upcoming-appointments/')
+
+    def token_refresh(self):
+        status, data = self.client.request('token_refresh', 'POST', '/api/v1/users/token/refresh/',
+                                           body={'refresh': self.client.refresh})
+        if status == 200:
+            self.client.access = data['access']
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera carga HTTP contra un servidor local reproduciendo la mezcla de tráfico de la '
+        'clínica y reporta throughput, latencias p50/p95/p99 y tasa de errores por endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='URL del servidor.')
+        parser.add_argument('--concurrency', type=int, default=20, help='Usuarios virtuales simultáneos.')
+        parser.add_argument('--duration', type=float, default=60, help='Duración de la prueba en segundos.')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Segundos para iniciar todos los usuarios.')
+        parser.add_argument('--think-time', type=float, default=1.0,
+                            help='Pausa media entre acciones en segundos (0 para carga máxima).')
+        parser.add_argument('--staff-ratio', type=float, default=0.15,
+                            help='Fracción de usuarios virtuales que son personal (dashboards).')
+        parser.add_argument('--patients', type=int, default=1000,
+                            help='Cantidad de pacientes sintéticos disponibles para iniciar sesión.')
+        parser.add_argument('--professionals', type=int, default=20,
+                            help='Cantidad de profesionales sintéticos; el personal inicia sesión con cuentas distintas.')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Contraseña de los usuarios sintéticos.')
+        parser.add_argument('--timeout', type=float, default=30, help='Timeout por petición en segundos.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Guarda el reporte en formato JSON en este archivo.')
+
+    def handle(self, *args, **options):
+        stats = _Stats()
+        rng = random.Random(options['seed'])
+
+        # Se obtienen los IDs de profesionales una sola vez antes de iniciar la carga
+        bootstrap = _Client(options['base_url'], _Stats(), options['timeout'])
+        if bootstrap.login(f'admin@{SYNTHETIC_DOMAIN}', options['password']) != 200:
+            raise CommandError(
+                'No se pudo iniciar sesión con los usuarios sintéticos; ejecute generate_synthetic_data '
+                'y verifique --base-url.'
+            )
+        professional_ids = []
+        page = 0
+        while True:
+            page += 1
+            _, data = bootstrap.request('bootstrap', 'GET', '/api/v1/professionals/', params={'page': page})
+            if not data:
+                break
+            professional_ids += [professional['id'] for professional in data.get('results', [])]
+            if not data.get('next'):
+                break
+
+        start = time.monotonic()
+        deadline = start + options['ramp_up'] + options['duration']
+        users = []
+        # Cada usuario virtual usa su propia cuenta mientras alcancen: el personal
+        # rota entre los profesionales y los pacientes se sortean sin repetir
+        staff = 0
+        patients = rng.sample(range(options['patients']), min(options['concurrency'], options['patients']))
+        for index in range(options['concurrency']):
+            if rng.random() < options['staff_ratio']:
+                email, mix = f'profesional{staff % options["professionals"]}@{SYNTHETIC_DOMAIN}', STAFF_MIX
+                staff += 1
+            else:
+                number = patients[index] if index < len(patients) else rng.randrange(options['patients'])
+                email, mix = f'paciente{number}@{SYNTHETIC_DOMAIN}', PATIENT_MIX
+            users.append(_VirtualUser(index, email, mix, deadline, options, stats, professional_ids, page))
+
+        delay = options['ramp_up'] / max(1, len(users))
+        for user in users:
+            user.start()
+            time.sleep(delay)
+        for user in users:
+            user.join()
+        elapsed = time.monotonic() - start
+
+        report = self._report(stats, elapsed)
+        failures = defaultdict(int)
+        for user in users:
+            if user.login_status != 200:
+                failures[str(user.login_status)] += 1
+        report['login_failures'] = dict(failures)
+        self._print(report)
+        throttled, shed = sum(stats.throttled.values()), sum(stats.shed.values())
+        if throttled or shed:
+            self.stderr.write(self.style.WARNING(
+                f'{throttled} peticiones respondieron 429 (límites de uso) y {shed} respondieron 503 '
+                '(descarte de carga). Para medir capacidad, inicie el servidor con THROTTLE_RATE_LOGIN, '
+                'THROTTLE_RATE_LOGIN_IP, THROTTLE_RATE_SLOTS, THROTTLE_RATE_SEARCH y THROTTLE_RATE_STATS vacíos y LOAD_SHED_CAPACITY=0.'
+            ))
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+        if failures:
+            # Los usuarios que no iniciaron sesión no generaron carga: el reporte la subestima
+            detail = ', '.join(f'{count} con estado {status}' for status, count in sorted(failures.items()))
+            raise CommandError(
+                f'{sum(failures.values())} de {len(users)} usuarios virtuales no pudieron iniciar sesión ({detail}).'
+            )
+
+    def _report(self, stats, elapsed):
+        endpoints = {}
+        all_latencies = []
+        for endpoint, latencies in sorted(stats.latencies.items()):
+            latencies.sort()
+            all_latencies.extend(latencies)
+            count = len(latencies)
+            endpoints[endpoint] = {
+                'requests': count,
+                'throughput_rps': round(count / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+                'client_error_rate': round(stats.client_errors[endpoint] / count, 4),
+                'error_rate': round(stats.errors[endpoint] / count, 4),
+                'throttled': stats.throttled[endpoint],
+                'shed': stats.shed[endpoint],
+            }
+        all_latencies.sort()
+        total = len(all_latencies)
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'total': {
+                'requests': total,
+                'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+                'p50_ms': round(percentile(all_latencies, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(all_latencies, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(all_latencies, 0.99) * 1000, 2),
+                'error_rate': round(sum(stats.errors.values()) / total, 4) if total else 0,
+            },
+            'endpoints': endpoints,
+        }
+
+    def _print(self, report):
+        header = f'{"endpoint":24} {"req":>7} {"rps":>8} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"4xx":>7} {"err":>7}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for endpoint, row in report['endpoints'].items():
+            self.stdout.write(
+                f'{endpoint:24} {row["requests"]:7d} {row["throughput_rps"]:8.2f} {row["p50_ms"]:9.2f} '
+                f'{row["p95_ms"]:9.2f} {row["p99_ms"]:9.2f} {row["client_error_rate"]:7.2%} {row["error_rate"]:7.2%}'
+            )
+        total = report['total']
+        self.stdout.write('-' * len(header))
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {total["requests"]} peticiones en {report["elapsed_seconds"]} s '
+            f'({total["throughput_rps"]} req/s), p50 {total["p50_ms"]} ms, p95 {total["p95_ms"]} ms, '
+            f'p99 {total["p99_ms"]} ms, errores {total["error_rate"]:.2%}'
+        ))
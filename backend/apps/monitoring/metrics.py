@@ -0,0 +1,436 @@
+"""
+Subsistema de métricas de FenixClinicas.
+
+Cada proceso acumula contadores, gauges e histogramas en memoria y los vuelca
+periódicamente a un archivo propio dentro de ``METRICS_DIR``. Al exponer las
+métricas se suman los archivos de todos los workers de gunicorn, de modo que
+Prometheus ve un único valor agregado por serie.
+
+Los archivos de procesos muertos se pliegan en ``metrics_dead.json`` (sólo
+contadores e histogramas, que deben seguir siendo monótonos) y se eliminan, de
+modo que el directorio no crece con cada reinicio de workers.
+"""
+
+import atexit
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from django.conf import settings
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Buckets de latencia en segundos (alineados con los de prometheus_client)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Acumulado de los procesos que ya terminaron
+DEAD_FILENAME = 'metrics_dead.json'
+
+
+def _label_key(labels):
+    """Convierte los labels en una tupla ordenada usable como clave."""
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshot(path):
+    """Lee un volcado; ``None`` si no existe o está a medio escribir."""
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+class _Metric:
+    """Base para las métricas registradas."""
+    kind = None
+
+    def __init__(self, registry, name, documentation):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+
+    def describe(self):
+        return {'type': self.kind, 'help': self.documentation}
+
+
+class Counter(_Metric):
+    """Contador monótono."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount:
+            self.registry._add(self.name, _label_key(labels), amount)
+
+
+class Gauge(_Metric):
+    """
+    Valor instantáneo. Entre procesos se suma sólo el valor de los workers vivos
+    (al plegar un proceso muerto sus gauges se descartan).
+    """
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self.registry._set(self.name, _label_key(labels), value)
+
+    def inc(self, amount=1, **labels):
+        self.registry._add(self.name, _label_key(labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.registry._add(self.name, _label_key(labels), -amount)
+
+
+class Histogram(_Metric):
+    """Histograma acumulativo con buckets fijos."""
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation)
+        self.buckets = tuple(sorted(buckets))
+
+    def describe(self):
+        description = super().describe()
+        description['buckets'] = list(self.buckets)
+        return description
+
+    def observe(self, value, **labels):
+        self.registry._observe(self.name, _label_key(labels), self.buckets, value)
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas del proceso con volcado a archivo.
+
+    Los valores se guardan en diccionarios planos protegidos por un lock; el
+    volcado a disco se hace como máximo una vez por ``METRICS_FLUSH_INTERVAL``
+    para que registrar una muestra no cueste más que una suma en memoria.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._values = {}
+        self._pid = os.getpid()
+        self._token = os.urandom(8).hex()
+        self._claimed = False
+        self._last_flush = 0.0
+        self._dirty = False
+        atexit.register(self.flush)
+
+    # ----- Declaración de métricas -----
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation):
+        return self._register(Counter(self, name, documentation))
+
+    def gauge(self, name, documentation):
+        return self._register(Gauge(self, name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, buckets))
+
+    # ----- Configuración -----
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+
+    # ----- Registro de muestras -----
+
+    def _check_fork(self):
+        """Descarta los valores heredados del proceso maestro tras un fork."""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._token = os.urandom(8).hex()
+            self._claimed = False
+            self._values = {}
+            self._last_flush = 0.0
+
+    def _add(self, name, labels, amount):
+        with self._lock:
+            self._check_fork()
+            key = (name, labels)
+            self._values[key] = self._values.get(key, 0) + amount
+            self._dirty = True
+        self._maybe_flush()
+
+    def _set(self, name, labels, value):
+        with self._lock:
+            self._check_fork()
+            self._values[(name, labels)] = value
+            self._dirty = True
+        self._maybe_flush()
+
+    def _observe(self, name, labels, buckets, value):
+        with self._lock:
+            self._check_fork()
+            key = (name, labels)
+            state = self._values.get(key)
+            if state is None:
+                # [conteo por bucket..., suma, cantidad]
+                state = self._values[key] = [0] * len(buckets) + [0.0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+            self._dirty = True
+        self._maybe_flush()
+
+    # ----- Persistencia -----
+
+    def _path_for(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    def _maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _snapshot(self):
+        with self._lock:
+            self._check_fork()
+            samples = [
+                [name, [list(pair) for pair in labels], list(value) if isinstance(value, list) else value]
+                for (name, labels), value in self._values.items()
+            ]
+            self._dirty = False
+        return {
+            'pid': self._pid,
+            'token': self._token,
+            'metrics': {name: metric.describe() for name, metric in self._metrics.items()},
+            'samples': samples,
+        }
+
+    def flush(self):
+        """Escribe los valores del proceso en su archivo de forma atómica."""
+        directory = self.directory
+        self._last_flush = time.monotonic()
+        if not directory or not self._dirty:
+            return
+        snapshot = self._snapshot()
+        os.makedirs(directory, exist_ok=True)
+        path = self._path_for(snapshot['pid'])
+        if not self._claimed:
+            # Un archivo con nuestro pid que no escribimos es de un proceso muerto
+            # cuyo pid se reutilizó: se pliega antes de sobrescribirlo
+            with self._directory_lock():
+                previous = _read_snapshot(path)
+                if previous is not None and previous.get('token') != snapshot['token']:
+                    self._bury([(path, previous)])
+            self._claimed = True
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(snapshot, handle)
+        os.replace(tmp_path, path)
+
+    @contextlib.contextmanager
+    def _directory_lock(self):
+        """Serializa entre procesos el pliegue de archivos de procesos muertos."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _bury(self, dead):
+        """
+        Suma los contadores e histogramas de ``dead`` (pares ``(ruta,
+        volcado)``) en ``DEAD_FILENAME`` y elimina sus archivos. Se llama con
+        el lock del directorio tomado.
+        """
+        dead_path = os.path.join(self.directory, DEAD_FILENAME)
+        merged = _read_snapshot(dead_path) or {'pid': None, 'metrics': {}, 'samples': []}
+        series = {(name, tuple(tuple(pair) for pair in labels)): value
+                  for name, labels, value in merged['samples']}
+        for _, snapshot in dead:
+            for name, labels, value in snapshot['samples']:
+                description = snapshot['metrics'].get(name)
+                if description is None or description['type'] == 'gauge':
+                    continue
+                merged['metrics'][name] = description
+                key = (name, tuple(tuple(pair) for pair in labels))
+                current = series.get(key)
+                if current is None:
+                    series[key] = value
+                elif isinstance(value, list):
+                    series[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    series[key] = current + value
+        merged['samples'] = [[name, [list(pair) for pair in labels], value]
+                             for (name, labels), value in series.items()]
+        tmp_path = f'{dead_path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(merged, handle)
+        os.replace(tmp_path, dead_path)
+        for path, _ in dead:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def _load_snapshots(self):
+        """
+        Lee los volcados de todos los procesos (incluido el actual) y pliega
+        los de procesos muertos en ``DEAD_FILENAME``.
+        """
+        directory = self.directory
+        if not directory:
+            return [self._snapshot()]
+        self._dirty = True
+        self.flush()
+        with self._directory_lock():
+            snapshots = []
+            dead = []
+            for filename in os.listdir(directory):
+                if filename == DEAD_FILENAME or not (filename.startswith('metrics_') and filename.endswith('.json')):
+                    continue
+                path = os.path.join(directory, filename)
+                snapshot = _read_snapshot(path)
+                if snapshot is None:
+                    continue
+                if snapshot['pid'] == self._pid or _pid_alive(snapshot['pid']):
+                    snapshots.append(snapshot)
+                else:
+                    dead.append((path, snapshot))
+            if dead:
+                self._bury(dead)
+            buried = _read_snapshot(os.path.join(directory, DEAD_FILENAME))
+        if buried is not None:
+            snapshots.append(buried)
+        return snapshots
+
+    # ----- Exposición -----
+
+    def collect(self):
+        """
+        Agrega las muestras de todos los procesos.
+
+        Retorna un diccionario ``{nombre: (descripción, {labels: valor})}``.
+        """
+        collected = {}
+        for snapshot in self._load_snapshots():
+            metrics = snapshot['metrics']
+            for name, labels, value in snapshot['samples']:
+                description = metrics.get(name)
+                if description is None:
+                    continue
+                _, series = collected.setdefault(name, (description, {}))
+                key = tuple(tuple(pair) for pair in labels)
+                if isinstance(value, list):
+                    current = series.get(key)
+                    series[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    series[key] = series.get(key, 0) + value
+        return collected
+
+    def render(self):
+        """Genera el texto de exposición en formato Prometheus."""
+        lines = []
+        for name, (description, series) in sorted(self.collect().items()):
+            lines.append(f'# HELP {name} {description["help"]}')
+            lines.append(f'# TYPE {name} {description["type"]}')
+            for labels, value in sorted(series.items()):
+                if description['type'] != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(description['buckets'], value[:-2]):
+                    cumulative += count
+                    le = (('le', _format_value(bound)),)
+                    lines.append(f'{name}_bucket{_format_labels(labels, le)} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels, (("le", "+Inf"),))} {value[-1]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-2])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+# ======= MÉTRICAS DE LA APLICACIÓN =======
+
+REQUEST_LATENCY = registry.histogram(
+    'fenix_http_request_duration_seconds',
+    'Latencia de las peticiones HTTP por ruta, método y código de estado.',
+)
+REQUEST_COUNT = registry.counter(
+    'fenix_http_requests_total',
+    'Peticiones HTTP atendidas por ruta, método y código de estado.',
+)
+DB_QUERIES = registry.counter(
+    'fenix_db_queries_total',
+    'Consultas SQL ejecutadas por ruta.',
+)
+DB_QUERY_TIME = registry.histogram(
+    'fenix_db_query_time_per_request_seconds',
+    'Tiempo acumulado en la base de datos por petición y ruta.',
+)
+DB_CONNECTIONS_OPEN = registry.gauge(
+    'fenix_db_connections_open',
+    'Conexiones a la base de datos abiertas por los workers.',
+)
+CACHE_REQUESTS = registry.counter(
+    'fenix_cache_requests_total',
+    'Lecturas de caché por backend y resultado (hit/miss).',
+)
+EMAIL_QUEUE_DEPTH = registry.gauge(
+    'fenix_email_outbound_pending',
+    'Correos salientes entregados al backend y aún no enviados.',
+)
+EMAIL_MESSAGES = registry.counter(
+    'fenix_email_messages_total',
+    'Correos salientes procesados por resultado.',
+)
+EMAIL_SEND_LATENCY = registry.histogram(
+    'fenix_email_send_duration_seconds',
+    'Tiempo de envío de cada lote de correos.',
+)
@@ -0,0 +1,70 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .metrics import (
+    REQUEST_LATENCY,
+    REQUEST_COUNT,
+    DB_QUERIES,
+    DB_QUERY_TIME,
+    DB_CONNECTIONS_OPEN,
+)
+
+
+class _QueryObserver:
+    """Wrapper de ejecución que cuenta y cronometra las consultas SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def route_label(request):
+    """
+    Etiqueta de ruta de baja cardinalidad: el nombre de la vista resuelta
+    (p. ej. ``appointment-list`` o ``available-slots``).
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class MetricsMiddleware:
+    """
+    Registra latencia, cantidad de peticiones y uso de base de datos por ruta
+    y código de estado.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        observer = _QueryObserver()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            # Todas las bases configuradas (primaria y réplicas de lectura)
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(observer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        route = route_label(request)
+        labels = {'route': route, 'method': request.method, 'status': response.status_code}
+        REQUEST_LATENCY.observe(duration, **labels)
+        REQUEST_COUNT.inc(**labels)
+        DB_QUERIES.inc(observer.count, route=route)
+        DB_QUERY_TIME.observe(observer.duration, route=route)
+        DB_CONNECTIONS_OPEN.set(
+            sum(1 for conn in connections.all(initialized_only=True) if conn.connection is not None)
+        )
+        return response
@@ -0,0 +1,23 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from .metrics import registry, CONTENT_TYPE
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Expone las métricas agregadas de todos los workers en formato Prometheus.
+    Se exige ``METRICS_AUTH_TOKEN`` como token Bearer; sin token configurado el
+    endpoint sólo responde con ``DEBUG`` activo.
+    """
+    token = settings.METRICS_AUTH_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from fenix_core.paginators import EstimatedCountPaginator
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    """Admin para el modelo Notification."""
+    list_display = ('title', 'user', 'type', 'created_at', 'read_at')
+    list_filter = ('type',)
+    list_select_related = ('user',)
+    search_fields = ('user__email', 'title')
+    autocomplete_fields = ('user',)
+    readonly_fields = ('created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
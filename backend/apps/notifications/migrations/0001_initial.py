@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('appointment_created', 'Cita creada'), ('appointment_updated', 'Cita actualizada'), ('appointment_cancelled', 'Cita cancelada'), ('appointment_reminder', 'Recordatorio de cita')], max_length=30, verbose_name='tipo')),
+                ('title', models.CharField(max_length=255, verbose_name='título')),
+                ('message', models.TextField(verbose_name='mensaje')),
+                ('appointment_id', models.BigIntegerField(blank=True, null=True, verbose_name='cita')),
+                ('link', models.CharField(blank=True, max_length=255, verbose_name='enlace')),
+                ('read_at', models.DateTimeField(blank=True, null=True, verbose_name='leída el')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'notificación',
+                'verbose_name_plural': 'notificaciones',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'read_at', '-created_at'], name='notification_user_unread_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('appointment_created', 'Cita creada'), ('appointment_updated', 'Cita actualizada'), ('appointment_cancelled', 'Cita cancelada'), ('appointment_reminder', 'Recordatorio de cita'), ('waitlist_offer', 'Horario ofrecido de la lista de espera')], max_length=30, verbose_name='tipo'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+
+class Notification(models.Model):
+    """
+    Notificación dentro de la aplicación para un usuario. Los tipos coinciden
+    con los eventos que muestra el centro de notificaciones del frontend.
+    """
+    TYPE_CHOICES = (
+        ('appointment_created', _('Cita creada')),
+        ('appointment_updated', _('Cita actualizada')),
+        ('appointment_cancelled', _('Cita cancelada')),
+        ('appointment_reminder', _('Recordatorio de cita')),
+        ('waitlist_offer', _('Horario ofrecido de la lista de espera')),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    type = models.CharField(_('tipo'), max_length=30, choices=TYPE_CHOICES)
+    title = models.CharField(_('título'), max_length=255)
+    message = models.TextField(_('mensaje'))
+    # Sin clave foránea: la cita puede archivarse o eliminarse sin afectar la notificación
+    appointment_id = models.BigIntegerField(_('cita'), null=True, blank=True)
+    link = models.CharField(_('enlace'), max_length=255, blank=True)
+    read_at = models.DateTimeField(_('leída el'), null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('notificación')
+        verbose_name_plural = _('notificaciones')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'read_at', '-created_at'], name='notification_user_unread_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.title}"
+
+    @property
+    def is_read(self):
+        return self.read_at is not None
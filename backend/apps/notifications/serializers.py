@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Serializer para el modelo Notification."""
+    read = serializers.BooleanField(source='is_read', read_only=True)
+    timestamp = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ('id', 'type', 'title', 'message', 'appointment_id', 'link', 'read', 'read_at', 'timestamp')
+        read_only_fields = fields
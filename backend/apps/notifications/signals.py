@@ -0,0 +1,40 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+from apps.appointments.signals import previous_values
+from .models import Notification
+
+
+@receiver(post_save, sender=Appointment)
+def notify_appointment_change(sender, instance, created, raw=False, **kwargs):
+    """Crea notificaciones para el paciente y el profesional al crear o cambiar de estado una cita."""
+    if raw:
+        return
+    previous = previous_values(instance, ('status',))
+    if not created and previous is not None and previous[0] == instance.status:
+        return
+
+    when = timezone.localtime(instance.start_time).strftime('%d/%m/%Y %H:%M')
+    if created:
+        notification_type, title = 'appointment_created', 'Nueva cita programada'
+        message = f'Cita programada para el {when}.'
+    elif instance.status == 'cancelled':
+        notification_type, title = 'appointment_cancelled', 'Cita cancelada'
+        message = f'La cita del {when} fue cancelada.'
+    else:
+        notification_type, title = 'appointment_updated', 'Cita actualizada'
+        message = f'La cita del {when} cambió a "{instance.get_status_display()}".'
+
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            type=notification_type,
+            title=title,
+            message=message,
+            appointment_id=instance.id,
+            link=f'/appointments/{instance.id}',
+        )
+        for user_id in (instance.patient_id, instance.professional_id)
+    ])
@@ -0,0 +1,41 @@
+from django.utils import timezone
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.appointments.dashboard import invalidate_dashboard
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet para las notificaciones del usuario actual.
+    Con ``unread=true`` lista solo las no leídas.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get('unread') == 'true':
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Marca una notificación como leída."""
+        notification = self.get_object()
+        if notification.read_at is None:
+            notification.read_at = timezone.now()
+            notification.save(update_fields=['read_at'])
+            invalidate_dashboard(request.user.id)
+        return Response(self.get_serializer(notification).data)
+
+    @action(detail=False, methods=['post'])
+    def read_all(self, request):
+        """Marca todas las notificaciones del usuario como leídas."""
+        updated = Notification.objects.filter(user=request.user, read_at__isnull=True).update(read_at=timezone.now())
+        if updated:
+            invalidate_dashboard(request.user.id)
+        return Response({'updated': updated})
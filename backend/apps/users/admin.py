@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 
+from fenix_core.paginators import EstimatedCountPaginator
 from .models import CustomUser, ProfessionalProfile
 
 
@@ -32,6 +33,8 @@ class CustomUserAdmin(UserAdmin):
     search_fields = ('email', 'first_name', 'last_name')
     ordering = ('email',)
     inlines = [ProfessionalProfileInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def get_inlines(self, request, obj=None):
         """Solo muestra el perfil profesional para usuarios con rol 'professional'."""
@@ -46,3 +49,5 @@ class ProfessionalProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'specialty', 'license_number', 'consultation_fee')
     search_fields = ('user__email', 'user__first_name', 'user__last_name', 'specialty')
     list_filter = ('specialty',)
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
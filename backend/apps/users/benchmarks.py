@@ -0,0 +1,12 @@
+from apps.monitoring.benchmarking import benchmark
+from .views import PatientsListView, ProfessionalsListView
+
+
+@benchmark('patient_search', 'PatientsListView con búsqueda por texto')
+def patient_search(ctx):
+    return ctx.call(PatientsListView.as_view(), '/api/v1/users/patients/', ctx.user('admin'), data={'search': 'gonz'})
+
+
+@benchmark('professionals_list', 'ProfessionalsListView (primera página)')
+def professionals_list(ctx):
+    return ctx.call(ProfessionalsListView.as_view(), '/api/v1/professionals/', ctx.user('patient'))
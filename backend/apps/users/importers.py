@@ -0,0 +1,237 @@
+"""
+Importación masiva de usuarios desde CSV.
+
+Los archivos se validan fila por fila en una sola pasada y las filas válidas
+se insertan por lotes con ``bulk_create``. Las referencias (emails
+existentes, IDs de usuarios) se resuelven con diccionarios cargados una sola
+vez al inicio, sin consultas por fila. Los usuarios se crean con contraseña
+inutilizable: la definen luego mediante la invitación (ver ``invites.py``).
+"""
+
+import csv
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import models, transaction
+
+from .models import ProfessionalProfile
+
+User = get_user_model()
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportRowError(Exception):
+    """Error de validación de una fila del CSV."""
+
+
+class ImportResult:
+    """Resumen de una importación."""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+        self.created_objects = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows / self.elapsed, 1) if self.elapsed else None,
+        }
+
+
+class BaseCSVImporter:
+    """
+    Esqueleto de importación: ``prepare`` carga los mapas en memoria,
+    ``build`` valida una fila y retorna el objeto a insertar (o lanza
+    ``ImportRowError``), ``save_batch`` inserta un lote y ``finish`` se
+    ejecuta al terminar una importación que insertó filas.
+    """
+    required_columns = ()
+    batch_size = 1000
+
+    def __init__(self, dry_run=False, batch_size=None):
+        self.dry_run = dry_run
+        if batch_size:
+            self.batch_size = batch_size
+
+    def prepare(self):
+        pass
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def save_batch(self, batch):
+        raise NotImplementedError
+
+    def finish(self, result):
+        pass
+
+    def run(self, text_file):
+        """Importa un archivo de texto CSV (con encabezado) y retorna un ``ImportResult``."""
+        result = ImportResult()
+        reader = csv.DictReader(text_file)
+        missing = [column for column in self.required_columns if column not in (reader.fieldnames or ())]
+        if missing:
+            result.add_error(1, f'Faltan columnas obligatorias: {", ".join(missing)}')
+            result.elapsed = time.perf_counter() - result.started
+            return result
+
+        self.prepare()
+        batch = []
+        for line, row in enumerate(reader, start=2):
+            result.rows += 1
+            try:
+                batch.append(self.build({key: (value or '').strip() for key, value in row.items() if key}))
+            except ImportRowError as exc:
+                result.add_error(line, str(exc))
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch, result)
+                batch = []
+        self._flush(batch, result)
+        if result.created and not self.dry_run:
+            self.finish(result)
+        result.elapsed = time.perf_counter() - result.started
+        return result
+
+    def _flush(self, batch, result):
+        if not batch:
+            return
+        if not self.dry_run:
+            with transaction.atomic():
+                result.created_objects.extend(self.save_batch(batch))
+        result.created += len(batch)
+
+    # ----- Helpers de validación -----
+
+    @staticmethod
+    def required(row, column):
+        value = row.get(column, '')
+        if not value:
+            raise ImportRowError(f'El campo {column} es obligatorio.')
+        return value
+
+    @staticmethod
+    def parse_date(value, column):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ImportRowError(f'{column}: fecha inválida {value!r} (formato AAAA-MM-DD).')
+
+    @staticmethod
+    def check_field_limits(obj):
+        """
+        Valida los textos contra ``max_length`` y los importes contra
+        ``max_digits``/``decimal_places`` del modelo: en PostgreSQL un valor
+        excedido aborta el lote entero con ``DataError``.
+        """
+        for field in obj._meta.concrete_fields:
+            if not isinstance(field, (models.CharField, models.DecimalField)):
+                continue
+            value = getattr(obj, field.attname)
+            if value in field.empty_values:
+                continue
+            try:
+                field.run_validators(value)
+            except ValidationError as exc:
+                raise ImportRowError(f'{field.name}: {" ".join(exc.messages)}')
+        return obj
+
+    @staticmethod
+    def parse_decimal(value, column, default=None):
+        if not value:
+            return default
+        try:
+            return Decimal(value.replace(',', '.'))
+        except InvalidOperation:
+            raise ImportRowError(f'{column}: número inválido {value!r}.')
+
+
+class UserImporter(BaseCSVImporter):
+    """Importa usuarios de un rol con contraseña inutilizable."""
+    role = None
+    required_columns = ('email', 'first_name', 'last_name')
+
+    def prepare(self):
+        # Emails ya registrados (y los vistos en el archivo) para detectar duplicados sin consultas
+        self.seen_emails = {email.lower() for email in User.objects.values_list('email', flat=True).iterator()}
+
+    def build_user(self, row):
+        email = User.objects.normalize_email(self.required(row, 'email'))
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise ImportRowError(f'Email inválido: {email!r}.')
+        if email.lower() in self.seen_emails:
+            raise ImportRowError(f'El email {email} ya existe.')
+        self.seen_emails.add(email.lower())
+
+        return self.check_field_limits(User(
+            email=email,
+            first_name=self.required(row, 'first_name'),
+            last_name=self.required(row, 'last_name'),
+            role=self.role,
+            phone_number=row.get('phone_number', ''),
+            address=row.get('address', ''),
+            date_of_birth=self.parse_date(row.get('date_of_birth'), 'date_of_birth'),
+            # Contraseña inutilizable: no ejecuta el hash PBKDF2
+            password=make_password(None),
+        ))
+
+    def build(self, row):
+        return self.build_user(row)
+
+    def save_batch(self, batch):
+        return User.objects.bulk_create(batch)
+
+
+class PatientImporter(UserImporter):
+    role = 'patient'
+
+
+class ProfessionalImporter(UserImporter):
+    """Importa profesionales junto con su perfil profesional."""
+    role = 'professional'
+    required_columns = UserImporter.required_columns + ('specialty', 'license_number')
+
+    def build(self, row):
+        user = self.build_user(row)
+        profile = ProfessionalProfile(
+            specialty=self.required(row, 'specialty'),
+            license_number=self.required(row, 'license_number'),
+            education=row.get('education', ''),
+            experience=row.get('experience', ''),
+            consultation_fee=self.parse_decimal(row.get('consultation_fee'), 'consultation_fee', Decimal('0')),
+        )
+        return user, self.check_field_limits(profile)
+
+    def save_batch(self, batch):
+        # bulk_create no dispara create_professional_profile: los perfiles se insertan aquí
+        users = User.objects.bulk_create([user for user, _ in batch])
+        profiles = []
+        for user, (_, profile) in zip(users, batch):
+            profile.user = user
+            profiles.append(profile)
+        ProfessionalProfile.objects.bulk_create(profiles)
+        return users
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+User = get_user_model()
+
+INVITES_PER_CONNECTION = 100
+
+
+def make_invite_token(user):
+    """Token de un solo uso para que el usuario defina su contraseña."""
+    return f'{urlsafe_base64_encode(force_bytes(user.pk))}.{default_token_generator.make_token(user)}'
+
+
+def resolve_invite_token(token):
+    """Retorna el usuario del token si es válido, o None."""
+    try:
+        uidb64, user_token = token.split('.', 1)
+        user = User.objects.get(pk=force_str(urlsafe_base64_decode(uidb64)))
+    except (ValueError, User.DoesNotExist):
+        return None
+    if not default_token_generator.check_token(user, user_token):
+        return None
+    return user
+
+
+def send_invites(users):
+    """
+    Envía las invitaciones para definir contraseña reutilizando una conexión
+    SMTP por cada bloque de correos. Retorna la cantidad de correos enviados.
+    """
+    if not settings.EMAIL_HOST_USER:
+        return 0
+
+    sent = 0
+    users = list(users)
+    for start in range(0, len(users), INVITES_PER_CONNECTION):
+        messages = [
+            EmailMessage(
+                'Bienvenido a FenixClinicas',
+                (
+                    f'Hola {user.get_full_name()},\n\n'
+                    'Se creó tu cuenta en FenixClinicas. Para definir tu contraseña ingresá a:\n'
+                    f'{settings.FRONTEND_URL}/reset-password?token={make_invite_token(user)}\n'
+                ),
+                settings.DEFAULT_FROM_EMAIL,
+                [user.email],
+            )
+            for user in users[start:start + INVITES_PER_CONNECTION]
+        ]
+        with get_connection(fail_silently=True) as connection:
+            sent += connection.send_messages(messages) or 0
+    return sent
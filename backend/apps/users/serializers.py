@@ -3,7 +3,9 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from fenix_core.fast_serializers import cache_fragments
 from .models import ProfessionalProfile
+from .invites import resolve_invite_token
 
 User = get_user_model()
 
@@ -46,6 +48,11 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+# La representación de un usuario (perfil profesional incluido) se reutiliza
+# entre filas y peticiones mientras no cambie su updated_at
+cache_fragments(UserSerializer, version_attr='updated_at')
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer para el registro de usuarios.
@@ -120,3 +127,22 @@ class PasswordChangeSerializer(serializers.Serializer):
         if not user.check_password(value):
             raise serializers.ValidationError("La contraseña actual es incorrecta.")
         return value
+
+
+class PasswordResetConfirmSerializer(serializers.Serializer):
+    """
+    Serializer para definir una contraseña nueva a partir de un token de invitación.
+    """
+    token = serializers.CharField(required=True)
+    password = serializers.CharField(required=True, validators=[validate_password])
+    password2 = serializers.CharField(required=True)
+
+    def validate(self, attrs):
+        if attrs['password'] != attrs['password2']:
+            raise serializers.ValidationError({"password": "Las contraseñas no coinciden."})
+
+        user = resolve_invite_token(attrs['token'])
+        if user is None:
+            raise serializers.ValidationError({"token": "El enlace es inválido o ha expirado."})
+        attrs['user'] = user
+        return attrs
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from .models import ProfessionalProfile
+from .serializers import ProfessionalProfileSerializer
 
 User = get_user_model()
 
@@ -26,3 +28,46 @@ def save_professional_profile(sender, instance, **kwargs):
             instance.professional_profile.save()
         else:
             ProfessionalProfile.objects.create(user=instance)
+
+
+# Campos del perfil que UserSerializer muestra anidados (los de ProfessionalProfileSerializer)
+DISPLAYED_PROFILE_FIELDS = tuple(ProfessionalProfileSerializer.Meta.fields)
+
+
+def _displayed_values(profile):
+    # Se lee de __dict__ para no cargar campos diferidos; los ausentes quedan como None
+    return tuple(profile.__dict__.get(field) for field in DISPLAYED_PROFILE_FIELDS)
+
+
+@receiver(post_init, sender=ProfessionalProfile)
+def remember_displayed_values(sender, instance, **kwargs):
+    """Guarda los valores mostrados del perfil tal como se cargaron."""
+    instance._displayed_values = _displayed_values(instance)
+
+
+def _touch_owner(profile):
+    now = timezone.now()
+    User.objects.filter(pk=profile.user_id).update(updated_at=now)
+    if ProfessionalProfile.user.is_cached(profile):
+        profile.user.updated_at = now
+
+
+@receiver(post_save, sender=ProfessionalProfile)
+def touch_profile_owner(sender, instance, created, **kwargs):
+    """
+    El perfil se muestra anidado en la representación del usuario: si cambió
+    alguno de los campos mostrados se actualiza su updated_at para que la caché
+    de fragmentos use otra clave. Los guardados sin cambios (como el de
+    ``save_professional_profile``) no tocan al usuario.
+    """
+    current = _displayed_values(instance)
+    previous = getattr(instance, '_displayed_values', None)
+    instance._displayed_values = current
+    if created or previous is None or None in previous or current != previous:
+        _touch_owner(instance)
+
+
+@receiver(post_delete, sender=ProfessionalProfile)
+def touch_deleted_profile_owner(sender, instance, **kwargs):
+    """Al borrar el perfil el usuario deja de mostrarlo."""
+    _touch_owner(instance)
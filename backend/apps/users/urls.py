@@ -10,8 +10,11 @@ from .views import (
     ProfessionalsListView,
     PatientsListView,
     PatientDetailView,
+    PasswordResetConfirmView,
+    CSVImportView,
     CustomTokenObtainPairView
 )
+from .importers import PatientImporter, ProfessionalImporter
 
 urlpatterns = [
     # Autenticación
@@ -22,6 +25,12 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('me/', CurrentUserView.as_view(), name='current_user'),
     path('change-password/', PasswordChangeView.as_view(), name='change_password'),
+    path('password-reset-confirm/', PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
+    
+    # Importación masiva (solo administradores)
+    path('import/patients/', CSVImportView.as_view(importer_class=PatientImporter), name='import_patients'),
+    path('import/professionals/', CSVImportView.as_view(importer_class=ProfessionalImporter),
+         name='import_professionals'),
     
     # Listados (para admin)
     path('', UserListView.as_view(), name='user_list'),
@@ -3,17 +3,25 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from django.contrib.auth import get_user_model
 from django.db.models import Q
+import io
 
 from .serializers import (
     UserSerializer, 
     UserRegistrationSerializer, 
     UserUpdateSerializer,
     PasswordChangeSerializer,
+    PasswordResetConfirmSerializer,
     CustomTokenObtainPairSerializer
 )
 from .permissions import IsOwnerOrAdmin, IsAdminUser
+from .importers import UserImporter
+from fenix_core.fast_serializers import FastSerializerMixin
+from fenix_core.idempotency import idempotent
+from fenix_core.throttling import LoginIPThrottle, LoginThrottle
+from .invites import send_invites
 
 User = get_user_model()
 
@@ -21,8 +29,10 @@ User = get_user_model()
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
     View personalizada para obtener tokens JWT con datos adicionales del usuario.
+    Cada intento calcula PBKDF2: se limita por IP (``login_ip``) y por IP y correo (``login``).
     """
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginIPThrottle, LoginThrottle]
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -100,6 +110,54 @@ class PasswordChangeView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class PasswordResetConfirmView(APIView):
+    """
+    View para definir la contraseña a partir de un token de invitación o recuperación.
+    No requiere autenticación.
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        serializer = PasswordResetConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        user.set_password(serializer.validated_data['password'])
+        user.save()
+        return Response({'message': 'Contraseña definida con éxito'}, status=status.HTTP_200_OK)
+
+
+class CSVImportView(APIView):
+    """
+    View genérica para importación masiva desde un archivo CSV (campo ``file``).
+    Solo administradores. Parámetros opcionales: ``dry_run`` (solo valida) y
+    ``send_invites`` (envía la invitación para definir contraseña a los usuarios creados).
+    Acepta ``Idempotency-Key``: un reintento de la misma importación no la repite.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    parser_classes = [MultiPartParser]
+    importer_class = None
+    
+    @idempotent
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Se requiere un archivo CSV en el campo "file".'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = request.data.get('dry_run') in ('true', '1')
+        importer = self.importer_class(dry_run=dry_run)
+        # utf-8-sig descarta el BOM que agrega Excel al guardar como CSV
+        result = importer.run(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+        
+        data = result.as_dict()
+        if request.data.get('send_invites') in ('true', '1') and isinstance(importer, UserImporter):
+            data['invites_sent'] = send_invites(result.created_objects)
+        
+        if result.rows == 0 and result.error_count:
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+
 class UserListView(generics.ListAPIView):
     """
     View para listar usuarios.
@@ -120,7 +178,7 @@ class UserListView(generics.ListAPIView):
         return queryset
 
 
-class ProfessionalsListView(generics.ListAPIView):
+class ProfessionalsListView(FastSerializerMixin, generics.ListAPIView):
     """
     View para listar profesionales (accesible para todos los usuarios autenticados).
     """
@@ -132,26 +190,28 @@ class ProfessionalsListView(generics.ListAPIView):
         Obtiene solo usuarios con rol 'professional'.
         Opcionalmente filtra por especialidad.
         """
-        queryset = User.objects.filter(role='professional')
+        queryset = User.objects.filter(role='professional').select_related('professional_profile')
         specialty = self.request.query_params.get('specialty', None)
         if specialty:
             queryset = queryset.filter(professional_profile__specialty=specialty)
         return queryset
 
 
-class PatientsListView(generics.ListAPIView):
+class PatientsListView(FastSerializerMixin, generics.ListAPIView):
     """
     View para listar pacientes (accesible para todos los usuarios autenticados).
+    Búsqueda de baja prioridad: se descarta primero ante sobrecarga.
     """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'search'
     
     def get_queryset(self):
         """
         Obtiene solo usuarios con rol 'patient'.
         Opcionalmente filtra por nombre, email o teléfono.
         """
-        queryset = User.objects.filter(role='patient')
+        queryset = User.objects.filter(role='patient').select_related('professional_profile')
         
         # Filtrar por término de búsqueda
         search = self.request.query_params.get('search', None)
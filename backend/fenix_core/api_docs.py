@@ -0,0 +1,94 @@
+"""
+Documentación de la API servida desde un esquema OpenAPI precalculado.
+
+El esquema se lee una vez por proceso desde ``OPENAPI_SCHEMA_PATH`` (generado
+al construir la imagen) y se sirve desde memoria con ETag. Si el archivo no
+existe (desarrollo) se genera en la primera petición con ``openapi.py``; en
+ambos casos drf_yasg no se importa al cargar las URLs. Swagger UI y ReDoc
+son páginas estáticas que leen ese esquema con los recursos de drf_yasg.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.templatetags.static import static
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+_schema = None
+_lock = threading.Lock()
+
+SWAGGER_UI_PAGE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>FenixClinicas API</title>
+<link rel="stylesheet" href="{css}">
+</head>
+<body>
+<div id="swagger-ui"></div>
+<script src="{js}"></script>
+<script>SwaggerUIBundle({{url: "{schema_url}", dom_id: "#swagger-ui", deepLinking: true}});</script>
+</body>
+</html>
+"""
+
+REDOC_PAGE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>FenixClinicas API</title>
+</head>
+<body>
+<redoc spec-url="{schema_url}"></redoc>
+<script src="{js}"></script>
+</body>
+</html>
+"""
+
+
+def load_schema():
+    """``(contenido, etag)`` del esquema, leído o generado una sola vez por proceso."""
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                try:
+                    with open(settings.OPENAPI_SCHEMA_PATH, 'rb') as handle:
+                        content = handle.read()
+                except FileNotFoundError:
+                    from .openapi import generate_schema
+                    content = generate_schema()
+                _schema = (content, f'"{hashlib.sha1(content).hexdigest()}"')
+    return _schema
+
+
+@require_GET
+def openapi_schema(request):
+    content, etag = load_schema()
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+@require_GET
+def swagger_ui(request):
+    return HttpResponse(SWAGGER_UI_PAGE.format(
+        css=static('drf-yasg/swagger-ui-dist/swagger-ui.css'),
+        js=static('drf-yasg/swagger-ui-dist/swagger-ui-bundle.js'),
+        schema_url=reverse('schema-json'),
+    ))
+
+
+@require_GET
+def redoc(request):
+    return HttpResponse(REDOC_PAGE.format(
+        js=static('drf-yasg/redoc/redoc.min.js'),
+        schema_url=reverse('schema-json'),
+    ))
@@ -0,0 +1,172 @@
+"""
+Enrutamiento de lecturas a réplicas con consistencia "read-your-writes".
+
+``ReplicaRoutingMiddleware`` decide por petición si las lecturas pueden ir a
+una réplica: solo las peticiones de la API con métodos seguros, y solo si el
+usuario no escribió en los últimos ``REPLICA_STICKY_SECONDS`` (ventana
+pegajosa guardada en la caché compartida, para que valga entre workers).
+Toda escritura y todo lo que ocurre fuera de una petición (comandos, shell,
+tareas) usa ``default``.
+
+``ReplicaRouter`` elige entre las réplicas sanas en round-robin y descarta
+las que superan ``REPLICA_MAX_LAG_SECONDS`` de retraso o no responden; el
+estado de cada réplica se mide como mucho cada ``REPLICA_CHECK_INTERVAL``
+segundos por proceso.
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from apps.monitoring.metrics import registry
+
+PRIMARY = 'default'
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+STICKY_CACHE_PREFIX = 'db:primary:'
+
+DB_ROUTED_READS = registry.counter(
+    'fenix_db_routed_reads_total',
+    'Decisiones de enrutamiento de lecturas por base de datos (primaria o réplica).',
+)
+
+# Estado de la petición en curso: None fuera de una petición (se usa la primaria)
+_routing = ContextVar('db_routing', default=None)
+
+
+class _RequestRouting:
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+class _ReplicaHealth:
+    """Caché por proceso del retraso medido de cada réplica."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def is_usable(self, alias):
+        now = time.monotonic()
+        checked_at, usable = self._checked.get(alias, (None, True))
+        if checked_at is not None and now - checked_at < settings.REPLICA_CHECK_INTERVAL:
+            return usable
+        with self._lock:
+            lag = replica_lag(alias)
+            usable = lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+            self._checked[alias] = (now, usable)
+        return usable
+
+
+def replica_lag(alias):
+    """
+    Retraso de replicación en segundos, o None si la réplica no responde.
+    En motores sin replicación nativa (SQLite en desarrollo) se asume 0.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            # Sin WAL pendiente el retraso es 0 aunque el último commit sea viejo
+            cursor.execute(
+                'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+            )
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        return None
+
+
+class ReplicaRouter:
+    """Router de base de datos: escrituras a ``default``, lecturas seguras a las réplicas."""
+
+    def __init__(self):
+        self.replicas = list(getattr(settings, 'DATABASE_REPLICAS', ()))
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._health = _ReplicaHealth()
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        alias = PRIMARY
+        if state is not None and state.use_replica and not state.wrote:
+            alias = self._pick_replica()
+        DB_ROUTED_READS.inc(database=alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación
+        return db == PRIMARY
+
+    def _pick_replica(self):
+        for _ in range(len(self.replicas)):
+            alias = next(self._cycle)
+            if self._health.is_usable(alias):
+                return alias
+        return PRIMARY
+
+
+def _sticky_key(request):
+    """
+    Identifica la sesión del usuario: el token JWT (la autenticación de DRF
+    aún no corrió), la sesión de Django o, para anónimos, la IP.
+    """
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    session = getattr(request, 'session', None)
+    if authorization:
+        source = authorization
+    elif session is not None and session.session_key:
+        source = session.session_key
+    else:
+        source = request.META.get('REMOTE_ADDR', '')
+    return STICKY_CACHE_PREFIX + hashlib.sha1(source.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Marca cada petición como apta o no para leer de réplicas y, si la
+    petición escribió, fija a su usuario en la primaria durante la ventana
+    pegajosa para que sus siguientes lecturas vean sus propios cambios.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'DATABASE_REPLICAS', None):
+            return self.get_response(request)
+
+        key = _sticky_key(request)
+        use_replica = (
+            request.method in SAFE_METHODS
+            and request.path.startswith('/api/')
+            and not cache.get(key)
+        )
+        state = _RequestRouting(use_replica)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            cache.set(key, 1, timeout=settings.REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,469 @@
+"""
+Serialización compilada para los endpoints de lectura más usados.
+
+``compile_serializer`` recorre una vez los campos de un ``Serializer`` de DRF
+y genera una función plana ``(obj, request) -> dict`` que produce la misma
+salida que ``serializer.data`` sin el despacho por campo de DRF
+(``get_attribute`` + ``to_representation`` + ``SkipField`` por cada valor).
+Los serializers anidados se compilan recursivamente.
+
+Solo se compilan los campos cuya representación no depende de la instancia
+del serializer: si aparece un campo no soportado (``SerializerMethodField``,
+``source='*'``, relaciones hipervinculadas, ...) ``compile_serializer``
+retorna ``None`` y la vista usa DRF sin cambios. Si durante la ejecución un
+atributo no existe (el caso en que DRF omite el campo), ese objeto se
+serializa con DRF.
+
+Los serializers registrados con ``cache_fragments`` (p. ej. ``UserSerializer``)
+se cachean como fragmentos: la representación de cada objeto se guarda en la
+caché de Django bajo (pk, ``updated_at``), con una copia acotada en memoria
+del proceso delante, y dentro de una misma respuesta se resuelve una sola
+vez, de modo que el usuario anidado en cada fila de un listado pasa a ser una
+búsqueda en un diccionario.
+
+``FastSerializerMixin`` aplica la versión compilada en ``list`` y ``retrieve``
+de las vistas que lo incluyen; ``verify_equivalence`` compara ambas salidas.
+"""
+
+import hashlib
+import inspect
+from functools import lru_cache, partialmethod
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Manager, Model
+from django.utils.encoding import force_str
+from django.utils.functional import cached_property
+from django.utils.translation import get_language
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.fields import is_simple_callable
+from rest_framework.settings import api_settings
+
+FAST_ACTIONS = frozenset(('list', 'retrieve'))
+
+# Campos cuya representación es ``str(valor)`` / ``int(valor)`` en DRF
+_STR_FIELDS = (drf_fields.CharField,)
+_INT_FIELDS = (drf_fields.IntegerField,)
+# Campos con ``to_representation`` independiente del contexto: se llama al
+# método del campo ya construido
+_BOUND_FIELDS = (
+    drf_fields.BooleanField, drf_fields.FloatField, drf_fields.DecimalField,
+    drf_fields.DateTimeField, drf_fields.DateField, drf_fields.TimeField, drf_fields.DurationField, drf_fields.UUIDField, drf_fields.JSONField,
+    drf_fields.ListField, drf_fields.DictField,
+)
+
+
+# Serializer -> atributo de versión de sus fragmentos cacheados
+_fragment_versions = {}
+
+
+class FastPathFallback(Exception):
+    """El objeto no puede serializarse por la vía compilada; se usa DRF."""
+
+
+class NotCompilable(Exception):
+    """El serializer tiene campos que la vía compilada no reproduce."""
+
+
+def _resolve(instance, attrs):
+    """``rest_framework.fields.get_attribute`` con fallback en vez de ``SkipField``."""
+    for attr in attrs:
+        try:
+            instance = getattr(instance, attr)
+        except ObjectDoesNotExist:
+            return None
+        except AttributeError:
+            raise FastPathFallback(attr)
+        if is_simple_callable(instance):
+            instance = instance()
+    return instance
+
+
+def _related_or_none(instance, attr):
+    """Relación inversa uno a uno: None si no existe, como en DRF."""
+    try:
+        return getattr(instance, attr)
+    except ObjectDoesNotExist:
+        return None
+
+
+class _ChoiceDisplay:
+    """
+    ``get_<campo>_display`` sin reconstruir y traducir las opciones en cada
+    llamada: las etiquetas se resuelven una vez por idioma activo.
+    """
+
+    def __init__(self, model_field):
+        self.model_field = model_field
+        self.tables = {}
+
+    def __call__(self, value):
+        language = get_language()
+        table = self.tables.get(language)
+        if table is None:
+            table = self.tables[language] = {
+                key: force_str(label, strings_only=True) for key, label in self.model_field.flatchoices
+            }
+        try:
+            return table[value]
+        except (KeyError, TypeError):
+            return force_str(value, strings_only=True)
+
+
+def _file_url(value, request, use_url):
+    """``FileField.to_representation`` con la petición recibida por parámetro."""
+    if not value:
+        return None
+    if use_url:
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+    return value.name
+
+
+def _iter_related(value):
+    return value.all() if isinstance(value, Manager) else value
+
+
+class ResponseFragments(dict):
+    """
+    Fragmentos ya resueltos en la respuesta en curso, para no buscar dos
+    veces en la caché al mismo usuario. Guarda también la URL base de la
+    petición, que forma parte de la clave porque las URLs de archivos son
+    absolutas.
+    """
+
+    def __init__(self, request=None):
+        super().__init__()
+        self.base_url = request.build_absolute_uri('/') if request is not None else ''
+
+
+class FragmentCache:
+    """Envuelve la función compilada de un serializer registrado con ``cache_fragments``."""
+
+    def __init__(self, serializer_class, function, version_attr):
+        self.function = function
+        self.version_attr = version_attr
+        # Copia local: la clave incluye la versión, así que nunca queda desactualizada
+        self.local = {}
+        # El código generado forma parte del prefijo: un cambio de campos no lee fragmentos viejos
+        digest = hashlib.sha1(function.source.encode()).hexdigest()[:10]
+        self.prefix = f'fragment:{serializer_class.__name__}:{digest}'
+
+    def __call__(self, obj, request=None, fragments=None):
+        version = getattr(obj, self.version_attr, None)
+        if version is None:
+            return self.function(obj, request, fragments)
+        if fragments is None:
+            fragments = ResponseFragments(request)
+        base = hashlib.sha1(fragments.base_url.encode()).hexdigest()[:10] if fragments.base_url else '-'
+        key = f'{self.prefix}:{obj.pk}:{version.isoformat()}:{base}'
+        data = fragments.get(key)
+        if data is None:
+            data = self.local.get(key)
+            if data is None:
+                data = cache.get(key)
+                if data is None:
+                    data = self.function(obj, request, fragments)
+                    cache.set(key, data, settings.FRAGMENT_CACHE_SECONDS)
+                if len(self.local) >= settings.FRAGMENT_LOCAL_MAX_ENTRIES:
+                    self.local.clear()
+                self.local[key] = data
+            fragments[key] = data
+        return data
+
+
+def cache_fragments(serializer_class, version_attr='updated_at'):
+    """
+    Cachea la representación compilada de ``serializer_class`` por (pk,
+    ``version_attr``). El atributo de versión debe cambiar cada vez que
+    cambia algo de lo que el serializer muestra.
+    """
+    _fragment_versions[serializer_class] = version_attr
+    _entry.cache_clear()
+    compile_serializer.cache_clear()
+
+
+class _Builder:
+    """Genera el código fuente de la función de un serializer."""
+
+    def __init__(self, serializer):
+        self.serializer = serializer
+        self.model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        self.namespace = {
+            '_resolve': _resolve,
+            '_related_or_none': _related_or_none,
+            '_file_url': _file_url,
+            '_iter_related': _iter_related,
+        }
+        self.lines = []
+        self.items = []
+
+    def bind(self, prefix, value):
+        name = f'_{prefix}{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def access(self, field):
+        """Expresión que obtiene el atributo de ``obj`` igual que ``field.get_attribute``."""
+        attrs = field.source_attrs
+        if not attrs:
+            raise NotCompilable(f'{field.field_name}: source="*"')
+        if isinstance(field, relations.RelatedField):
+            model_field = self._concrete_field(attrs[0]) if len(attrs) == 1 else None
+            if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None \
+                    and model_field is not None and model_field.is_relation:
+                # Equivale a PKOnlyObject: basta la columna ``<campo>_id``
+                return f'obj.{model_field.attname}', True
+            raise NotCompilable(f'{field.field_name}: {type(field).__name__}')
+        if len(attrs) == 1:
+            expression = self._single_access(attrs[0])
+            if expression is not None:
+                return expression, False
+        # Rutas con puntos y atributos que no se pueden clasificar de antemano
+        return f'_resolve(obj, {tuple(attrs)!r})', False
+
+    def _single_access(self, name):
+        """Acceso directo para columnas, relaciones, propiedades y métodos del modelo."""
+        if self.model is None:
+            return None
+        model_field = self._concrete_field(name)
+        if model_field is not None:
+            return f'obj.{model_field.name}'
+        try:
+            relation = self.model._meta.get_field(name)
+        except Exception:
+            relation = None
+        if relation is not None and relation.is_relation:
+            if relation.one_to_one:
+                return f'_related_or_none(obj, {name!r})'
+            return f'obj.{name}'
+        static = inspect.getattr_static(self.model, name, None)
+        if isinstance(static, partialmethod) and static.func is Model._get_FIELD_display:
+            display = self.bind('display', _ChoiceDisplay(static.keywords['field']))
+            return f'{display}(obj.{static.keywords["field"].attname})'
+        if isinstance(static, (property, cached_property)):
+            return f'obj.{name}'
+        if inspect.isfunction(static) and is_simple_callable(getattr(self.model.__new__(self.model), name)):
+            return f'obj.{name}()'
+        return None
+
+    def _concrete_field(self, name):
+        if self.model is None:
+            return None
+        try:
+            model_field = self.model._meta.get_field(name)
+        except Exception:
+            return None
+        return model_field if getattr(model_field, 'concrete', False) else None
+
+    def convert(self, field, var):
+        """Expresión que representa ``var`` (ya distinto de None) como lo haría ``field``."""
+        if isinstance(field, serializers.ListSerializer):
+            child = self.bind('child', _entry(type(field.child), _field_set(field.child)))
+            return f'[{child}(item, request, fragments) for item in _iter_related({var})]'
+        if isinstance(field, serializers.BaseSerializer):
+            nested = self.bind('nested', _entry(type(field), _field_set(field)))
+            return f'{nested}({var}, request, fragments)'
+        if isinstance(field, (drf_fields.SerializerMethodField, drf_fields.HiddenField)):
+            raise NotCompilable(f'{field.field_name}: {type(field).__name__}')
+        if isinstance(field, drf_fields.FileField):
+            use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+            return f'_file_url({var}, request, {bool(use_url)!r})'
+        if isinstance(field, drf_fields.ChoiceField) and not isinstance(field, drf_fields.MultipleChoiceField):
+            choices = self.bind('choices', dict(field.choice_strings_to_values))
+            return f"({var} if {var} == '' else {choices}.get(str({var}), {var}))"
+        if isinstance(field, drf_fields.ReadOnlyField):
+            return var
+        if isinstance(field, _INT_FIELDS) and type(field).to_representation is drf_fields.IntegerField.to_representation:
+            return f'int({var})'
+        if isinstance(field, _STR_FIELDS) and type(field).to_representation is drf_fields.CharField.to_representation:
+            return f'str({var})'
+        if isinstance(field, _BOUND_FIELDS):
+            method = self.bind('to_repr', field.to_representation)
+            return f'{method}({var})'
+        raise NotCompilable(f'{field.field_name}: {type(field).__name__}')
+
+    def build(self):
+        for index, field in enumerate(self.serializer._readable_fields):
+            expression, is_pk = self.access(field)
+            var = f'v{index}'
+            self.lines.append(f'    {var} = {expression}')
+            value = var if is_pk else self.convert(field, var)
+            if value == var:
+                self.items.append(f'        {field.field_name!r}: {var},')
+            else:
+                self.items.append(f'        {field.field_name!r}: None if {var} is None else {value},')
+        source = '\n'.join([
+            'def serialize(obj, request=None, fragments=None):',
+            *self.lines,
+            '    return {',
+            *self.items,
+            '    }',
+        ])
+        exec(compile(source, f'<fast {type(self.serializer).__name__}>', 'exec'), self.namespace)
+        function = self.namespace['serialize']
+        function.source = source
+        return function
+
+
+def _field_set(serializer):
+    return tuple(field.field_name for field in serializer._readable_fields)
+
+
+@lru_cache(maxsize=None)
+def _compile(serializer_class, field_set=None):
+    serializer = serializer_class()
+    function = _Builder(serializer).build()
+    if field_set is not None and _field_set(serializer) != field_set:
+        raise NotCompilable(f'{serializer_class.__name__}: conjunto de campos distinto')
+    return function
+
+
+@lru_cache(maxsize=None)
+def _entry(serializer_class, field_set=None):
+    """Función compilada, envuelta en la caché de fragmentos si está registrada."""
+    function = _compile(serializer_class, field_set)
+    if serializer_class in _fragment_versions:
+        return FragmentCache(serializer_class, function, _fragment_versions[serializer_class])
+    return function
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """
+    Función compilada ``(obj, request=None, fragments=None) -> dict`` para
+    ``serializer_class``, o None si tiene campos no soportados.
+    """
+    try:
+        return _entry(serializer_class)
+    except NotCompilable:
+        return None
+
+
+class FastSerializer:
+    """
+    Sustituto de solo lectura de un serializer de DRF para ``list``/``retrieve``:
+    expone ``.data`` calculado con la función compilada.
+    """
+
+    def __init__(self, serializer_class, function, instance, many=False, context=None):
+        self.serializer_class = serializer_class
+        self.function = function
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    def _one(self, obj, request, fragments):
+        try:
+            return self.function(obj, request, fragments)
+        except FastPathFallback:
+            return self.serializer_class(obj, context=self.context).data
+
+    @property
+    def data(self):
+        request = self.context.get('request')
+        fragments = self.context.get('fragments')
+        if fragments is None:
+            fragments = ResponseFragments(request)
+        if self.many:
+            return [self._one(obj, request, fragments) for obj in _iter_related(self.instance)]
+        return self._one(self.instance, request, fragments)
+
+
+def serialize(serializer_class, instance, many=False, context=None):
+    """
+    ``serializer_class(instance, many=many, context=context).data`` por la vía
+    compilada cuando el serializer lo admite. Pasando el mismo
+    ``ResponseFragments`` en ``context['fragments']`` varias llamadas
+    comparten los fragmentos ya resueltos.
+    """
+    function = compile_serializer(serializer_class)
+    if function is None:
+        return serializer_class(instance, many=many, context=context or {}).data
+    return FastSerializer(serializer_class, function, instance, many=many, context=context).data
+
+
+class FastSerializerMixin:
+    """
+    Mixin de vistas genéricas: ``list`` y ``retrieve`` con respuesta JSON usan
+    la serialización compilada de ``get_serializer_class()``. El resto de las
+    acciones, y la API navegable (que arma formularios con el serializer),
+    siguen usando DRF.
+
+    Las funciones de ``serializer_class`` y de ``fast_serializer_classes`` se
+    compilan al definir la vista, es decir, al cargar las URLs.
+    """
+    fast_serializer_classes = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        serializer_classes = list(cls.fast_serializer_classes)
+        if getattr(cls, 'serializer_class', None) is not None:
+            serializer_classes.append(cls.serializer_class)
+        for serializer_class in serializer_classes:
+            compile_serializer(serializer_class)
+
+    def use_fast_serializer(self):
+        request = self.request
+        renderer = getattr(request, 'accepted_renderer', None)
+        action = getattr(self, 'action', None) or {'GET': 'list'}.get(request.method)
+        return (
+            request.method == 'GET'
+            and action in FAST_ACTIONS
+            and renderer is not None
+            and renderer.format == 'json'
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if self.use_fast_serializer() and args and not kwargs.keys() - {'many'}:
+            serializer_class = self.get_serializer_class()
+            function = compile_serializer(serializer_class)
+            if function is not None:
+                return FastSerializer(
+                    serializer_class, function, args[0],
+                    many=kwargs.get('many', False), context=self.get_serializer_context(),
+                )
+        return super().get_serializer(*args, **kwargs)
+
+
+def verify_equivalence(serializer_class, instances, context=None):
+    """
+    Serializa ``instances`` con DRF y con la función compilada y lanza
+    ``AssertionError`` ante la primera diferencia. Retorna la cantidad de
+    objetos comparados.
+    """
+    function = compile_serializer(serializer_class)
+    if function is None:
+        raise AssertionError(f'{serializer_class.__name__} no se puede compilar.')
+    context = context or {}
+    request = context.get('request')
+    count = 0
+    for obj in instances:
+        expected = dict(serializer_class(obj, context=context).data)
+        try:
+            actual = function(obj, request)
+        except FastPathFallback:
+            continue
+        if _normalize(actual) != _normalize(expected):
+            raise AssertionError(
+                f'{serializer_class.__name__} difiere para pk={obj.pk}:\n'
+                f'  DRF:       {expected!r}\n  compilado: {actual!r}'
+            )
+        count += 1
+    return count
+
+
+def _normalize(value):
+    # ReturnDict/OrderedDict de DRF frente a dict: se compara también el orden
+    if isinstance(value, dict):
+        return [(key, _normalize(item)) for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
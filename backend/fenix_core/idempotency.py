@@ -0,0 +1,110 @@
+"""
+Solicitudes idempotentes con el encabezado ``Idempotency-Key``.
+
+El frontend reintenta las creaciones que fallan por la red. Si el reintento
+trae la misma clave que una solicitud ya procesada, ``idempotent`` devuelve
+la respuesta original guardada en la caché (``IDEMPOTENCY_KEY_TTL``
+segundos) sin ejecutar la vista: no se repiten las consultas de validación,
+el guardado ni las señales (correos, notificaciones).
+
+La clave vale por usuario, método y ruta. Reutilizarla con otro contenido
+responde 422, y un reintento que llega mientras la solicitud original sigue
+en curso responde 409. Solo se guardan las respuestas exitosas: tras un
+error se puede reintentar con la misma clave.
+"""
+
+import functools
+import hashlib
+
+import orjson
+from django.conf import settings
+from django.core.cache import cache
+from django.http.request import RawPostDataException
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+CACHE_PREFIX = 'idempotency:'
+MAX_KEY_LENGTH = 255
+# Segundos que una solicitud en curso retiene su clave (más que el tiempo máximo de una importación)
+LOCK_SECONDS = 300
+# Encabezados de la respuesta original que se repiten en las respuestas guardadas
+STORED_HEADERS = ('Location',)
+
+
+def _fingerprint(request):
+    """Hash del contenido de la solicitud, para detectar una clave reutilizada con otros datos."""
+    digest = hashlib.sha256(f'{request.method}:{request.get_full_path()}:'.encode())
+    if request.content_type.startswith('multipart/'):
+        # El separador de las partes cambia en cada envío: se usa el contenido de campos y archivos
+        for name, values in sorted(request.POST.lists()):
+            digest.update(orjson.dumps([name, values]))
+        for name, upload in sorted(request.FILES.items()):
+            digest.update(orjson.dumps([name, upload.name, upload.size]))
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+        return digest.hexdigest()
+    try:
+        digest.update(request.body)
+    except RawPostDataException:
+        # El cuerpo ya se leyó como stream: se usan los datos interpretados
+        digest.update(orjson.dumps(request.data, option=orjson.OPT_SORT_KEYS, default=str))
+    return digest.hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        return Response(
+            {'error': 'La Idempotency-Key ya se usó con una solicitud distinta.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored['data'], status=stored['status'], headers=stored['headers'])
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(handler):
+    """
+    Decorador para los métodos ``create``/``post`` de las vistas de DRF. Se
+    ejecuta después de la autenticación y los permisos, y antes de leer y
+    validar los datos.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'La Idempotency-Key no puede superar {MAX_KEY_LENGTH} caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        scope = hashlib.sha256(f'{request.user.pk}:{request.method}:{request.path}:{key}'.encode()).hexdigest()
+        cache_key = f'{CACHE_PREFIX}{scope}'
+        fingerprint = _fingerprint(request)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        lock_key = f'{cache_key}:lock'
+        if not cache.add(lock_key, fingerprint, timeout=LOCK_SECONDS):
+            return Response(
+                {'error': 'Hay una solicitud en curso con esta Idempotency-Key.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            response = handler(view, request, *args, **kwargs)
+            if status.is_success(response.status_code) and isinstance(response, Response):
+                cache.set(cache_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                    'headers': {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+                }, timeout=settings.IDEMPOTENCY_KEY_TTL)
+        finally:
+            cache.delete(lock_key)
+        return response
+    return wrapper
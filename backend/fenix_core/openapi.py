@@ -0,0 +1,28 @@
+"""
+Descripción de la API para el esquema OpenAPI (drf_yasg).
+
+El esquema se genera al construir la imagen con
+``python manage.py generate_swagger openapi.json --overwrite``, que toma
+``API_INFO`` de ``SWAGGER_SETTINGS['DEFAULT_INFO']``. Este módulo importa
+drf_yasg y recorre todos los serializers: solo se carga para generar el
+esquema, nunca al cargar las URLs (ver ``api_docs.py``).
+"""
+
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+API_INFO = openapi.Info(
+    title="FenixClinicas API",
+    default_version='v1',
+    description="API para gestión de citas médicas FenixClinicas",
+    terms_of_service="https://www.fenixclinicas.com/terms/",
+    contact=openapi.Contact(email="contacto@fenixclinicas.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+
+def generate_schema():
+    """Esquema OpenAPI público en JSON (bytes), como lo escribe ``generate_swagger``."""
+    schema = OpenAPISchemaGenerator(info=API_INFO).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[], pretty=True).encode(schema)
@@ -0,0 +1,43 @@
+"""
+Paginadores compartidos por el panel de administración.
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que, en PostgreSQL y sin filtros, usa la estimación de filas de
+    ``pg_class.reltuples`` en lugar de un ``COUNT(*)`` exacto sobre toda la
+    tabla. Con filtros, en otros motores o en tablas chicas cuenta normalmente.
+    """
+    # Por debajo de esta estimación el COUNT exacto es barato
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is not None and estimate >= self.exact_count_threshold:
+            return estimate
+        return super().count
+
+    def _estimated_count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples es -1 en tablas que nunca se analizaron
+        if not row or row[0] < 0:
+            return None
+        return row[0]
@@ -0,0 +1,17 @@
+"""
+Parser JSON de la API basado en ``orjson`` (ver ``renderers.py``).
+"""
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """Parser JSON rápido; orjson solo acepta UTF-8, la codificación de la API."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
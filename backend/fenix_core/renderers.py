@@ -0,0 +1,70 @@
+"""
+Renderers JSON de la API basados en ``orjson``.
+
+``ORJSONRenderer`` reemplaza al ``JSONRenderer`` de DRF: serializa en C
+fechas, horas, UUID y tipos básicos, y delega el resto (Decimal, textos
+traducibles, querysets, ...) en el codificador de DRF para producir la
+misma salida. ``StreamingJSONListRenderer`` genera un arreglo JSON por
+fragmentos para respuestas con muchas filas, sin armar el documento
+completo en memoria.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_drf_default = JSONEncoder().default
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def json_default(obj):
+    """Tipos que orjson no conoce: mismo tratamiento que el codificador de DRF."""
+    return _drf_default(obj)
+
+
+def dumps(data, indent=False):
+    return orjson.dumps(data, default=json_default, option=OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON rápido. Respeta el parámetro ``indent`` del media type
+    aceptado (orjson solo indenta con dos espacios).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        ret = dumps(data, indent=bool(indent))
+        # Igual que DRF: U+2028/U+2029 son válidos en JSON pero no en JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class StreamingJSONListRenderer:
+    """
+    Genera ``[item, item, ...]`` de a ``chunk_size`` elementos por fragmento,
+    para usar con ``StreamingHttpResponse``.
+    """
+    media_type = 'application/json'
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+
+    def iter_render(self, items):
+        yield b'['
+        buffer = []
+        first = True
+        for item in items:
+            buffer.append(dumps(item))
+            if len(buffer) >= self.chunk_size:
+                yield (b'' if first else b',') + b','.join(buffer)
+                first = False
+                buffer = []
+        if buffer:
+            yield (b'' if first else b',') + b','.join(buffer)
+        yield b']'
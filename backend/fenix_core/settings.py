@@ -3,9 +3,12 @@ Configuración de Django para el proyecto FenixClinicas.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -39,15 +42,21 @@ INSTALLED_APPS = [
     # Local apps
     'apps.users',
     'apps.appointments',
+    'apps.monitoring',
+    'apps.analytics',
+    'apps.notifications',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.MetricsMiddleware',
+    'fenix_core.throttling.LoadSheddingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'fenix_core.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -95,6 +104,32 @@ DATABASES = {
     }
 }
 
+# Réplicas de solo lectura (ver fenix_core/db_router.py). Las lecturas GET de
+# la API van a las réplicas salvo que el usuario haya escrito en los últimos
+# REPLICA_STICKY_SECONDS; las escrituras y los comandos usan siempre 'default'.
+# - PostgreSQL: DB_REPLICA_HOSTS=host1,host2 (mismas credenciales que 'default')
+# - Pruebas locales con SQLite: DB_REPLICA_SQLITE=/tmp/replica1.sqlite3,...
+#   (copias del archivo principal; no se sincronizan solas)
+for _index, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{_index}'] = {**DATABASES['default'], 'HOST': _host, 'TEST': {'MIRROR': 'default'}}
+for _index, _name in enumerate(filter(None, os.environ.get('DB_REPLICA_SQLITE', '').split(',')), start=1):
+    DATABASES[f'replica{_index}'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': _name, 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['fenix_core.db_router.ReplicaRouter'] if DATABASE_REPLICAS else []
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 2))
+REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 5))
+
+# Cache
+# El backend instrumentado registra hits/misses para las métricas.
+# En producción usar uno compartido entre workers (p. ej. InstrumentedRedisCache).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'apps.monitoring.cache.InstrumentedLocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'fenixclinicas'),
+    }
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
 
@@ -151,6 +186,28 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # JSON con orjson (ver fenix_core/renderers.py y fenix_core/parsers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'fenix_core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'fenix_core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Token bucket por alcance (throttle_scope de la vista) y usuario o IP (ver fenix_core/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': (
+        'fenix_core.throttling.TokenBucketThrottle',
+    ),
+    # Una variable vacía desactiva el límite de su alcance (p. ej. para el comando loadtest)
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('THROTTLE_RATE_LOGIN', '10/min'),
+        'login_ip': os.environ.get('THROTTLE_RATE_LOGIN_IP', '30/min'),
+        'slots': os.environ.get('THROTTLE_RATE_SLOTS', '60/min'),
+        'search': os.environ.get('THROTTLE_RATE_SEARCH', '60/min'),
+        'stats': os.environ.get('THROTTLE_RATE_STATS', '30/min'),
+    },
 }
 
 # JWT Settings
@@ -165,12 +222,67 @@ SIMPLE_JWT = {
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = 'apps.monitoring.mail.InstrumentedEmailBackend'
+EMAIL_DELIVERY_BACKEND = os.environ.get('EMAIL_DELIVERY_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# URL del frontend (enlaces en correos de invitación)
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
+
+# Métricas (Prometheus)
+# Directorio compartido por los workers de gunicorn; cada proceso escribe su propio archivo.
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'fenixclinicas_metrics'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+# Token Bearer que exige /metrics/; si está vacío el endpoint sólo responde con DEBUG
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN', '')
+
+# Archivo de citas: antigüedad (días) a partir de la cual las citas cerradas
+# se mueven a la tabla de archivo con ``archive_appointments``
+APPOINTMENT_ARCHIVE_AFTER_DAYS = int(os.environ.get('APPOINTMENT_ARCHIVE_AFTER_DAYS', 730))
+
+# Días hacia adelante con slots libres materializados (``roll_open_slots`` los extiende cada noche)
+OPEN_SLOTS_HORIZON_DAYS = int(os.environ.get('OPEN_SLOTS_HORIZON_DAYS', 60))
+
+# Calendarios externos (.ics): tamaño máximo de descarga y tiempo de espera (segundos)
+EXTERNAL_CALENDAR_MAX_BYTES = int(os.environ.get('EXTERNAL_CALENDAR_MAX_BYTES', 10 * 1024 * 1024))
+EXTERNAL_CALENDAR_TIMEOUT = float(os.environ.get('EXTERNAL_CALENDAR_TIMEOUT', 20))
+
+# Días hacia atrás que incluye el feed .ics de citas de cada usuario
+ICS_FEED_PAST_DAYS = int(os.environ.get('ICS_FEED_PAST_DAYS', 90))
+
+# Segundos que se cachea el dashboard de cada usuario (se invalida al cambiar sus citas)
+DASHBOARD_CACHE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_SECONDS', 30))
+
+# Segundos que se cachea la representación serializada de cada usuario; la
+# clave incluye updated_at, por lo que un cambio del usuario genera otra clave
+FRAGMENT_CACHE_SECONDS = int(os.environ.get('FRAGMENT_CACHE_SECONDS', 3600))
+# Fragmentos que cada proceso conserva en memoria delante de la caché compartida
+FRAGMENT_LOCAL_MAX_ENTRIES = int(os.environ.get('FRAGMENT_LOCAL_MAX_ENTRIES', 10000))
+
+# Lista de espera: minutos que se retiene un horario ofrecido y días máximos de una solicitud
+WAITLIST_OFFER_HOLD_MINUTES = int(os.environ.get('WAITLIST_OFFER_HOLD_MINUTES', 30))
+WAITLIST_MAX_DAYS = int(os.environ.get('WAITLIST_MAX_DAYS', 60))
+
+# Segundos que se guarda la respuesta de una solicitud con Idempotency-Key (reintentos del frontend)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+# Descarte de carga: peticiones simultáneas que soportan los workers (0 desactiva el conteo),
+# fracción a partir de la cual se rechazan los alcances de baja prioridad y Retry-After (segundos)
+LOAD_SHED_CAPACITY = int(os.environ.get('LOAD_SHED_CAPACITY', os.environ.get('WEB_CONCURRENCY', 4)))
+LOAD_SHED_THRESHOLD = float(os.environ.get('LOAD_SHED_THRESHOLD', 0.8))
+LOAD_SHED_SCOPES = ('stats', 'search')
+LOAD_SHED_RETRY_AFTER = int(os.environ.get('LOAD_SHED_RETRY_AFTER', 5))
+
+# Esquema OpenAPI generado al construir la imagen (generate_swagger); si no existe se genera en memoria
+OPENAPI_SCHEMA_PATH = os.environ.get('OPENAPI_SCHEMA_PATH', os.path.join(BASE_DIR, 'openapi.json'))
+SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'fenix_core.openapi.API_INFO',
+}
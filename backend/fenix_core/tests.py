@@ -0,0 +1,172 @@
+"""
+Equivalencia de la serialización compilada (``fast_serializers``) con DRF.
+
+Cada caso compara la salida compilada con ``serializer.data`` sobre objetos
+creados para recorrer las ramas del código generado: adjuntos anidados,
+usuarios sin perfil profesional, campos de opciones, URLs de archivos con y
+sin petición, y objetos que caen a DRF (``FastPathFallback``).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import orjson
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.appointments.dashboard import with_serializer_relations
+from apps.appointments.models import Appointment, AppointmentAttachment
+from apps.appointments.serializers import AppointmentSerializer
+from apps.users.models import CustomUser
+from apps.users.serializers import ProfessionalProfileSerializer, UserSerializer
+from fenix_core.fast_serializers import (
+    FastPathFallback, compile_serializer, serialize, verify_equivalence,
+)
+from fenix_core.renderers import ORJSONRenderer
+
+
+class _CodeSerializer(serializers.Serializer):
+    """Serializer sin modelo con una ruta con puntos que puede no existir."""
+    name = serializers.CharField(read_only=True)
+    code = serializers.CharField(source='details.code', read_only=True)
+
+
+class FastSerializerEquivalenceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.professional = CustomUser.objects.create_user(
+            email='profesional@example.com', password='x', first_name='Ana', last_name='Pérez',
+            role='professional', phone_number='+54 11 4000 0000',
+        )
+        profile = cls.professional.professional_profile
+        profile.specialty = 'Cardiología'
+        profile.consultation_fee = Decimal('12000.50')
+        profile.save()
+        # Paciente sin perfil profesional, con foto y fecha de nacimiento
+        cls.patient = CustomUser.objects.create_user(
+            email='paciente@example.com', password='x', first_name='Juan', last_name='Gómez',
+            role='patient', profile_picture='profile_pics/juan.png',
+            date_of_birth=timezone.localdate() - timedelta(days=365 * 40),
+        )
+        start = timezone.now().replace(microsecond=0) + timedelta(days=3)
+        cls.appointment = Appointment.objects.create(
+            patient=cls.patient, professional=cls.professional,
+            start_time=start, end_time=start + timedelta(minutes=30),
+            status='confirmed', payment_status='paid', payment_amount=Decimal('12000.50'),
+            reason='Control', notes='',
+        )
+        cls.plain_appointment = Appointment.objects.create(
+            patient=cls.patient, professional=cls.professional,
+            start_time=start + timedelta(hours=1), end_time=start + timedelta(hours=1, minutes=45),
+            reason='Consulta',
+        )
+        AppointmentAttachment.objects.create(
+            appointment=cls.appointment, title='Resultados', file='appointment_attachments/resultados.pdf',
+            uploaded_by=cls.professional,
+        )
+        AppointmentAttachment.objects.create(
+            appointment=cls.appointment, title='Receta', file='appointment_attachments/receta.pdf',
+            uploaded_by=cls.patient,
+        )
+
+    def setUp(self):
+        # Los fragmentos de UserSerializer se cachean: cada caso parte de la caché vacía
+        cache.clear()
+        self.request = Request(APIRequestFactory().get('/', HTTP_HOST='testserver'))
+
+    def assertEquivalent(self, serializer_class, instances, context=None):
+        compared = verify_equivalence(serializer_class, instances, context)
+        self.assertEqual(compared, len(instances))
+
+    def test_serializers_compile(self):
+        for serializer_class in (AppointmentSerializer, UserSerializer, ProfessionalProfileSerializer):
+            self.assertIsNotNone(compile_serializer(serializer_class), serializer_class.__name__)
+
+    def test_appointments_with_attachments(self):
+        appointments = list(with_serializer_relations(Appointment.objects.order_by('id')))
+        self.assertEquivalent(AppointmentSerializer, appointments)
+        self.assertEquivalent(AppointmentSerializer, appointments, {'request': self.request})
+
+        data = serialize(AppointmentSerializer, appointments[0], context={'request': self.request})
+        self.assertEqual(len(data['attachments']), 2)
+        self.assertEqual(data['attachments'][0]['uploaded_by_name'], 'Ana Pérez')
+        self.assertEqual(data['attachments'][0]['file'], 'http://testserver/media/appointment_attachments/resultados.pdf')
+        self.assertEqual(serialize(AppointmentSerializer, appointments[1])['attachments'], [])
+
+    def test_file_urls_without_request_are_relative(self):
+        data = serialize(UserSerializer, self.patient)
+        self.assertEqual(data['profile_picture'], '/media/profile_pics/juan.png')
+        data = serialize(UserSerializer, self.patient, context={'request': self.request})
+        self.assertEqual(data['profile_picture'], 'http://testserver/media/profile_pics/juan.png')
+
+    def test_user_without_professional_profile(self):
+        patient = CustomUser.objects.select_related('professional_profile').get(pk=self.patient.pk)
+        self.assertEquivalent(UserSerializer, [patient])
+        self.assertIsNone(serialize(UserSerializer, patient)['professional_profile'])
+
+        professional = CustomUser.objects.select_related('professional_profile').get(pk=self.professional.pk)
+        self.assertEquivalent(UserSerializer, [professional], {'request': self.request})
+        self.assertEqual(serialize(UserSerializer, professional)['professional_profile']['consultation_fee'], '12000.50')
+
+    def test_choice_fields_and_displays(self):
+        for status, _ in Appointment.STATUS_CHOICES:
+            Appointment.objects.filter(pk=self.appointment.pk).update(status=status)
+            appointment = with_serializer_relations(Appointment.objects).get(pk=self.appointment.pk)
+            self.assertEquivalent(AppointmentSerializer, [appointment])
+            data = serialize(AppointmentSerializer, appointment)
+            self.assertEqual(data['status'], status)
+            self.assertEqual(data['status_display'], appointment.get_status_display())
+
+    def test_many_and_single_match_drf(self):
+        appointments = with_serializer_relations(Appointment.objects.order_by('id'))
+        for context in ({}, {'request': self.request}):
+            expected = AppointmentSerializer(appointments, many=True, context=context).data
+            self.assertEqual(serialize(AppointmentSerializer, appointments, many=True, context=context), expected)
+            expected = AppointmentSerializer(appointments[0], context=context).data
+            self.assertEqual(serialize(AppointmentSerializer, appointments[0], context=context), expected)
+
+    def test_fallback_to_drf_for_missing_attributes(self):
+        function = compile_serializer(_CodeSerializer)
+        complete = SimpleNamespace(name='a', details=SimpleNamespace(code='X1'))
+        missing = SimpleNamespace(name='b', details=None)
+
+        self.assertEqual(function(complete), {'name': 'a', 'code': 'X1'})
+        with self.assertRaises(FastPathFallback):
+            function(missing)
+        # DRF omite el campo; la vía compilada delega ese objeto y conserva el resto
+        expected = _CodeSerializer([complete, missing], many=True).data
+        self.assertEqual(expected[1], {'name': 'b'})
+        self.assertEqual(serialize(_CodeSerializer, [complete, missing], many=True), expected)
+
+    def test_unsupported_serializer_is_not_compiled(self):
+        class WithMethod(serializers.Serializer):
+            label = serializers.SerializerMethodField()
+
+            def get_label(self, obj):
+                return 'x'
+
+        self.assertIsNone(compile_serializer(WithMethod))
+        self.assertEqual(serialize(WithMethod, object()), {'label': 'x'})
+
+    def test_list_view_matches_drf(self):
+        client = APIClient(SERVER_NAME='testserver')
+        client.force_authenticate(self.patient)
+        response = client.get('/api/v1/appointments/appointments/')
+        self.assertEqual(response.status_code, 200)
+        appointments = with_serializer_relations(Appointment.objects.order_by('-start_time'))
+        request = Request(APIRequestFactory().get('/api/v1/appointments/appointments/', HTTP_HOST='testserver'))
+        expected = orjson.loads(ORJSONRenderer().render(
+            AppointmentSerializer(appointments, many=True, context={'request': request}).data
+        ))
+        results = response.json()
+        results = results.get('results', results) if isinstance(results, dict) else results
+        self.assertEqual(
+            sorted(results, key=lambda item: item['id']),
+            sorted(expected, key=lambda item: item['id']),
+        )
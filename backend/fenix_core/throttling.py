@@ -0,0 +1,204 @@
+"""
+Límites de uso y descarte de carga para los endpoints costosos.
+
+``TokenBucketThrottle`` aplica un token bucket por alcance (``throttle_scope``
+de la vista) e identidad (usuario autenticado o IP; el inicio de sesión, IP
+y además IP y correo). La tasa de cada alcance
+(``DEFAULT_THROTTLE_RATES``, p. ej. ``'10/min'``) es a la vez la capacidad
+del bucket y su recarga por período. El estado es un único entero en la caché
+compartida: el instante teórico en que el bucket vuelve a estar lleno (GCRA),
+que se avanza con ``incr``, atómico entre workers de gunicorn.
+
+``LoadSheddingMiddleware`` cuenta las peticiones en curso de todos los
+workers. Cuando superan ``LOAD_SHED_THRESHOLD`` de ``LOAD_SHED_CAPACITY``, los
+alcances de baja prioridad (``LOAD_SHED_SCOPES``: estadísticas y búsquedas)
+responden 503 antes de ejecutarse, dejando los workers para reservas e
+inicios de sesión. Ambas respuestas incluyen ``Retry-After``.
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from apps.monitoring.metrics import registry
+
+BUCKET_CACHE_PREFIX = 'throttle:bucket:'
+IN_FLIGHT_CACHE_PREFIX = 'throttle:inflight:'
+# Las peticiones en curso se cuentan en franjas: el contador de un worker que
+# murió sin descontar sus peticiones se descarta a las dos franjas
+IN_FLIGHT_SLICE_SECONDS = 60
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+THROTTLED_REQUESTS = registry.counter(
+    'fenix_http_throttled_total',
+    'Peticiones rechazadas por alcance y motivo (rate: límite de uso, overload: descarte de carga).',
+)
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'El servidor está ocupado. Reintente en unos segundos.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait):
+        super().__init__()
+        # El manejador de excepciones de DRF lo envía como Retry-After
+        self.wait = wait
+
+
+def parse_rate(rate):
+    """``'10/min'`` → ``(10, 60)``: capacidad del bucket y segundos en que se recarga."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def take_token(key, capacity, period):
+    """
+    Consume un token del bucket ``key``. Retorna 0 si había, o los segundos
+    hasta el próximo token.
+    """
+    now = int(time.time() * 1000)
+    interval = max(period * 1000 // capacity, 1)
+    timeout = period + 1
+    # Bucket nuevo (lleno): se consume el primer token
+    if cache.add(key, now + interval, timeout=timeout):
+        return 0
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:
+        # Expiró entre add e incr
+        cache.set(key, now + interval, timeout=timeout)
+        return 0
+    if full_at - interval < now:
+        # Estaba lleno: se recalcula desde ahora. La escritura no es atómica,
+        # pero una carrera solo ocurre con el bucket lleno y admite de más
+        # como mucho un token por worker
+        cache.set(key, now + interval, timeout=timeout)
+        return 0
+    excess = full_at - now - capacity * interval
+    if excess > 0:
+        # Sin tokens: se devuelve el que se tomó
+        cache.decr(key, interval)
+        return excess / 1000
+    cache.touch(key, timeout)
+    return 0
+
+
+# ======= DESCARTE DE CARGA =======
+
+def _in_flight_key(slice_index):
+    return f'{IN_FLIGHT_CACHE_PREFIX}{slice_index}'
+
+
+def in_flight():
+    """Peticiones en curso en todos los workers (franja actual y anterior)."""
+    current = int(time.time()) // IN_FLIGHT_SLICE_SECONDS
+    counts = cache.get_many([_in_flight_key(current), _in_flight_key(current - 1)])
+    return sum(max(count, 0) for count in counts.values())
+
+
+def overloaded():
+    capacity = settings.LOAD_SHED_CAPACITY
+    return bool(capacity) and in_flight() >= capacity * settings.LOAD_SHED_THRESHOLD
+
+
+class LoadSheddingMiddleware:
+    """Cuenta las peticiones en curso en la caché compartida (ver ``overloaded``)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.LOAD_SHED_CAPACITY:
+            return self.get_response(request)
+        key = _in_flight_key(int(time.time()) // IN_FLIGHT_SLICE_SECONDS)
+        cache.add(key, 0, timeout=3 * IN_FLIGHT_SLICE_SECONDS)
+        try:
+            cache.incr(key)
+        except ValueError:
+            key = None
+        try:
+            return self.get_response(request)
+        finally:
+            if key is not None:
+                try:
+                    cache.decr(key)
+                except ValueError:
+                    pass
+
+
+# ======= THROTTLES DE DRF =======
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Límite por alcance e identidad. Las vistas sin ``throttle_scope`` (o con
+    un alcance sin tasa configurada) no se limitan.
+    """
+    scope = None
+
+    def __init__(self):
+        self.retry_after = None
+
+    def allow_request(self, request, view):
+        scope = self.scope or getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        if scope in settings.LOAD_SHED_SCOPES and overloaded():
+            THROTTLED_REQUESTS.inc(scope=scope, reason='overload')
+            raise Overloaded(wait=settings.LOAD_SHED_RETRY_AFTER)
+
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if not rate:
+            return True
+        key = f'{BUCKET_CACHE_PREFIX}{scope}:{self.get_bucket_ident(request)}'
+        self.retry_after = take_token(key, *parse_rate(rate))
+        if self.retry_after:
+            THROTTLED_REQUESTS.inc(scope=scope, reason='rate')
+            return False
+        return True
+
+    def get_bucket_ident(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def wait(self):
+        return math.ceil(self.retry_after) if self.retry_after else None
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """
+    Inicios de sesión por IP, sea cual sea el correo: Django calcula el hash
+    de la contraseña aun para correos inexistentes, así que cambiar de correo
+    no debe dar intentos gratis. Su tasa es más alta que la de ``LoginThrottle``
+    para admitir varios usuarios detrás de la misma IP.
+    """
+    scope = 'login_ip'
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """
+    Inicios de sesión por IP y correo enviado: limita los intentos contra
+    una cuenta sin que varios usuarios detrás de la misma IP (una recepción,
+    una red corporativa) compartan el bucket. Se usa junto con ``LoginIPThrottle``.
+    """
+    scope = 'login'
+
+    def get_bucket_ident(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        email = email.strip().lower() if isinstance(email, str) else ''
+        digest = hashlib.sha256(email.encode()).hexdigest()[:32]
+        return f'ip:{self.get_ident(request)}:email:{digest}'
+
+
+class StatsThrottle(TokenBucketThrottle):
+    """Para vistas de función y acciones de estadísticas, que no declaran ``throttle_scope``."""
+    scope = 'stats'
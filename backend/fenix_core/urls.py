@@ -6,36 +6,24 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+
+# Esquema OpenAPI precalculado: drf_yasg no se importa al cargar las URLs
+from fenix_core.api_docs import openapi_schema, redoc, swagger_ui
 
 # Importar las vistas del dashboard para poder usarlas directamente
-from apps.appointments.views import dashboard_stats, upcoming_appointments
+from apps.appointments.views import dashboard_stats, upcoming_appointments, dashboard_bundle
 
 # Importar las vistas de profesionales
 from apps.users.views import ProfessionalsListView, ProfessionalDetailView
 
-# API Documentation schema
-schema_view = get_schema_view(
-    openapi.Info(
-        title="FenixClinicas API",
-        default_version='v1',
-        description="API para gestión de citas médicas FenixClinicas",
-        terms_of_service="https://www.fenixclinicas.com/terms/",
-        contact=openapi.Contact(email="contacto@fenixclinicas.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     # API endpoints
     path('api/v1/users/', include('apps.users.urls')),
     path('api/v1/appointments/', include('apps.appointments.urls')),
+    path('api/v1/analytics/', include('apps.analytics.urls')),
+    path('api/v1/notifications/', include('apps.notifications.urls')),
     
     # Rutas directas para profesionales (para compatibilidad con el frontend)
     path('api/v1/professionals/', ProfessionalsListView.as_view(), name='direct-professionals-list'),
@@ -44,10 +32,15 @@ urlpatterns = [
     # Dashboard endpoints directos (para compatibilidad con el frontend)
     path('api/v1/dashboard/stats/', dashboard_stats, name='direct-dashboard-stats'),
     path('api/v1/dashboard/upcoming-appointments/', upcoming_appointments, name='direct-dashboard-upcoming-appointments'),
+    path('api/v1/dashboard/bundle/', dashboard_bundle, name='direct-dashboard-bundle'),
+    
+    # Métricas para Prometheus
+    path('metrics/', include('apps.monitoring.urls')),
     
     # API documentation
-    path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('api/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('api/openapi.json', openapi_schema, name='schema-json'),
+    path('api/docs/', swagger_ui, name='schema-swagger-ui'),
+    path('api/redoc/', redoc, name='schema-redoc'),
 ]
 
 # Serve static and media files during development
@@ -2,12 +2,20 @@
 Configuración WSGI para el proyecto FenixClinicas.
 
 Expone el módulo WSGI como una variable de nivel de módulo llamada ``application``.
+
+Las URLs (y con ellas las vistas y sus serializers compilados) se cargan
+junto con la aplicación y no en la primera petición. Con ``gunicorn --preload``
+esto ocurre una sola vez en el proceso maestro y cada worker arranca con
+todo cargado; sin ``--preload``, cada worker lo hace antes de aceptar
+conexiones.
 """
 
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fenix_core.settings')
 
 application = get_wsgi_application()
+get_resolver().url_patterns
@@ -0,0 +1,154 @@
+import React, { useState } from 'react';
+import {
+  TextField,
+  Button,
+  Typography,
+  Box,
+  Alert,
+  CircularProgress
+} from '@mui/material';
+import { useNavigate, useSearchParams } from 'react-router-dom';
+import authService from '../../services/api/authService';
+
+// Página a la que llevan los correos de invitación (importación CSV) y de recuperación
+const ResetPasswordPage: React.FC = () => {
+  const [searchParams] = useSearchParams();
+  const token = searchParams.get('token') || '';
+  const [password, setPassword] = useState('');
+  const [password2, setPassword2] = useState('');
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+  const [fieldErrors, setFieldErrors] = useState<{[key: string]: string}>({});
+  const [success, setSuccess] = useState(false);
+  const navigate = useNavigate();
+
+  const handleSubmit = async (e: React.FormEvent) => {
+    e.preventDefault();
+
+    if (password !== password2) {
+      setFieldErrors({ password2: 'Las contraseñas no coinciden' });
+      return;
+    }
+
+    setLoading(true);
+    setError(null);
+    setFieldErrors({});
+
+    try {
+      await authService.resetPassword({ token, password, password2 });
+      setSuccess(true);
+    } catch (err: any) {
+      const backendErrors = err.response?.data;
+      if (backendErrors?.token) {
+        setError(Array.isArray(backendErrors.token) ? backendErrors.token[0] : backendErrors.token);
+      } else if (backendErrors && typeof backendErrors === 'object') {
+        const newFieldErrors: {[key: string]: string} = {};
+        Object.keys(backendErrors).forEach(key => {
+          newFieldErrors[key] = Array.isArray(backendErrors[key]) ? backendErrors[key][0] : String(backendErrors[key]);
+        });
+        setFieldErrors(newFieldErrors);
+      } else {
+        setError('No se pudo definir la contraseña. Intenta nuevamente.');
+      }
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  return (
+    <Box
+      sx={{
+        width: '100%',
+        display: 'flex',
+        flexDirection: 'column',
+        alignItems: 'center',
+      }}
+    >
+      <Typography variant="h5" component="h1" gutterBottom fontWeight="bold">
+        Definir contraseña
+      </Typography>
+
+      {!token ? (
+        <Alert severity="error" sx={{ width: '100%', mb: 2 }}>
+          El enlace es inválido o ha expirado.
+        </Alert>
+      ) : success ? (
+        <Box sx={{ width: '100%' }}>
+          <Alert severity="success" sx={{ mb: 3 }}>
+            Tu contraseña se definió con éxito. Ya puedes iniciar sesión.
+          </Alert>
+          <Button
+            fullWidth
+            variant="contained"
+            onClick={() => navigate('/login')}
+          >
+            Ir al inicio de sesión
+          </Button>
+        </Box>
+      ) : (
+        <Box component="form" onSubmit={handleSubmit} sx={{ width: '100%' }}>
+          {error && (
+            <Alert severity="error" sx={{ width: '100%', mb: 2 }}>
+              {error}
+            </Alert>
+          )}
+
+          <TextField
+            margin="normal"
+            required
+            fullWidth
+            name="password"
+            label="Nueva contraseña"
+            type="password"
+            id="password"
+            autoComplete="new-password"
+            autoFocus
+            value={password}
+            onChange={(e) => setPassword(e.target.value)}
+            error={!!fieldErrors.password}
+            helperText={fieldErrors.password}
+            disabled={loading}
+          />
+
+          <TextField
+            margin="normal"
+            required
+            fullWidth
+            name="password2"
+            label="Confirmar contraseña"
+            type="password"
+            id="password2"
+            autoComplete="new-password"
+            value={password2}
+            onChange={(e) => setPassword2(e.target.value)}
+            error={!!fieldErrors.password2}
+            helperText={fieldErrors.password2}
+            disabled={loading}
+          />
+
+          <Button
+            fullWidth
+            variant="contained"
+            sx={{ mt: 3, mb: 2 }}
+            type="submit"
+            disabled={loading}
+          >
+            {loading ? <CircularProgress size={24} /> : "Guardar contraseña"}
+          </Button>
+        </Box>
+      )}
+
+      <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+        <Button
+          variant="text"
+          size="small"
+          onClick={() => navigate('/login')}
+        >
+          Volver al inicio de sesión
+        </Button>
+      </Box>
+    </Box>
+  );
+};
+
+export default ResetPasswordPage;
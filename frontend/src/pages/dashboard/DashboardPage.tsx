@@ -60,13 +60,10 @@ const DashboardPage: React.FC = () => {
     const fetchData = async () => {
       setLoading(true);
       try {
-        // Obtener estadísticas del dashboard
-        const statsData = await dashboardService.getStats();
-        setStats(statsData);
-        
-        // Obtener próximas citas
-        const appointmentsData = await dashboardService.getUpcomingAppointments(5);
-        setUpcomingAppointments(appointmentsData);
+        // Obtener estadísticas y próximas citas en una sola petición
+        const bundle = await dashboardService.getBundle(5);
+        setStats(bundle.stats);
+        setUpcomingAppointments(bundle.upcoming_appointments || []);
       } catch (error) {
         console.error('Error al obtener datos del dashboard:', error);
         // Usar datos simulados como fallback
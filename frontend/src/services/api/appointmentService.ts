@@ -147,18 +147,27 @@ const appointmentService = {
     try {
       console.log('Intentando crear una cita con datos:', data);
       
+      // La misma clave en todos los intentos: el servidor crea la cita (y envía los correos) una sola vez
+      const config = { headers: { 'Idempotency-Key': crypto.randomUUID() } };
+      
       // Primera alternativa: usando el endpoint principal
       try {
-        const response = await axiosInstance.post('/v1/appointments/', data);
+        const response = await axiosInstance.post('/v1/appointments/', data, config);
         console.log('Cita creada con éxito usando /v1/appointments/');
         return response.data;
       } catch (error: any) {
         console.error('Error al crear cita usando /v1/appointments/:', error.response || error);
         
         // Si falla, intentamos con un endpoint alternativo que use el router directamente
-        if (error.response?.status === 405) {
+        if (error.response?.status === 405 || !error.response) {
           console.log('Intentando endpoint alternativo...');
-          const alternativeResponse = await axiosInstance.post('/v1/appointments/appointments/', data);
+          const post = () => axiosInstance.post('/v1/appointments/appointments/', data, config);
+          // Tras un error de red no se sabe si la cita se creó: el reintento con la misma clave
+          // devuelve la cita ya creada en lugar de crear otra
+          const alternativeResponse = await post().catch((retryError: any) => {
+            if (retryError.response) throw retryError;
+            return post();
+          });
           console.log('Cita creada con éxito usando endpoint alternativo');
           return alternativeResponse.data;
         }
@@ -331,12 +340,64 @@ const appointmentService = {
     }
   },
   
+  // Próximos turnos libres entre varios profesionales (por especialidad o lista de IDs)
+  getNextAvailable: async (params: {
+    specialty?: string;
+    professional_ids?: number[];
+    count?: number;
+    after?: string;
+    max_days?: number;
+    per_professional?: number;
+  }) => {
+    const { professional_ids, ...rest } = params;
+    const response = await axiosInstance.get('/v1/appointments/next-available/', {
+      params: { ...rest, ...(professional_ids ? { professional_ids: professional_ids.join(',') } : {}) }
+    });
+    return response.data;
+  },
+
   // Verificar disponibilidad para una cita
   checkAvailability: async (professionalId: number, startTime: string, endTime: string) => {
     const response = await axiosInstance.get('/v1/appointments/check-availability/', {
       params: { professional_id: professionalId, start_time: startTime, end_time: endTime }
     });
     return response.data;
+  },
+
+  // URL del feed .ics de las citas del usuario (rotate=true genera una nueva e invalida la anterior)
+  getCalendarFeedUrl: async (rotate = false): Promise<string> => {
+    const response = rotate
+      ? await axiosInstance.post('/v1/appointments/feed/')
+      : await axiosInstance.get('/v1/appointments/feed/');
+    return response.data.url;
+  },
+
+  // Anotarse en la lista de espera (professional o specialty, rango de días y horario aceptable)
+  joinWaitlist: async (data: {
+    professional?: number;
+    specialty?: string;
+    date_from: string;
+    date_to: string;
+    time_from?: string;
+    time_to?: string;
+    notes?: string;
+  }) => {
+    const response = await axiosInstance.post('/v1/appointments/waitlist/', data);
+    return response.data;
+  },
+
+  // Horarios ofrecidos desde la lista de espera
+  getWaitlistOffers: async (status?: string) => {
+    const response = await axiosInstance.get('/v1/appointments/waitlist-offers/', { params: { status } });
+    return response.data;
+  },
+
+  // Aceptar (crea la cita) o rechazar una oferta de la lista de espera
+  respondWaitlistOffer: async (offerId: number, accept: boolean) => {
+    const response = await axiosInstance.post(
+      `/v1/appointments/waitlist-offers/${offerId}/${accept ? 'accept' : 'decline'}/`
+    );
+    return response.data;
   }
 };
 
@@ -149,6 +149,14 @@ const dashboardService = {
       // Proporcionar datos simulados para que la UI no falle
       return generateMockUpcomingAppointments(limit);
     }
+  },
+
+  // Obtener en una sola petición estadísticas, próximas citas, agenda de hoy y notificaciones sin leer
+  getBundle: async (limit = 5) => {
+    const response = await axiosInstance.get('/v1/dashboard/bundle/', {
+      params: { limit }
+    });
+    return response.data;
   }
 };
 